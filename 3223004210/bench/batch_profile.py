@@ -0,0 +1,81 @@
+# bench/batch_profile.py
+"""
+批量打分基准：同一批文本对分别用
+  - 逐对 similarity_ratio（单线程，基线）
+  - score_pairs 线程池（1 / 2 / 4 / 8 个线程）
+  - 进程池（ProcessPoolExecutor，文本对按块 pickle 给子进程，子进程内调用 similarity_ratio）
+计算，输出耗时与相对基线的加速比，并检查分数与 similarity_ratio 完全相同。
+有 GIL 的解释器上线程池不会随线程数加速；在 free-threaded 构建（如 python3.13t）上运行可看到扩展性。
+用法：python -m bench.batch_profile [--docs 200] [--pairs 4000] [--length 3000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_all_start_methods, get_context
+
+from bench.screen_profile import _clear_caches, _topic_text
+from src.batch import score_pairs
+from src.sim import similarity_ratio
+
+SEED = 2025
+
+
+def build_batch(rng, docs, pairs, length):
+    chars = [chr(0x4E00 + i) for i in range(3000)]
+    vocabs = [rng.sample(chars, 400) for _ in range(8)]
+    texts = [_topic_text(rng, vocabs[i % len(vocabs)], length) for i in range(docs)]
+    index_pairs = [tuple(rng.sample(range(docs), 2)) for _ in range(pairs)]
+    return texts, index_pairs
+
+
+def _ratio_chunk(chunk):
+    return [similarity_ratio(a, b) for a, b in chunk]
+
+
+def run_processes(texts, pairs, workers, chunk=256):
+    ctx = get_context("fork" if "fork" in get_all_start_methods() else None)
+    chunks = [
+        [(texts[i], texts[j]) for i, j in pairs[k : k + chunk]] for k in range(0, len(pairs), chunk)
+    ]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        return [s for part in pool.map(_ratio_chunk, chunks) for s in part]
+
+
+def _timed(fn):
+    _clear_caches()
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="线程池与进程池批量打分对比")
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--pairs", type=int, default=4000)
+    parser.add_argument("--length", type=int, default=3000)
+    args = parser.parse_args(argv)
+
+    texts, pairs = build_batch(random.Random(SEED), args.docs, args.pairs, args.length)
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(
+        f"python {sys.version.split()[0]} gil={'on' if gil else 'off'} cpus={os.cpu_count()} "
+        f"docs={len(texts)} pairs={len(pairs)}"
+    )
+
+    base, t_base = _timed(lambda: [similarity_ratio(texts[i], texts[j]) for i, j in pairs])
+    print(f"similarity_ratio      {t_base * 1000:8.1f} ms")
+    for workers in (1, 2, 4, 8):
+        scores, t = _timed(lambda w=workers: score_pairs(texts, pairs, workers=w))
+        assert scores == base, "score_pairs 与 similarity_ratio 的结果不一致"
+        print(f"threads  x{workers}           {t * 1000:8.1f} ms  ({t_base / t:.2f}x)")
+    for workers in (2, 4):
+        scores, t = _timed(lambda w=workers: run_processes(texts, pairs, w))
+        assert scores == base, "进程池与 similarity_ratio 的结果不一致"
+        print(f"processes x{workers}          {t * 1000:8.1f} ms  ({t_base / t:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# bench/df_profile.py
+"""
+停用 n-gram 剔除效果基准：比较倒排索引条目数与一次查询的耗时。
+语料由固定随机种子生成：每篇 = 主题字 + 高频虚词/标点（的、是、我们、，、。等）。
+用法：python -m bench.df_profile [max_df]
+"""
+import random
+import sys
+import time
+from collections import defaultdict
+
+from src.df import DocFreq, apply_stop, pruning_report
+from src.sim import similarity_ratio
+from src.text_norm import char_ngrams, counts, normalize
+
+SEED = 2025
+COMMON = ["的", "是", "我们", "在", "了", "和", "，", "。", "、", "这", "一个", "可以"]
+
+
+def build_corpus(rng, docs=500, length=2000):
+    chars = [chr(0x4E00 + i) for i in range(6000)]
+    corpus = []
+    for _ in range(docs):
+        vocab = rng.sample(chars, 300)
+        parts = []
+        while sum(map(len, parts)) < length:
+            parts.append(rng.choice(COMMON) if rng.random() < 0.35 else rng.choice(vocab))
+        corpus.append("".join(parts))
+    return corpus
+
+
+def build_index(vectors, stop):
+    """倒排索引：{n-gram: [(文档下标, 计数), ...]}"""
+    index = defaultdict(list)
+    for i, vec in enumerate(vectors):
+        for g, v in vec.items():
+            if g not in stop:
+                index[g].append((i, v))
+    return index
+
+
+def query_index(index, qvec):
+    """按倒排链累加点积（只取分子，用于比较遍历的条目数与耗时）"""
+    scores = defaultdict(float)
+    for g, qv in qvec.items():
+        for i, v in index.get(g, ()):
+            scores[i] += qv * v
+    return scores
+
+
+def build_table(corpus):
+    """语料的文档频率表"""
+    table = DocFreq(n=2)
+    for text in corpus:
+        table.add(text)
+    return table
+
+
+def time_pairwise(corpus):
+    """第 0 篇与全部文档逐对计算 similarity_ratio 的耗时（秒）"""
+    query = corpus[0]
+    t0 = time.perf_counter()
+    for text in corpus:
+        similarity_ratio(query, text)
+    return time.perf_counter() - t0
+
+
+def time_index(vectors, stop, repeat=20):
+    """建立剔除 stop 后的倒排索引，返回 (条目数, 以第 0 篇为查询的平均耗时秒)"""
+    index = build_index(vectors, stop)
+    q = apply_stop(vectors[0], stop)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        query_index(index, q)
+    return sum(map(len, index.values())), (time.perf_counter() - t0) / repeat
+
+
+def main():
+    max_df = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    corpus = build_corpus(random.Random(SEED))
+    table = build_table(corpus)
+    print(pruning_report(table, corpus, max_df))
+
+    vectors = [counts(char_ngrams(normalize(t), n=2)) for t in corpus]
+    t_pair = time_pairwise(corpus)
+    for label, stop in (("full", set()), ("pruned", table.stop_ngrams(max_df))):
+        size, t = time_index(vectors, stop)
+        print(f"index[{label}]: postings={size} query={t * 1000:.2f} ms")
+    print(f"similarity_ratio x {len(corpus)}: {t_pair * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
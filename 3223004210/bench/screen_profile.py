@@ -0,0 +1,88 @@
+# bench/screen_profile.py
+"""
+阈值筛查基准：一篇查询文本对一批候选，比较逐对 similarity_ratio 与 screen 的耗时，
+以及加载时预先算好候选草图（sketch）后 screen 的耗时与需要切 n-gram 的候选数。
+候选由固定随机种子生成：少量为查询的轻度改写，其余为不同主题（字表不同）的无关文本。
+用法：python -m bench.screen_profile
+"""
+import random
+import time
+
+from src import sim
+from src.sim import screen, similarity_ratio, sketch
+from src.text_norm import char_ngrams, normalize
+
+SEED = 2025
+THRESHOLD = 0.8
+
+
+def _topic_text(rng, vocab, length):
+    # 按 Zipf 权重从主题字表中抽字，模拟同主题文本的高频字
+    weights = [1 / (r + 1) for r in range(len(vocab))]
+    return "".join(rng.choices(vocab, weights, k=length))
+
+
+def build_corpus(rng, docs=300, length=3000, near=0.1):
+    chars = [chr(0x4E00 + i) for i in range(6000)]
+    query_vocab = rng.sample(chars, 400)
+    query = _topic_text(rng, query_vocab, length)
+    corpus = []
+    for i in range(docs):
+        if i % round(1 / near) == 0:
+            # 轻度改写：随机替换 5% 的字
+            s = list(query)
+            for _ in range(length // 20):
+                s[rng.randrange(length)] = rng.choice(query_vocab)
+            corpus.append("".join(s))
+        else:
+            # 无关文本：与查询共享一部分字表
+            vocab = rng.sample(query_vocab, 100) + rng.sample(chars, 300)
+            corpus.append(_topic_text(rng, vocab, length))
+    return query, corpus
+
+
+def _clear_caches():
+    # normalize / char_ngrams 带 lru_cache，每轮计时前清空，避免后跑的一方占便宜
+    normalize.cache_clear()
+    char_ngrams.cache_clear()
+
+
+def main():
+    rng = random.Random(SEED)
+    query, corpus = build_corpus(rng)
+
+    _clear_caches()
+    t0 = time.perf_counter()
+    full = [(i, s) for i, c in enumerate(corpus) if (s := similarity_ratio(query, c)) >= THRESHOLD]
+    t_full = time.perf_counter() - t0
+
+    _clear_caches()
+    t0 = time.perf_counter()
+    hits = screen(query, corpus, THRESHOLD)
+    t_screen = time.perf_counter() - t0
+
+    # 草图在加载文档时计算并缓存，不计入筛查耗时；统计真正切 n-gram 的候选数
+    sketches = [sketch(c) for c in corpus]
+    _clear_caches()
+    tokenized = []
+    orig_ngrams = sim.char_ngrams
+    sim.char_ngrams = lambda t, n=2: tokenized.append(t) or orig_ngrams(t, n=n)
+    try:
+        t0 = time.perf_counter()
+        hits_sk = screen(query, corpus, THRESHOLD, sketches=sketches)
+        t_sketch = time.perf_counter() - t0
+    finally:
+        sim.char_ngrams = orig_ngrams
+
+    assert hits == full == hits_sk, "screen 与 similarity_ratio 的结果不一致"
+    print(f"candidates={len(corpus)} hits={len(hits)} threshold={THRESHOLD}")
+    print(f"similarity_ratio: {t_full * 1000:.1f} ms")
+    print(f"screen:           {t_screen * 1000:.1f} ms  ({t_full / t_screen:.2f}x)")
+    print(
+        f"screen+sketches:  {t_sketch * 1000:.1f} ms  ({t_full / t_sketch:.2f}x), "
+        f"n-gram tokenized candidates {len(tokenized) - 1}/{len(corpus)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
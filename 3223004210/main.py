@@ -4,6 +4,7 @@
 命令行入口（带扩展功能 -n）：
 - 基础功能：读取两段文本 -> 计算相似度 -> 写入 ans.txt（保留两位小数+换行）
 - 扩展功能：可选参数 -n N 指定字符 n-gram 的窗口大小（默认 2）
+- 扩展功能：可选参数 -j N 指定计数用的进程数（默认 1）；超大文本按分段并行统计 n-gram
 - 退出码约定（与原先一致）：
     1：参数错误（例如缺少文件路径、-n 非正整数等）
     2：运行期异常（I/O 错误、读取失败等）
@@ -14,7 +15,7 @@ from src.io_utils import read_text_file, write_text_file
 from src.sim import similarity_ratio
 
 # 统一的用法提示文本（参数错误时打印）
-USAGE = "Usage: python main.py <orig_path> <copy_path> <ans_path> [-n N]"
+USAGE = "Usage: python main.py <orig_path> <copy_path> <ans_path> [-n N] [-j N]"
 
 
 def _parse_cli(argv):
@@ -22,33 +23,34 @@ def _parse_cli(argv):
     轻量命令行解析（不引入 argparse，保持与原逻辑一致）：
     支持三种传参方式：
       1) python main.py orig.txt copy.txt ans.txt
-      2) python main.py orig.txt copy.txt ans.txt -n 3
-      3) python main.py -n=3 orig.txt copy.txt ans.txt
-    返回: (orig_path, copy_path, ans_path, n)
+      2) python main.py orig.txt copy.txt ans.txt -n 3 -j 4
+      3) python main.py -n=3 -j=4 orig.txt copy.txt ans.txt
+    返回: (orig_path, copy_path, ans_path, n, workers)
     """
-    n = 2  # 默认 n-gram 窗口大小（扩展功能默认值）
+    # 带整数值的选项及默认值：-n 为 n-gram 窗口大小，-j 为计数进程数
+    opts = {"-n": 2, "-j": 1}
     files = []  # 收集位置参数（3 个文件路径）
     i = 0
     while i < len(argv):
         tok = argv[i]
-        # 形式 1：-n 3
-        if tok == "-n":
+        # 形式 1：-n 3 / -j 4
+        if tok in opts:
             # 缺少 N
             if i + 1 >= len(argv):
                 print(USAGE)
                 sys.exit(1)
             # N 必须是 int 且 > 0
             try:
-                n = int(argv[i + 1])
+                opts[tok] = int(argv[i + 1])
             except ValueError:
                 print(USAGE)
                 sys.exit(1)
             i += 2
             continue
-        # 形式 2：-n=3
-        if tok.startswith("-n="):
+        # 形式 2：-n=3 / -j=4
+        if tok[:3] in ("-n=", "-j="):
             try:
-                n = int(tok.split("=", 1)[1])
+                opts[tok[:2]] = int(tok.split("=", 1)[1])
             except ValueError:
                 print(USAGE)
                 sys.exit(1)
@@ -58,12 +60,12 @@ def _parse_cli(argv):
         files.append(tok)
         i += 1
 
-    # 必须严格 3 个文件路径；n 必须为正整数
-    if len(files) != 3 or n <= 0:
+    # 必须严格 3 个文件路径；n、进程数必须为正整数
+    if len(files) != 3 or opts["-n"] <= 0 or opts["-j"] <= 0:
         print(USAGE)
         sys.exit(1)
 
-    return files[0], files[1], files[2], n
+    return files[0], files[1], files[2], opts["-n"], opts["-j"]
 
 
 def main():
@@ -77,15 +79,15 @@ def main():
       - 任何运行期异常 -> 打印到 stderr，退出码 2
     """
     # 解析参数（内部会在参数错误时退出码 1）
-    orig_path, copy_path, ans_path, n = _parse_cli(sys.argv[1:])
+    orig_path, copy_path, ans_path, n, workers = _parse_cli(sys.argv[1:])
 
     try:
         # 读取输入
         orig_text = read_text_file(orig_path)
         copy_text = read_text_file(copy_path)
 
-        # 计算相似度（扩展：n 可调；默认 2）
-        score = similarity_ratio(orig_text, copy_text, n=n)
+        # 计算相似度（扩展：n 可调，默认 2；workers > 1 时超大文本并行计数）
+        score = similarity_ratio(orig_text, copy_text, n=n, workers=workers)
 
         # 写出结果：四舍五入保留两位 + 换行
         write_text_file(ans_path, f"{score:.2f}\n")
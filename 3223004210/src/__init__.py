@@ -1,13 +1,65 @@
 # src/__init__.py
+from importlib import import_module
+from typing import TYPE_CHECKING
+
 from . import io_utils, sim, text_norm
-from .io_utils import read_text_file, write_text_file
-from .sim import similarity_ratio
+from .io_utils import append_text_file, file_digest, read_text_file, write_text_file
+from .sim import screen, similarity_at_least, similarity_ratio, sketch
+
+if TYPE_CHECKING:  # 只给类型检查器与 pylint 看，运行时由下面的 __getattr__ 按需加载
+    from . import batch, cluster, corpus, df, index
+    from .batch import score_pairs
+    from .cluster import PairClusterer
+    from .corpus import CorpusManifest
+    from .df import DocFreq, similarity_ratio_df
+    from .index import ShardedIndex
+
+# 较重的子模块（index 会导入 multiprocessing.connection，batch 会导入线程池等）按需加载：
+# 首次访问 src.index、src.ShardedIndex 等名字时才导入，不拖慢只做逐对比对的 import main
+_LAZY_MODULES = ("batch", "cluster", "corpus", "df", "index")
+_LAZY_NAMES = {
+    "score_pairs": "batch",
+    "PairClusterer": "cluster",
+    "CorpusManifest": "corpus",
+    "DocFreq": "df",
+    "similarity_ratio_df": "df",
+    "ShardedIndex": "index",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_MODULES:
+        return import_module(f".{name}", __name__)
+    if name in _LAZY_NAMES:
+        return getattr(import_module(f".{_LAZY_NAMES[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
+
 
 __all__ = [
+    "batch",
+    "cluster",
+    "corpus",
+    "df",
+    "index",
     "io_utils",
     "sim",
     "text_norm",
+    "append_text_file",
+    "file_digest",
     "read_text_file",
     "write_text_file",
     "similarity_ratio",
+    "similarity_at_least",
+    "screen",
+    "sketch",
+    "DocFreq",
+    "similarity_ratio_df",
+    "ShardedIndex",
+    "CorpusManifest",
+    "PairClusterer",
+    "score_pairs",
 ]
@@ -0,0 +1,144 @@
+# batch.py
+"""
+线程池批量打分（可用于 free-threaded CPython，如 3.13t）：
+- 每篇文档只向量化一次，得到不可变的 DocVector（只读计数映射 + 范数），
+  各线程直接共享，不需要像进程池那样 pickle 向量
+- 不经过 normalize / char_ngrams 上的全局 lru_cache（多线程下是共享的竞争点），
+  改用按键哈希分片、每片一把锁的 VectorCache；同一篇文本在各线程间只向量化一次
+- 文本对按块分给线程池，分数与 similarity_ratio 完全相同
+
+有 GIL 的解释器上线程只在 I/O 时并行，纯计算的批量打分请仍用进程池（如 src.runner），
+两者的对比见 python -m bench.batch_profile。
+"""
+import math
+import os
+import threading
+from collections import Counter
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import NamedTuple
+
+from .sim import _dot, _jaccard_chars
+from .text_norm import char_ngrams, normalize
+
+# 未缓存版本：绕开模块级 lru_cache 的共享状态（函数本身不依赖任何全局可变状态）
+_normalize = normalize.__wrapped__
+_char_ngrams = char_ngrams.__wrapped__
+
+# 每个线程任务处理的文本对数：过小时调度开销占比高，过大时线程间负载不均
+PAIR_CHUNK = 256
+
+
+class DocVector(NamedTuple):
+    """
+    一篇文档的不可变向量表示（可在线程间共享）。
+    length: 规范化后的字符数（0 表示空文本）
+    grams: 只读的 n-gram 计数映射，键的顺序与 counts(char_ngrams(...)) 相同
+    norm: 计数向量的 L2 范数
+    chars: 过短（没有 n-gram）时为规范化文本的字符集合，用于 Jaccard 退化；否则为 None
+    """
+
+    n: int
+    length: int
+    grams: Mapping[str, int]
+    norm: float
+    chars: frozenset | None
+
+    def charset(self) -> frozenset:
+        """规范化文本的字符集合（有 n-gram 时由各 n-gram 的字符拼出，每个字符都被覆盖到）"""
+        if self.chars is not None:
+            return self.chars
+        return frozenset("".join(self.grams))
+
+
+def doc_vector(text: str, n: int = 2) -> DocVector:
+    """文本 -> DocVector；与 similarity_ratio 相同的规范化与切分，但不读写全局缓存"""
+    t = _normalize(text)
+    toks = _char_ngrams(t, n) if t else []
+    if not toks:
+        return DocVector(n, len(t), MappingProxyType({}), 0.0, frozenset(t))
+    grams = dict(Counter(toks))
+    norm = math.sqrt(sum(v * v for v in grams.values()))
+    return DocVector(n, len(t), MappingProxyType(grams), norm, None)
+
+
+def cosine(a: DocVector, b: DocVector) -> float:
+    """两篇文档的相似度，结果与 similarity_ratio(原文本 a, 原文本 b, n) 完全相同"""
+    if a.n != b.n:
+        raise ValueError("vectors built with different n")
+    if not a.length and not b.length:
+        return 1.0
+    if not a.length or not b.length:
+        return 0.0
+    if not a.grams or not b.grams:
+        return _jaccard_chars(a.charset(), b.charset())
+    den = a.norm * b.norm
+    return _dot(a.grams, b.grams) / den if den != 0 else 0.0
+
+
+class VectorCache:
+    """
+    按 (文本, n) 哈希分片的向量缓存，每片一把锁，线程安全。
+    向量化在锁外进行：两个线程同时遇到同一篇新文本时可能各算一次，结果相同，以先写入的为准。
+    每片超过 maxsize // shards 条时淘汰最早写入的条目。
+    """
+
+    def __init__(self, maxsize: int = 4096, shards: int = 16):
+        if shards <= 0 or maxsize < shards:
+            raise ValueError("need shards >= 1 and maxsize >= shards")
+        self._per_shard = maxsize // shards
+        self._shards = [({}, threading.Lock()) for _ in range(shards)]
+
+    def get(self, text: str, n: int = 2) -> DocVector:
+        key = (text, n)
+        data, lock = self._shards[hash(key) % len(self._shards)]
+        with lock:
+            vec = data.get(key)
+        if vec is not None:
+            return vec
+        vec = doc_vector(text, n)
+        with lock:
+            vec = data.setdefault(key, vec)
+            if len(data) > self._per_shard:
+                del data[next(iter(data))]
+        return vec
+
+    def __len__(self) -> int:
+        return sum(len(data) for data, _ in self._shards)
+
+
+def _score_chunk(vectors: list[DocVector], pairs) -> list[float]:
+    return [cosine(vectors[i], vectors[j]) for i, j in pairs]
+
+
+def score_pairs(
+    docs: list[str],
+    pairs: list[tuple[int, int]],
+    n: int = 2,
+    workers: int | None = None,
+    cache: VectorCache | None = None,
+) -> list[float]:
+    """
+    用线程池批量计算 docs 中若干文本对的相似度，返回与 pairs 顺序对应的分数列表。
+    参数:
+        pairs: [(i, j), ...]，i / j 为 docs 的下标
+        workers: 线程数；默认 CPU 核数，<= 1 时在当前线程内串行计算
+        cache: 可选的 VectorCache，跨批次复用向量（如同一参考语料反复被比对）
+    只有出现在 pairs 中的文档才会被向量化，每篇只做一次。
+    """
+    workers = workers or os.cpu_count() or 1
+    used = sorted({i for pair in pairs for i in pair})
+    vectorize = doc_vector if cache is None else cache.get
+    vectors: list = [None] * len(docs)
+    chunks = [pairs[k : k + PAIR_CHUNK] for k in range(0, len(pairs), PAIR_CHUNK)]
+    if workers <= 1:
+        for i in used:
+            vectors[i] = vectorize(docs[i], n)
+        return [s for chunk in chunks for s in _score_chunk(vectors, chunk)]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i, vec in zip(used, pool.map(lambda i: vectorize(docs[i], n), used), strict=True):
+            vectors[i] = vec
+        scored = pool.map(lambda chunk: _score_chunk(vectors, chunk), chunks)
+        return [s for part in scored for s in part]
@@ -0,0 +1,146 @@
+# cluster.py
+"""
+串通（抄袭团伙）聚类：逐条消费相似度引擎输出的 (doc_a, doc_b, score) 文本对，
+用并查集（union-find）把相互相似的文档合并成组，不需要 N×N 矩阵。
+- 每组维护边数、分数之和与最大值，结束时给出每组的 max / mean
+- 内存只与文档数成正比；keep_edges=True 时另外保留达到阈值的边（用于报告）
+
+命令行：python -m src.cluster pairs.tsv [--threshold 0.8] [--keep-edges]
+  pairs.tsv 每行 `doc_a<TAB>doc_b<TAB>score`，输出每组一行 JSON
+"""
+import json
+import sys
+from typing import NamedTuple
+
+
+class Cluster(NamedTuple):
+    members: list[str]  # 组内文档（排序）
+    edges: int  # 组内达到阈值的文本对数
+    max_score: float
+    mean_score: float
+    pairs: list[tuple[str, str, float]]  # keep_edges=False 时为空列表
+
+
+class PairClusterer:
+    """
+    增量并查集聚类。
+    参数:
+        threshold: 分数低于该值的文本对直接忽略
+        keep_edges: 是否保留每组的边（按组合并，小组并入大组）
+    """
+
+    def __init__(self, threshold: float = 0.0, keep_edges: bool = False):
+        self.threshold = threshold
+        self.keep_edges = keep_edges
+        self.parent: dict[str, str] = {}
+        self.size: dict[str, int] = {}  # 仅根节点：组内文档数
+        self.stats: dict[str, list] = {}  # 仅根节点：[边数, 分数和, 最大分数]
+        self.edges: dict[str, list] = {}  # 仅根节点（keep_edges 时）：组内的边
+
+    def find(self, doc: str) -> str:
+        """返回 doc 所在组的根（路径减半压缩）；未出现过的文档自成一组"""
+        parent = self.parent
+        if doc not in parent:
+            parent[doc] = doc
+            self.size[doc] = 1
+            self.stats[doc] = [0, 0.0, 0.0]
+            if self.keep_edges:
+                self.edges[doc] = []
+            return doc
+        while parent[doc] != doc:
+            parent[doc] = parent[parent[doc]]
+            doc = parent[doc]
+        return doc
+
+    def add(self, a: str, b: str, score: float) -> bool:
+        """加入一条文本对；低于阈值或自环时忽略并返回 False"""
+        if score < self.threshold or a == b:
+            return False
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # 按组大小合并：小组挂到大组下面
+            if self.size[ra] < self.size[rb]:
+                ra, rb = rb, ra
+            self.parent[rb] = ra
+            self.size[ra] += self.size.pop(rb)
+            sa, sb = self.stats[ra], self.stats.pop(rb)
+            sa[0] += sb[0]
+            sa[1] += sb[1]
+            sa[2] = max(sa[2], sb[2])
+            if self.keep_edges:
+                self.edges[ra].extend(self.edges.pop(rb))
+        st = self.stats[ra]
+        st[0] += 1
+        st[1] += score
+        st[2] = max(st[2], score)
+        if self.keep_edges:
+            self.edges[ra].append((a, b, score))
+        return True
+
+    def add_many(self, pairs) -> int:
+        """逐条加入 (a, b, score) 的可迭代对象（可以是生成器），返回被采纳的条数"""
+        return sum(self.add(a, b, score) for a, b, score in pairs)
+
+    def clusters(self, min_size: int = 2) -> list[Cluster]:
+        """输出文档数不少于 min_size 的组，按最大分数、组大小降序"""
+        members: dict[str, list[str]] = {}
+        for doc in self.parent:
+            members.setdefault(self.find(doc), []).append(doc)
+        result = []
+        for root, docs in members.items():
+            if len(docs) < min_size:
+                continue
+            edges, total, best = self.stats[root]
+            result.append(
+                Cluster(
+                    members=sorted(docs),
+                    edges=edges,
+                    max_score=best,
+                    mean_score=total / edges if edges else 0.0,
+                    pairs=list(self.edges[root]) if self.keep_edges else [],
+                )
+            )
+        result.sort(key=lambda c: (-c.max_score, -len(c.members), c.members))
+        return result
+
+
+def read_pairs(lines):
+    """逐行解析 `doc_a<TAB>doc_b<TAB>score`（空行、# 注释行跳过），生成 (a, b, score)"""
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line.strip() or line.startswith("#"):
+            continue
+        a, b, score = line.split("\t")
+        yield a, b, float(score)
+
+
+def main(argv=None) -> int:
+    """命令行入口：流式读取文本对文件，输出聚类结果（每组一行 JSON）"""
+    import argparse  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description="相似文本对的并查集聚类")
+    parser.add_argument("pairs", help="文本对文件，每行 doc_a<TAB>doc_b<TAB>score；- 表示标准输入")
+    parser.add_argument("--threshold", type=float, default=0.8, help="采纳的最低分数")
+    parser.add_argument("--keep-edges", action="store_true", help="输出每组的边")
+    args = parser.parse_args(argv)
+
+    clusterer = PairClusterer(args.threshold, args.keep_edges)
+    try:
+        if args.pairs == "-":
+            clusterer.add_many(read_pairs(sys.stdin))
+        else:
+            with open(args.pairs, encoding="utf-8") as f:
+                clusterer.add_many(read_pairs(f))
+    except OSError as e:
+        sys.stderr.write(f"I/O 错误：{e}\n")
+        return 2
+    except ValueError as e:
+        sys.stderr.write(f"输入内容格式错误：{e}\n")
+        return 2
+    for c in clusterer.clusters():
+        print(json.dumps(c._asdict(), ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
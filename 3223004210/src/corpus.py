@@ -0,0 +1,131 @@
+# corpus.py
+"""
+语料增量同步（用于每晚复查）：
+- 清单（manifest）记录每个文档的 path、size、mtime、内容摘要 digest、规范化规则 profile 与 n
+- sync() 对比当前文件与清单，把文档分为 unchanged / modified / new / deleted：
+    * size 与 mtime 都没变：直接视为未变，不读文件
+    * 否则计算摘要；摘要相同（只是被 touch 过）仍视为未变
+    * profile 或 n 与当前设置不同：视为 modified，需要重新切 n-gram
+- n-gram 向量按摘要存储：字节完全相同的文档共用一个向量，只切一次 n-gram，
+  并在 duplicates() 中报告为完全重复
+"""
+import json
+import os
+from typing import NamedTuple
+
+from .io_utils import file_digest, read_text_file, write_text_file
+from .text_norm import PROFILE, char_ngrams, counts, normalize
+
+
+class SyncReport(NamedTuple):
+    """一次同步的结果（各项为路径列表，按路径排序）"""
+
+    unchanged: list[str]
+    modified: list[str]
+    new: list[str]
+    deleted: list[str]
+    tokenized: int  # 本次实际切 n-gram 的文档数（新摘要才需要）
+    duplicates: list[list[str]]  # 字节完全相同的文档分组
+
+
+class CorpusManifest:
+    """
+    语料清单与按摘要去重的向量缓存。
+    属性:
+        n / profile: 当前使用的 n-gram 窗口与规范化规则
+        entries: {path: {"size", "mtime", "digest", "profile", "n"}}
+        vectors: {digest: n-gram 计数向量}
+    """
+
+    def __init__(self, n: int = 2, profile: str = PROFILE):
+        if n <= 0:
+            raise ValueError("n must be positive")
+        self.n = n
+        self.profile = profile
+        self.entries: dict[str, dict] = {}
+        self.vectors: dict[str, dict[str, int]] = {}
+
+    def _vectorize(self, path: str) -> dict[str, int]:
+        t = normalize(read_text_file(path))
+        return counts(char_ngrams(t, n=self.n)) if t else {}
+
+    def sync(self, paths) -> SyncReport:
+        """按当前文件列表更新清单与向量缓存，返回分类结果"""
+        unchanged, modified, new = [], [], []
+        tokenized = 0
+        current = {}
+        for path in sorted(set(paths)):
+            st = os.stat(path)
+            old = self.entries.get(path)
+            same_rules = old is not None and old["profile"] == self.profile and old["n"] == self.n
+            if (
+                same_rules
+                and old["size"] == st.st_size
+                and old["mtime"] == st.st_mtime_ns
+                and old["digest"] in self.vectors
+            ):
+                current[path] = old
+                unchanged.append(path)
+                continue
+
+            digest = file_digest(path)
+            if digest not in self.vectors:
+                # vectors 中只保存按当前规则生成的向量，摘要已存在（重复文档）时直接复用
+                self.vectors[digest] = self._vectorize(path)
+                tokenized += 1
+            current[path] = {
+                "size": st.st_size,
+                "mtime": st.st_mtime_ns,
+                "digest": digest,
+                "profile": self.profile,
+                "n": self.n,
+            }
+            if old is None:
+                new.append(path)
+            elif same_rules and old["digest"] == digest:
+                unchanged.append(path)  # 只是 mtime 变了，内容相同
+            else:
+                modified.append(path)
+
+        deleted = sorted(set(self.entries) - set(current))
+        self.entries = current
+        # 清掉不再被任何文档引用的向量
+        live = {e["digest"] for e in current.values()}
+        self.vectors = {d: v for d, v in self.vectors.items() if d in live}
+        return SyncReport(unchanged, modified, new, deleted, tokenized, self.duplicates())
+
+    def vector(self, path: str) -> dict[str, int]:
+        """文档的 n-gram 计数向量（需先 sync）"""
+        return self.vectors[self.entries[path]["digest"]]
+
+    def duplicates(self) -> list[list[str]]:
+        """字节完全相同（摘要相同）的文档分组，只返回含 2 个及以上文档的组"""
+        groups: dict[str, list[str]] = {}
+        for path, entry in sorted(self.entries.items()):
+            groups.setdefault(entry["digest"], []).append(path)
+        return [g for g in groups.values() if len(g) > 1]
+
+    def save(self, path: str) -> None:
+        """保存清单与向量缓存（JSON）"""
+        data = {
+            "n": self.n,
+            "profile": self.profile,
+            "entries": self.entries,
+            "vectors": self.vectors,
+        }
+        write_text_file(path, json.dumps(data, ensure_ascii=False))
+
+    @classmethod
+    def load(cls, path: str, n: int = 2, profile: str = PROFILE) -> "CorpusManifest":
+        """
+        读取清单；文件不存在时返回空清单。
+        清单中的 n / profile 与当前参数不同时，旧向量全部作废（下次 sync 时对应文档记为 modified）。
+        """
+        manifest = cls(n, profile)
+        if not os.path.exists(path):
+            return manifest
+        data = json.loads(read_text_file(path))
+        manifest.entries = data["entries"]
+        if data["n"] == n and data["profile"] == profile:
+            manifest.vectors = data["vectors"]
+        return manifest
@@ -0,0 +1,156 @@
+# df.py
+"""
+语料文档频率（document frequency, df）表与停用 n-gram 处理：
+- DocFreq 随文档加入/移除增量维护每个 n-gram 出现在多少篇文档中
+- df 超过阈值的 n-gram（如“的是”“我们”、标点对）视为停用 n-gram，
+  打分前可以剔除（prune）或按比例降权（down-weight）
+"""
+import json
+from collections import Counter
+
+from .io_utils import read_text_file, write_text_file
+from .sim import _dot, _norm, similarity_ratio
+from .text_norm import char_ngrams, counts, normalize
+
+
+class DocFreq:
+    """
+    增量维护的文档频率表。
+    属性:
+        n: n-gram 窗口大小（需与打分时一致）
+        docs: 已加入的文档数
+        df: {n-gram: 出现该 n-gram 的文档数}
+    """
+
+    def __init__(self, n: int = 2):
+        if n <= 0:
+            raise ValueError("n must be positive")
+        self.n = n
+        self.docs = 0
+        self.df: Counter = Counter()
+        self._stop_cache = None  # (max_df, docs, 停用集合)；表变化后失效
+
+    def ngrams(self, text: str) -> set[str]:
+        """文本规范化后的 n-gram 集合（每篇文档每个 n-gram 只计一次）"""
+        t = normalize(text)
+        return set(char_ngrams(t, n=self.n)) if t else set()
+
+    def add(self, text: str) -> set[str]:
+        """加入一篇文档，返回其 n-gram 集合"""
+        grams = self.ngrams(text)
+        self.df.update(grams)
+        self.docs += 1
+        self._stop_cache = None
+        return grams
+
+    def remove(self, text: str) -> None:
+        """移除一篇此前加入过的文档（用于语料更新）"""
+        grams = self.ngrams(text)
+        self.df.subtract(grams)
+        for g in grams:
+            if self.df[g] <= 0:
+                del self.df[g]
+        self.docs = max(0, self.docs - 1)
+        self._stop_cache = None
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def cutoff(self, max_df: float | int) -> float:
+        """
+        把 max_df 换算成文档数上限：
+          - float（0~1]：占文档总数的比例，如 0.5 表示超过一半文档都出现
+          - int：文档数
+        """
+        if isinstance(max_df, float):
+            if not 0.0 < max_df <= 1.0:
+                raise ValueError("max_df as a ratio must be in (0, 1]")
+            return max_df * self.docs
+        if max_df < 1:
+            raise ValueError("max_df as a count must be >= 1")
+        return max_df
+
+    def stop_ngrams(self, max_df: float | int = 0.5) -> set[str]:
+        """df 超过 cutoff(max_df) 的 n-gram 集合；表未变化时复用上次结果"""
+        cache = self._stop_cache
+        if cache is not None and cache[0] == max_df and cache[1] == self.docs:
+            return cache[2]
+        limit = self.cutoff(max_df)
+        stop = {g for g, c in self.df.items() if c > limit}
+        self._stop_cache = (max_df, self.docs, stop)
+        return stop
+
+    def save(self, path: str) -> None:
+        """保存为 JSON：{"n", "docs", "df"}"""
+        data = {"n": self.n, "docs": self.docs, "df": dict(self.df)}
+        write_text_file(path, json.dumps(data, ensure_ascii=False))
+
+    @classmethod
+    def load(cls, path: str) -> "DocFreq":
+        data = json.loads(read_text_file(path))
+        table = cls(data["n"])
+        table.docs = data["docs"]
+        table.df = Counter(data["df"])
+        return table
+
+
+def apply_stop(vec: dict[str, int], stop: set[str], weight: float = 0.0) -> dict[str, float]:
+    """
+    对计数向量应用停用 n-gram：
+      - weight == 0：剔除停用 n-gram
+      - 0 < weight < 1：停用 n-gram 的计数乘以 weight（降权）
+    """
+    if weight == 0:
+        return {g: v for g, v in vec.items() if g not in stop}
+    return {g: v * weight if g in stop else v for g, v in vec.items()}
+
+
+def similarity_ratio_df(
+    orig: str,
+    copy: str,
+    table: DocFreq,
+    max_df: float | int = 0.5,
+    weight: float = 0.0,
+) -> float:
+    """
+    剔除/降权停用 n-gram 之后的余弦相似度（n 取 table.n）。
+    空文本、过短文本，或处理后任一向量为空（全部是停用 n-gram）时，
+    退回 similarity_ratio 的结果，保证总有 0.0 ~ 1.0 的分数。
+    """
+    A = normalize(orig)
+    B = normalize(copy)
+    toksA = char_ngrams(A, n=table.n) if A else []
+    toksB = char_ngrams(B, n=table.n) if B else []
+    if not toksA or not toksB:
+        return similarity_ratio(orig, copy, n=table.n)
+
+    stop = table.stop_ngrams(max_df)
+    cA = apply_stop(counts(toksA), stop, weight)
+    cB = apply_stop(counts(toksB), stop, weight)
+    if not cA or not cB:
+        return similarity_ratio(orig, copy, n=table.n)
+    den = _norm(cA) * _norm(cB)
+    return _dot(cA, cB) / den if den != 0 else 0.0
+
+
+def pruning_report(table: DocFreq, texts: list[str], max_df: float | int = 0.5) -> dict:
+    """
+    估算剔除停用 n-gram 对倒排索引大小的影响。
+    倒排索引的条目数（postings）= 每篇文档不同 n-gram 个数之和。
+    返回各项计数与节省比例；texts 通常就是建表用的语料。
+    """
+    stop = table.stop_ngrams(max_df)
+    postings = 0
+    pruned = 0
+    for text in texts:
+        grams = table.ngrams(text)
+        postings += len(grams)
+        pruned += len(grams - stop)
+    return {
+        "docs": table.docs,
+        "vocab": len(table),
+        "stop_ngrams": len(stop),
+        "postings": postings,
+        "postings_pruned": pruned,
+        "saved_ratio": (1 - pruned / postings) if postings else 0.0,
+    }
@@ -0,0 +1,278 @@
+# index.py
+"""
+分片参考文档索引（scatter-gather 查询）：
+- 文档按 doc_id 的哈希分到各个分片（shard_of），每个分片只保存自己那部分文档的倒排索引
+- 每个分片由独立的工作进程提供服务；协调者（ShardedIndex）把疑似文本的 n-gram 向量
+  发给所有分片，各分片返回本地 top-k，协调者再合并出全局 top-k
+- 分片进程可以是本机子进程（Pipe），也可以是其他节点上 serve_shard 启动的服务
+  （multiprocessing.connection 的 TCP 连接），两者使用相同的消息协议
+分数与 similarity_ratio(疑似文本, 参考文档) 的 n-gram 余弦完全一致；
+没有 n-gram 的过短文本不进入索引（这类文本请直接用 similarity_ratio 逐对计算）。
+"""
+import hashlib
+import heapq
+from collections import defaultdict
+from multiprocessing import get_all_start_methods, get_context
+from multiprocessing.connection import Client, Listener
+
+from .sim import _norm
+from .text_norm import char_ngrams, counts, normalize
+
+
+def shard_of(doc_id: str, shards: int) -> int:
+    """按 doc_id 的 blake2b 哈希取模分片（不受 PYTHONHASHSEED 影响，各进程/节点结果一致）"""
+    digest = hashlib.blake2b(str(doc_id).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shards
+
+
+def vectorize(text: str, n: int = 2) -> dict[str, int]:
+    """文本 -> n-gram 计数向量（与 similarity_ratio 的预处理相同）；过短文本返回空字典"""
+    t = normalize(text)
+    return counts(char_ngrams(t, n=n)) if t else {}
+
+
+class Shard:
+    """
+    单个分片的内存倒排索引：{n-gram: [(文档槽位, 计数), ...]}。
+    删除文档或同一 doc_id 重复加入时，旧版本的槽位作废，并从它的各个 n-gram 的倒排表中删去。
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(list)
+        self.ids = []  # 槽位 -> doc_id（作废为 None）
+        self.norms = []  # 槽位 -> 向量范数
+        self.grams = []  # 槽位 -> 该文档的 n-gram 元组（作废为 None），删除时据此清理倒排表
+        self.slot = {}  # doc_id -> 当前槽位
+
+    def __len__(self) -> int:
+        return len(self.slot)
+
+    def add(self, doc_id: str, vec: dict[str, int]) -> None:
+        self.remove(doc_id)
+        if not vec:
+            return
+        slot = len(self.ids)
+        self.ids.append(doc_id)
+        self.norms.append(_norm(vec))
+        self.grams.append(tuple(vec))
+        self.slot[doc_id] = slot
+        for g, v in vec.items():
+            self.postings[g].append((slot, v))
+
+    def remove(self, doc_id: str) -> None:
+        slot = self.slot.pop(doc_id, None)
+        if slot is None:
+            return
+        postings = self.postings
+        for g in self.grams[slot]:
+            kept = [p for p in postings[g] if p[0] != slot]
+            if kept:
+                postings[g] = kept
+            else:
+                del postings[g]
+        self.ids[slot] = None
+        self.grams[slot] = None
+
+    def query(self, vec: dict[str, int], k: int) -> list[tuple[float, str]]:
+        """返回本分片 top-k：[(余弦相似度, doc_id), ...]，按分数降序"""
+        if not vec:
+            return []
+        dots = defaultdict(int)
+        postings = self.postings
+        for g, qv in vec.items():
+            for slot, v in postings.get(g, ()):
+                dots[slot] += qv * v
+        qnorm = _norm(vec)
+        ids, norms = self.ids, self.norms
+        scored = ((dot / (qnorm * norms[slot]), ids[slot]) for slot, dot in dots.items())
+        return heapq.nlargest(k, scored)
+
+
+def _cmd_add(shard: Shard, docs) -> int:
+    for doc_id, vec in docs:
+        shard.add(doc_id, vec)
+    return len(docs)
+
+
+def _cmd_remove(shard: Shard, doc_ids) -> None:
+    for doc_id in doc_ids:
+        shard.remove(doc_id)
+
+
+# 分片服务的命令表：命令名 -> 处理函数(shard, *参数)
+_COMMANDS = {
+    "add": _cmd_add,
+    "remove": _cmd_remove,
+    "query": Shard.query,
+    "size": Shard.__len__,
+}
+
+
+def _serve(conn) -> None:
+    """
+    分片服务循环（本机子进程与远程节点共用）。消息为元组：
+      ("add", [(doc_id, vec), ...]) -> 加入的文档数
+      ("remove", [doc_id, ...])     -> None
+      ("query", vec, k)             -> 本地 top-k
+      ("size",)                     -> 文档数
+      ("close",)                    -> 结束循环
+    处理出错时返回 ("error", 信息)，正常时返回 ("ok", 结果)。
+    """
+    shard = Shard()
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            return
+        cmd, args = msg[0], msg[1:]
+        if cmd == "close":
+            conn.send(("ok", None))
+            return
+        try:
+            handler = _COMMANDS.get(cmd)
+            if handler is None:
+                raise ValueError(f"unknown command: {cmd!r}")
+            result = handler(shard, *args)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+        else:
+            conn.send(("ok", result))
+
+
+def serve_shard(address: tuple[str, int], authkey: bytes, ready=None) -> None:
+    """
+    在其他节点上提供一个分片服务：监听 address，接受协调者的连接并处理消息直到 close。
+    ready：可选回调，监听开始后以实际地址调用（端口为 0 时由系统分配）。
+    """
+    with Listener(address, authkey=authkey) as listener:
+        if ready is not None:
+            ready(listener.address)
+        with listener.accept() as conn:
+            _serve(conn)
+
+
+class ShardedIndex:
+    """
+    协调者：管理若干分片连接，负责按 doc_id 分发文档与 scatter-gather 查询。
+    用法：
+        with ShardedIndex.local(4) as index:      # 本机 4 个分片子进程
+            index.add_many([(doc_id, text), ...])
+            index.query(suspect_text, k=10)       # -> [(score, doc_id), ...]
+        ShardedIndex.connect([(host, port), ...], authkey)  # 连接其他节点上的分片
+    """
+
+    def __init__(self, conns, n: int = 2, procs=()):
+        if not conns:
+            raise ValueError("at least one shard is required")
+        self.conns = list(conns)
+        self.procs = list(procs)
+        self.n = n
+
+    @classmethod
+    def local(cls, shards: int, n: int = 2) -> "ShardedIndex":
+        """启动 shards 个本机分片子进程"""
+        ctx = get_context("fork" if "fork" in get_all_start_methods() else None)
+        conns, procs = [], []
+        for _ in range(shards):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_serve, args=(child,), daemon=True)
+            proc.start()
+            child.close()
+            conns.append(parent)
+            procs.append(proc)
+        return cls(conns, n, procs)
+
+    @classmethod
+    def connect(cls, addresses, authkey: bytes, n: int = 2) -> "ShardedIndex":
+        """连接已由 serve_shard 启动的分片服务；分片顺序决定 doc_id 的归属，需保持一致"""
+        return cls([Client(tuple(addr), authkey=authkey) for addr in addresses], n)
+
+    def _call(self, i: int, *msg):
+        self.conns[i].send(msg)
+        return self._reply(i)
+
+    def _reply(self, i: int):
+        status, result = self.conns[i].recv()
+        if status != "ok":
+            raise RuntimeError(f"shard {i}: {result}")
+        return result
+
+    def _gather(self, shards) -> list:
+        """
+        依次读取 shards 中各分片的回复，返回结果列表。
+        某个分片出错时也先读完其余分片的回复再抛出，避免未读的回复留在连接里，
+        被下一次调用当成自己的结果（协议错位）。
+        """
+        results, errors = [], []
+        for i in shards:
+            try:
+                results.append(self._reply(i))
+            except RuntimeError as e:
+                errors.append(str(e))
+        if errors:
+            raise RuntimeError("; ".join(errors))
+        return results
+
+    def add_many(self, docs) -> int:
+        """批量加入 [(doc_id, text), ...]，按分片打包后各发一次；返回加入的文档数"""
+        batches = defaultdict(list)
+        for doc_id, text in docs:
+            batches[shard_of(doc_id, len(self.conns))].append((doc_id, vectorize(text, self.n)))
+        for i, batch in batches.items():
+            self.conns[i].send(("add", batch))
+        return sum(self._gather(batches))
+
+    def add(self, doc_id: str, text: str) -> None:
+        self.add_many([(doc_id, text)])
+
+    def remove(self, doc_id: str) -> None:
+        self._call(shard_of(doc_id, len(self.conns)), "remove", [doc_id])
+
+    def query(self, text: str, k: int = 10) -> list[tuple[float, str]]:
+        """scatter：向量发给全部分片；gather：合并各分片的 top-k，返回全局 top-k"""
+        vec = vectorize(text, self.n)
+        if not vec:
+            return []
+        for conn in self.conns:
+            conn.send(("query", vec, k))
+        partial = self._gather(range(len(self.conns)))
+        return heapq.nlargest(k, (hit for hits in partial for hit in hits))
+
+    def sizes(self) -> list[int]:
+        """各分片的文档数"""
+        return [self._call(i, "size") for i in range(len(self.conns))]
+
+    def close(self) -> None:
+        for i, conn in enumerate(self.conns):
+            try:
+                self._call(i, "close")
+            except (EOFError, OSError):
+                pass
+            conn.close()
+        for proc in self.procs:
+            proc.join(1)
+            if proc.is_alive():
+                proc.kill()
+        self.conns, self.procs = [], []
+
+    def __enter__(self) -> "ShardedIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def main(argv=None) -> None:
+    """在本节点启动一个分片服务：python -m src.index HOST:PORT AUTHKEY"""
+    import argparse  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description="启动一个分片索引服务")
+    parser.add_argument("address", help="监听地址 HOST:PORT")
+    parser.add_argument("authkey", help="与协调者共享的认证口令")
+    args = parser.parse_args(argv)
+    host, _, port = args.address.rpartition(":")
+    serve_shard((host or "127.0.0.1", int(port)), args.authkey.encode("utf-8"))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 # io_utils.py
+import hashlib
 from pathlib import Path  # Path 对象比字符串更安全、可跨平台
 
 
@@ -33,3 +34,34 @@ def write_text_file(path: str, content: str) -> None:
     p.parent.mkdir(parents=True, exist_ok=True)
     # 写入文本（UTF-8 编码）
     p.write_text(content, encoding="utf-8")
+
+
+def append_text_file(path: str, content: str) -> None:
+    """
+    以追加方式写入文本（UTF-8），用于逐条写出批处理结果等流式输出。
+    若上级目录不存在，会自动创建。
+    参数:
+        path: 输出文件路径
+        content: 要追加的字符串内容
+    """
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    with p.open("a", encoding="utf-8") as f:
+        f.write(content)
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    计算文件原始字节的 blake2b 摘要（十六进制），分块读取，不做解码。
+    可能抛出:
+        FileNotFoundError: 当文件不存在或不是普通文件时
+    """
+    p = Path(path)
+    if not p.exists() or not p.is_file():
+        raise FileNotFoundError(f"Input file not found: {path}")
+    h = hashlib.blake2b(digest_size=16)
+    with p.open("rb") as f:
+        # 分块读取，避免大文件一次性占满内存
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
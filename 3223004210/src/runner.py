@@ -0,0 +1,305 @@
+# runner.py
+"""
+统一批处理执行器：查重（main.py）与四则运算批改（结对项目/Myapp.py）共用。
+
+- 任务清单（manifest）为 JSONL，每行一个任务，例如：
+    {"id": "p1", "kind": "sim", "orig": "a.txt", "copy": "b.txt", "ans": "ans.txt", "n": 2}
+    {"id": "g1", "kind": "grade", "exercises": "Exercises.txt", "answers": "stu1.txt",
+     "out": "stu1_Grade.txt"}
+  可选字段 timeout（秒，正数）、retries 覆盖全局设置；取值不合法的任务直接记为 error。
+- 任务在固定大小的进程池中执行；超时的任务所在进程会被终止并替换，失败或超时按 retries 重试。
+- 每完成一个任务就向结果文件追加一行 JSON（status 为 ok / error / timeout），
+  中途中断时已完成的结果不会丢失。
+
+用法：
+  python -m src.runner manifest.jsonl results.jsonl [-j 4] [--timeout 60] [--retries 1]
+"""
+import json
+import math
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing import get_all_start_methods, get_context
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import NamedTuple
+
+from .io_utils import append_text_file, read_text_file, write_text_file
+from .sim import similarity_ratio
+
+# Myapp.py 所在目录；可用环境变量 MYAPP_DIR 覆盖（默认与本项目同级的 结对项目/）
+MYAPP_DIR = os.environ.get("MYAPP_DIR", str(Path(__file__).resolve().parents[2] / "结对项目"))
+
+
+def _run_sim(task: dict) -> dict:
+    """查重任务：与 main.py 相同的读取 -> 计算 -> 写出（ans 可省略，只返回分数）"""
+    orig_text = read_text_file(task["orig"])
+    copy_text = read_text_file(task["copy"])
+    score = similarity_ratio(orig_text, copy_text, n=int(task.get("n", 2)))
+    if task.get("ans"):
+        write_text_file(task["ans"], f"{score:.2f}\n")
+    return {"score": round(score, 6)}
+
+
+def _load_myapp():
+    """按需导入 Myapp（只有批改任务才需要）"""
+    if MYAPP_DIR not in sys.path:
+        sys.path.insert(0, MYAPP_DIR)
+    import Myapp  # pylint: disable=import-error,import-outside-toplevel
+
+    return Myapp
+
+
+def _run_grade(task: dict) -> dict:
+    """批改任务：调用 Myapp.grade_pair，结果写入 out（默认 Grade.txt）"""
+    myapp = _load_myapp()
+    correct, wrong = myapp.grade_pair(
+        task["exercises"], task["answers"], task.get("out", "Grade.txt")
+    )
+    return {"correct": len(correct), "wrong": len(wrong)}
+
+
+# 任务类型 -> 处理函数；处理函数接收任务字典，返回可 JSON 序列化的结果字典
+HANDLERS = {
+    "sim": _run_sim,
+    "grade": _run_grade,
+}
+
+
+def load_manifest(path: str) -> list[dict]:
+    """读取 JSONL 任务清单（忽略空行）；某行无法解析时记为 {"_error": ...} 以便在结果中报告"""
+    tasks = []
+    for lineno, line in enumerate(read_text_file(path).splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            task = json.loads(line)
+            if not isinstance(task, dict):
+                raise ValueError("task must be a JSON object")
+        except ValueError as e:
+            task = {"_error": f"manifest line {lineno}: {e}"}
+        tasks.append(task)
+    return tasks
+
+
+def _worker_loop(conn) -> None:
+    """子进程：循环接收任务并返回 (status, payload, 耗时)，收到 None 时退出"""
+    while True:
+        task = conn.recv()
+        if task is None:
+            return
+        t0 = time.perf_counter()
+        try:
+            payload = HANDLERS[task["kind"]](task)
+            status = "ok"
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            payload = f"{type(e).__name__}: {e}"
+            status = "error"
+        conn.send((status, payload, time.perf_counter() - t0))
+
+
+class _Job(NamedTuple):
+    """一次待执行的任务：attempt 从 1 开始；timeout、retries 为已校验的本任务设置"""
+
+    index: int
+    task: dict
+    attempt: int = 0
+    timeout: float = 0.0
+    retries: int = 0
+
+
+def _job_for(index: int, task: dict, timeout: float, retries: int) -> _Job:
+    """校验任务并取得它的 timeout / retries（任务字段覆盖全局设置）；不能执行时抛出 ValueError"""
+    if "_error" in task:
+        raise ValueError(task["_error"])
+    if task.get("kind") not in HANDLERS:
+        raise ValueError(f"unknown kind: {task.get('kind')!r}")
+    try:
+        limit = float(task.get("timeout", timeout))
+        tries = int(task.get("retries", retries))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"bad timeout/retries: {e}") from None
+    if not 0 < limit < math.inf:
+        raise ValueError(f"timeout must be a positive number, got {task.get('timeout')!r}")
+    return _Job(index, task, 1, limit, max(tries, 0))
+
+
+class _Worker:
+    """进程池中的一个工作进程，同一时刻最多执行一个任务"""
+
+    def __init__(self, ctx):
+        self.conn, child = ctx.Pipe()
+        self.proc = ctx.Process(target=_worker_loop, args=(child,), daemon=True)
+        self.proc.start()
+        child.close()
+        self.job = None  # 正在执行的 _Job
+        self.deadline = None
+
+    def start(self, job: _Job) -> None:
+        """把任务发给子进程；子进程已退出时抛出 OSError（如 BrokenPipeError）"""
+        self.conn.send(job.task)
+        self.job = job
+        self.deadline = time.monotonic() + job.timeout
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.proc.join(1)
+        self.kill()
+
+    def kill(self) -> None:
+        if self.proc.is_alive():
+            self.proc.kill()
+        self.proc.join()
+        self.conn.close()
+
+
+class _Pool:
+    """固定大小的工作进程池：分派任务、等待结果，异常退出或超时的进程被终止并替换"""
+
+    def __init__(self, size: int):
+        # fork 启动快，且子进程继承运行时注册到 HANDLERS 的处理函数；不支持时用平台默认方式
+        self.ctx = get_context("fork" if "fork" in get_all_start_methods() else None)
+        self.workers = [_Worker(self.ctx) for _ in range(size)]
+
+    def busy(self) -> bool:
+        return any(w.job for w in self.workers)
+
+    def _replace(self, i: int) -> _Worker:
+        self.workers[i].kill()
+        self.workers[i] = _Worker(self.ctx)
+        return self.workers[i]
+
+    def dispatch(self, pending: deque) -> None:
+        """给每个空闲进程分派一个任务；空闲进程已退出（发送失败）时替换后重发"""
+        for i, w in enumerate(self.workers):
+            if w.job is not None or not pending:
+                continue
+            job = pending.popleft()
+            try:
+                w.start(job)
+            except OSError:
+                self._replace(i).start(job)
+
+    def _outcome(self, i: int, ready) -> tuple | None:
+        """第 i 个进程的 (status, payload, 耗时)；仍在执行且未超时时返回 None"""
+        w = self.workers[i]
+        if w.conn in ready:
+            try:
+                outcome = w.conn.recv()
+            except EOFError:
+                # 工作进程异常退出（如被系统杀死），替换后按失败处理
+                self._replace(i)
+                return "error", "worker exited unexpectedly", 0.0
+            w.job = None
+            return outcome
+        if time.monotonic() >= w.deadline:
+            limit = w.job.timeout
+            self._replace(i)
+            return "timeout", f"exceeded {limit:g}s", limit
+        return None
+
+    def collect(self) -> list[tuple[_Job, tuple]]:
+        """等到至少一个任务完成或最早的超时时刻，返回 [(任务, (status, payload, 耗时)), ...]"""
+        busy = [w for w in self.workers if w.job]
+        now = time.monotonic()
+        ready = wait([w.conn for w in busy], max(0.0, min(w.deadline for w in busy) - now))
+        done = []
+        for i, w in enumerate(self.workers):
+            job = w.job
+            if job is None:
+                continue
+            outcome = self._outcome(i, ready)
+            if outcome is not None:
+                done.append((job, outcome))
+        return done
+
+    def close(self) -> None:
+        for w in self.workers:
+            w.stop()
+
+
+def _record(job: _Job, status: str, elapsed: float, payload) -> dict:
+    rec = {
+        "index": job.index,
+        "id": job.task.get("id", job.index),
+        "kind": job.task.get("kind"),
+        "status": status,
+        "attempts": job.attempt,
+        "elapsed": round(elapsed, 4),
+    }
+    rec["result" if status == "ok" else "error"] = payload
+    return rec
+
+
+def run_tasks(tasks: list[dict], workers: int = 0, timeout: float = 60.0, retries: int = 1):
+    """
+    在进程池中执行任务，按完成顺序逐个产出结果记录（字典）。
+    参数:
+        workers: 进程数；<= 0 时取 CPU 核数
+        timeout: 单次执行的超时秒数（任务字段 timeout 可覆盖）
+        retries: 失败或超时后的重试次数（任务字段 retries 可覆盖）
+    无法执行的任务（清单行损坏、kind 未知、timeout / retries 不合法）直接产出 error 记录，
+    attempts 为 0。
+    """
+    pending = deque()
+    for index, task in enumerate(tasks):
+        try:
+            pending.append(_job_for(index, task, timeout, retries))
+        except ValueError as e:
+            yield _record(_Job(index, task), "error", 0.0, str(e))
+    if not pending:
+        return
+
+    pool = _Pool(min(workers if workers > 0 else (os.cpu_count() or 1), len(pending)))
+    try:
+        while pending or pool.busy():
+            pool.dispatch(pending)
+            for job, (status, payload, elapsed) in pool.collect():
+                if status != "ok" and job.attempt <= job.retries:
+                    pending.append(job._replace(attempt=job.attempt + 1))
+                else:
+                    yield _record(job, status, elapsed, payload)
+    finally:
+        pool.close()
+
+
+def run_manifest(
+    manifest: str, out: str, workers: int = 0, timeout: float = 60.0, retries: int = 1
+) -> dict:
+    """执行任务清单并把结果逐行写入 out（JSONL），返回各状态的计数"""
+    write_text_file(out, "")
+    summary = {"total": 0, "ok": 0, "error": 0, "timeout": 0}
+    for rec in run_tasks(load_manifest(manifest), workers, timeout, retries):
+        append_text_file(out, json.dumps(rec, ensure_ascii=False) + "\n")
+        summary["total"] += 1
+        summary[rec["status"]] += 1
+    return summary
+
+
+def main(argv=None) -> int:
+    """命令行入口：全部成功返回 0；有失败或超时的任务返回 2（与 main.py 的运行期错误一致）"""
+    import argparse  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description="查重/批改统一批处理执行器")
+    parser.add_argument("manifest", help="JSONL 任务清单")
+    parser.add_argument("out", help="JSONL 结果输出文件")
+    parser.add_argument("-j", "--workers", type=int, default=0, help="进程数（默认 CPU 核数）")
+    parser.add_argument("--timeout", type=float, default=60.0, help="单个任务超时秒数")
+    parser.add_argument("--retries", type=int, default=1, help="失败/超时后的重试次数")
+    args = parser.parse_args(argv)
+
+    try:
+        summary = run_manifest(args.manifest, args.out, args.workers, args.timeout, args.retries)
+    except OSError as e:
+        sys.stderr.write(f"I/O 错误：{e}\n")
+        return 2
+    print(json.dumps(summary, ensure_ascii=False))
+    return 0 if summary["ok"] == summary["total"] else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,11 @@
 # sim.py
 import math
+from collections.abc import Sequence
+from itertools import accumulate, repeat
+from operator import itemgetter, mul
+from typing import NamedTuple
 
-from .text_norm import char_ngrams, counts, normalize
+from .text_norm import PARALLEL_MIN_CHARS, char_ngrams, counts, normalize, parallel_counts
 
 
 def _dot(a: dict[str, int], b: dict[str, int]) -> int:
@@ -38,7 +42,7 @@ def _jaccard_chars(a: str, b: str) -> float:
     return inter / union if union else 0.0  # 正常不会出现 union=0
 
 
-def similarity_ratio(orig: str, copy: str, n: int = 2) -> float:
+def similarity_ratio(orig: str, copy: str, n: int = 2, workers: int = 1) -> float:
     """
     计算两段文本的相似度（0.0 ~ 1.0）：
     1) 规范化文本（normalize）
@@ -46,6 +50,7 @@ def similarity_ratio(orig: str, copy: str, n: int = 2) -> float:
     3) 提取 n-gram（默认 2）
     4) 若任一没有 n-gram（文本过短） -> 退化为字符集合 Jaccard
     5) 否则计算 n-gram 计数字典的余弦相似度： dot / (normA * normB)
+    workers > 1 且文本足够长时，用 parallel_counts 分段并行计数，结果与串行完全相同。
     """
     # 先规范化，降低格式差异影响（空白/换行/前后空格）
     A = normalize(orig)
@@ -57,6 +62,14 @@ def similarity_ratio(orig: str, copy: str, n: int = 2) -> float:
     if not A or not B:
         return 0.0
 
+    if workers > 1 and max(len(A), len(B)) >= PARALLEL_MIN_CHARS:
+        cA = parallel_counts(A, n=n, workers=workers)
+        cB = parallel_counts(B, n=n, workers=workers)
+        if not cA or not cB:
+            return _jaccard_chars(A, B)
+        den = _norm(cA) * _norm(cB)
+        return (_dot(cA, cB) / den) if den != 0 else 0.0
+
     # 生成 n-gram 序列
     toksA = char_ngrams(A, n=n)
     toksB = char_ngrams(B, n=n)
@@ -73,3 +86,194 @@ def similarity_ratio(orig: str, copy: str, n: int = 2) -> float:
     num = _dot(cA, cB)
     den = _norm(cA) * _norm(cB)
     return (num / den) if den != 0 else 0.0  # 理论上 den 不会为 0，这里防御性返回 0.0
+
+
+# 阈值筛查：按计数从大到小遍历查询向量，累计平方和达到这些比例时检查一次上界
+_CHECKPOINTS = (0.5, 0.75, 0.9)
+# 上界比较的相对容差：只在上界明显低于阈值时才排除，避免浮点误差误杀临界样本
+_BOUND_EPS = 1e-9
+# 文档草图中字符位图的位数：字符按码点取模映射到其中一位（不同字符可能共用一位）
+SKETCH_BITS = 1024
+
+
+class DocSketch(NamedTuple):
+    """
+    文档草图（固定大小，加载文档时计算一次，与文档一起缓存）：
+    length: 规范化后的字符数；mask: 规范化文本中出现过的字符的位图
+    只需规范化，不切 n-gram；筛查时在切 n-gram 之前用它排除不可能达到阈值的文本对。
+    """
+
+    length: int
+    mask: int
+
+
+def _char_mask(text: str) -> int:
+    mask = 0
+    for c in set(text):
+        mask |= 1 << (ord(c) % SKETCH_BITS)
+    return mask
+
+
+def sketch(text: str) -> DocSketch:
+    """计算文本的草图"""
+    t = normalize(text)
+    return DocSketch(len(t), _char_mask(t))
+
+
+class _Query(NamedTuple):
+    """
+    预处理后的筛查查询（多篇候选共用，只算一次）。
+    length 为 n-gram 总数，0 表示查询为空或过短（没有 n-gram），需走 similarity_ratio 的边界逻辑。
+    top_sq：n-gram 按计数从大到小排序后，前 k 个计数的平方和（下标 k-1）。
+    by_mask：[(n-gram 各字符的位图, 这些 n-gram 计数的平方和), ...]。
+    segments：在累计平方和达到 _CHECKPOINTS 各比例处切开排序后的 n-gram，
+    每段为 (键列表, 计数列表, 该段之后剩余的平方和)。
+    """
+
+    text: str
+    n: int
+    length: int = 0
+    norm2: int = 0
+    top_sq: Sequence[int] = ()
+    by_mask: Sequence[tuple[int, int]] = ()
+    segments: Sequence[tuple[list[str], list[int], int]] = ()
+
+
+def _mask_weights(items: list[tuple[str, int]]) -> list[tuple[int, int]]:
+    """按 n-gram 的字符位图汇总计数的平方和"""
+    by_mask: dict[int, int] = {}
+    for g, v in items:
+        m = _char_mask(g)
+        by_mask[m] = by_mask.get(m, 0) + v * v
+    return list(by_mask.items())
+
+
+def _segments(items: list[tuple[str, int]], top_sq: list[int]) -> list:
+    """按 _CHECKPOINTS 切分已按计数降序排列的 n-gram，见 _Query.segments"""
+    norm2 = top_sq[-1]
+    cuts = []
+    fracs = list(_CHECKPOINTS)
+    for i, acc in enumerate(top_sq, start=1):
+        while fracs and acc >= fracs[0] * norm2:
+            fracs.pop(0)
+            cuts.append(i)
+    cuts.append(len(items))
+
+    segments = []
+    start = 0
+    rest = norm2
+    for end in cuts:
+        if end <= start:
+            continue
+        seg = items[start:end]
+        rest -= sum(v * v for _, v in seg)
+        segments.append(([k for k, _ in seg], [v for _, v in seg], rest))
+        start = end
+    return segments
+
+
+def _prepare_query(text: str, n: int) -> _Query:
+    """预处理筛查用的查询文本：计数、按计数降序排序并算出各上界要用的汇总量"""
+    t = normalize(text)
+    toks = char_ngrams(t, n=n) if t else []
+    if not toks:
+        return _Query(text, n)
+    items = sorted(counts(toks).items(), key=itemgetter(1), reverse=True)
+    top_sq = list(accumulate(v * v for _, v in items))
+    return _Query(
+        text, n, len(toks), top_sq[-1], top_sq, _mask_weights(items), _segments(items, top_sq)
+    )
+
+
+def _sketch_excludes(q: _Query, sk: DocSketch, threshold: float) -> bool:
+    """只用候选的草图判断相似度是否必然低于 threshold（见 _score_at_least 的上界 1、2）"""
+    bound2 = (max(threshold, 0.0) * (1 - _BOUND_EPS)) ** 2 * q.norm2
+    len_b = sk.length - q.n + 1
+    if q.top_sq[min(len_b, len(q.top_sq)) - 1] < bound2:
+        return True
+    miss = ~sk.mask
+    return sum(w for m, w in q.by_mask if not m & miss) < bound2
+
+
+def _dot_at_least(q: _Query, b: dict[str, int], norm2_b: int, need: float) -> int | None:
+    """分段累加 q 与 b 的点积；某段结束时上界低于 need 则返回 None（上界 4）"""
+    b_get = b.get
+    dot = 0
+    rest_b = norm2_b
+    for keys, vals, rest_a in q.segments:
+        ws = list(map(b_get, keys, repeat(0)))
+        dot += sum(map(mul, vals, ws))
+        rest_b -= sum(map(mul, ws, ws))
+        if dot + math.sqrt(rest_a * rest_b) < need:
+            return None
+    return dot
+
+
+def _score_at_least(
+    q: _Query, text: str, threshold: float, sk: DocSketch | None = None
+) -> float | None:
+    """
+    计算查询 q 与 text 的相似度，达到 threshold 时返回精确值，否则返回 None。
+    sk 为 text 的草图（未给出时现算）。依次使用以下上界提前排除
+    （cos = dot / (|a| * |b|)，计数均为正整数，a 为查询、b 为候选）：
+      切 n-gram 之前，只用 b 的草图：
+      1) 长度上界：b 至多有 len_b 种 n-gram，dot <= sqrt(a 中最大的 len_b 个计数的平方和) * |b|
+      2) 字符集上界：共有的 n-gram 的每个字符都出现在 b 中，位图必被 b 的位图包含，
+         故 dot <= sqrt(a 中这些 n-gram 的平方和) * |b|
+      计数之后：
+      3) dot <= max(b) * len_a
+      4) Cauchy-Schwarz：已遍历部分的点积为 D，未遍历部分 dot <= sqrt(剩余|a|^2 * 剩余|b|^2)，
+         按查询向量的权重从大到小分段累加，每段结束检查一次
+    """
+    if sk is None:
+        sk = sketch(text)
+    if not q.length or sk.length - q.n + 1 <= 0:
+        # 空文本、过短文本：与 similarity_ratio 的边界处理完全一致
+        score = similarity_ratio(q.text, text, n=q.n)
+        return score if score >= threshold else None
+    if _sketch_excludes(q, sk, threshold):
+        return None
+
+    b = counts(char_ngrams(normalize(text), n=q.n))
+    norm2_b = sum(v * v for v in b.values())
+    den = math.sqrt(q.norm2) * math.sqrt(norm2_b)
+    need = threshold * (1 - _BOUND_EPS) * den
+    if max(b.values()) * q.length < need:
+        return None
+    dot = _dot_at_least(q, b, norm2_b, need)
+    if dot is None:
+        return None
+    score = dot / den
+    return score if score >= threshold else None
+
+
+def similarity_at_least(orig: str, copy: str, threshold: float, n: int = 2) -> float | None:
+    """
+    阈值版的 similarity_ratio：只关心相似度是否达到 threshold（如 0.8）。
+    达到时返回精确相似度（与 similarity_ratio 结果完全相同），否则返回 None；
+    明显不相似的文本对会被上界提前排除，不必算完整点积。
+    """
+    return _score_at_least(_prepare_query(orig, n), copy, threshold)
+
+
+def screen(
+    query: str,
+    candidates: list[str],
+    threshold: float = 0.8,
+    n: int = 2,
+    sketches: list[DocSketch] | None = None,
+) -> list[tuple[int, float]]:
+    """
+    批量筛查：返回相似度达到 threshold 的候选 [(下标, 精确相似度), ...]，按下标升序。
+    查询文本的规范化、计数与排序只做一次，所有候选共用。
+    sketches：与 candidates 一一对应的草图（加载候选文档时用 sketch() 算好并缓存）；
+    未给出时逐篇现算。被草图排除的候选不会切 n-gram。
+    """
+    q = _prepare_query(query, n)
+    hits = []
+    for i, text in enumerate(candidates):
+        sk = sketches[i] if sketches is not None else None
+        score = _score_at_least(q, text, threshold, sk)
+        if score is not None:
+            hits.append((i, score))
+    return hits
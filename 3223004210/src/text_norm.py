@@ -1,4 +1,5 @@
 # text_norm.py
+import os
 import re
 from collections import Counter
 from functools import lru_cache
@@ -6,6 +7,9 @@ from functools import lru_cache
 # 用一个预编译的正则来把多个空白（空格、换行、制表符等）压缩成单个空格
 _SPACE_RE = re.compile(r"\s+")
 
+# 规范化规则的版本标识：修改 normalize 的行为时需同步修改，使按旧规则缓存的向量失效
+PROFILE = "strip-bom-ws1"
+
 
 # 优化：给 normalize 加缓存
 @lru_cache(maxsize=4096)
@@ -48,3 +52,96 @@ def char_ngrams(text: str, n: int = 2) -> list[str]:
 # 优化：counts 改用 Counter
 def counts(tokens: list[str]) -> dict[str, int]:
     return dict(Counter(tokens))
+
+
+# 并行计数：文本短于该字符数时直接串行计数（进程池与共享内存的开销不划算）。
+# multiprocessing 相关模块只在真正并行计数时才导入，不拖慢 import src.text_norm
+PARALLEL_MIN_CHARS = 1 << 20
+
+
+def _encode_fixed(text: str) -> tuple[bytes, int, str]:
+    """
+    把文本编码成定长字节，便于按字符下标切片：返回 (字节, 每字符字节数, 编码名)。
+    全部字符 < U+0100 用 latin-1（1 字节），基本多文种平面内用 UTF-16（2 字节），否则 UTF-32。
+    """
+    top = ord(max(text)) if text else 0
+    if top < 0x100:
+        return text.encode("latin-1"), 1, "latin-1"
+    if top < 0x10000:
+        # surrogatepass：个别孤立代理字符也按 2 字节原样保存，保证定长
+        return text.encode("utf-16-le", "surrogatepass"), 2, "utf-16-le"
+    return text.encode("utf-32-le", "surrogatepass"), 4, "utf-32-le"
+
+
+def _count_segment(args) -> Counter:
+    """
+    工作进程：从共享内存取出字符区间 [start, end + n - 1)，统计起点落在 [start, end) 的 n-gram。
+    相邻分段重叠 n-1 个字符，因此每个 n-gram 恰好被一个分段统计一次。
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from multiprocessing.shared_memory import SharedMemory
+
+    name, width, codec, start, end, n = args
+    shm = SharedMemory(name=name)
+    try:
+        seg = bytes(shm.buf[start * width : (end + n - 1) * width]).decode(codec, "surrogatepass")
+    finally:
+        shm.close()
+    return Counter([seg[i : i + n] for i in range(len(seg) - n + 1)])
+
+
+def parallel_counts(
+    text: str, n: int = 2, workers: int | None = None, min_chars: int = PARALLEL_MIN_CHARS
+) -> dict[str, int]:
+    """
+    大文本的分段并行 n-gram 计数，结果与 counts(char_ngrams(text, n)) 完全相同（含键的顺序）。
+    - text 应为已规范化的文本
+    - 文本按字符切成若干分段（相邻重叠 n-1 个字符），放入共享内存，
+      工作进程按下标直接读取各自的分段，不需要把整段文本 pickle 给每个进程
+    - 各分段的计数按分段顺序合并
+    文本短于 min_chars 或 workers 为 1 时直接串行计数。
+    """
+    if n <= 0:
+        raise ValueError("n must be positive")
+    workers = workers or os.cpu_count() or 1
+    starts = len(text) - n + 1  # n-gram 起点个数
+    if workers <= 1 or len(text) < min_chars or starts <= 0:
+        return counts(char_ngrams(text, n=n))
+
+    # pylint: disable-next=import-outside-toplevel
+    from multiprocessing.shared_memory import SharedMemory
+
+    data, width, codec = _encode_fixed(text)
+    parts = min(workers * 4, starts)  # 多切几段，让各进程负载更均衡
+    shm = SharedMemory(create=True, size=len(data))
+    try:
+        shm.buf[: len(data)] = data
+        del data
+        tasks = _segment_tasks((shm.name, width, codec), starts, parts, n)
+        return dict(_count_in_pool(tasks, min(workers, parts)))
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _segment_tasks(shared: tuple[str, int, str], starts: int, parts: int, n: int) -> list:
+    """
+    把 n-gram 起点 [0, starts) 均分为 parts 段，生成各工作进程的参数。
+    shared: (共享内存名, 每字符字节数, 编码名)
+    """
+    bounds = [starts * i // parts for i in range(parts + 1)]
+    return [(*shared, bounds[i], bounds[i + 1], n) for i in range(parts)]
+
+
+def _count_in_pool(tasks: list, workers: int) -> Counter:
+    """用进程池统计各分段，按分段顺序合并（合并后键的顺序与串行计数相同）"""
+    # pylint: disable=import-outside-toplevel
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import get_all_start_methods, get_context
+
+    ctx = get_context("fork" if "fork" in get_all_start_methods() else None)
+    total: Counter = Counter()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        for part in pool.map(_count_segment, tasks):
+            total.update(part)
+    return total
@@ -0,0 +1,67 @@
+# 覆盖 src/batch.py：不可变文档向量、与 similarity_ratio 一致的分数、分片缓存与线程池批量打分
+import threading
+
+import pytest
+
+from src.batch import VectorCache, cosine, doc_vector, score_pairs
+from src.sim import similarity_ratio
+from src.text_norm import char_ngrams, normalize
+
+DOCS = [
+    "今天是星期天，天气晴，今天晚上我要去看电影。",
+    "今天是周天，天气晴朗，我晚上要去看电影。",
+    "  今天是星期天，\n天气晴，今天晚上我要去看电影。 ",
+    "完全不同的一段内容，讲的是别的事情。",
+    "晴",  # 过短：没有 2-gram，退化为字符 Jaccard
+    "",
+    "﻿   ",
+]
+ALL_PAIRS = [(i, j) for i in range(len(DOCS)) for j in range(len(DOCS))]
+
+
+def test_BATCH_R010_001_vector_immutable_and_exact():
+    # 目的：向量只读；cosine 与 similarity_ratio 完全相等（含空文本、过短文本的边界）
+    vec = doc_vector(DOCS[0])
+    with pytest.raises(TypeError):
+        vec.grams["今天"] = 0
+    assert doc_vector(DOCS[4]).chars == frozenset("晴")
+    assert vec.charset() == frozenset(normalize(DOCS[0]))
+    vectors = [doc_vector(d) for d in DOCS]
+    for i, j in ALL_PAIRS:
+        assert cosine(vectors[i], vectors[j]) == similarity_ratio(DOCS[i], DOCS[j])
+    with pytest.raises(ValueError):
+        cosine(vectors[0], doc_vector(DOCS[0], n=3))
+
+
+def test_BATCH_R010_002_score_pairs_threads_match_serial():
+    # 目的：线程池与串行结果相同且与 pairs 顺序对应；不读写 normalize / char_ngrams 的全局缓存
+    normalize.cache_clear()
+    char_ngrams.cache_clear()
+    pairs = ALL_PAIRS * 100  # 多于一个分块
+    expected = [similarity_ratio(DOCS[i], DOCS[j], n=3) for i, j in ALL_PAIRS] * 100
+    normalize.cache_clear()
+    char_ngrams.cache_clear()
+    assert score_pairs(DOCS, pairs, n=3, workers=4) == expected
+    assert score_pairs(DOCS, pairs, n=3, workers=1) == expected
+    assert normalize.cache_info().currsize == 0 and char_ngrams.cache_info().currsize == 0
+    assert score_pairs(DOCS, []) == []
+
+
+def test_BATCH_R010_003_sharded_cache():
+    # 目的：同一文本多线程并发取得同一个向量对象；各分片按容量淘汰最早的条目；参数检查
+    cache = VectorCache(maxsize=4, shards=2)
+    got = []
+    threads = [threading.Thread(target=lambda: got.append(cache.get(DOCS[0]))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(v is got[0] for v in got)
+    assert cache.get(DOCS[0], n=3) is not got[0]
+    for k in range(20):
+        cache.get(f"文档{k}号")
+    assert len(cache) <= 4
+    scores = score_pairs(DOCS, ALL_PAIRS, workers=2, cache=cache)
+    assert scores == [similarity_ratio(DOCS[i], DOCS[j]) for i, j in ALL_PAIRS]
+    with pytest.raises(ValueError):
+        VectorCache(maxsize=2, shards=4)
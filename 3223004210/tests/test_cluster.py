@@ -0,0 +1,54 @@
+# 覆盖 src/cluster.py：并查集合并、组内 max/mean、阈值过滤、流式输入与命令行
+import io
+import json
+
+import pytest
+
+from src import cluster
+from src.cluster import PairClusterer, read_pairs
+
+
+def test_CLU_R009_001_union_and_stats():
+    # 目的：链式相似的文档合并为一组；组内统计边数、最大分、平均分；低于阈值的边忽略
+    c = PairClusterer(threshold=0.8)
+    pairs = [("a", "b", 0.9), ("c", "d", 0.85), ("b", "c", 0.8), ("e", "f", 0.5), ("x", "x", 1.0)]
+    assert c.add_many(iter(pairs)) == 3
+    (group,) = c.clusters()
+    assert group.members == ["a", "b", "c", "d"]
+    assert group.edges == 3 and group.max_score == 0.9
+    assert group.mean_score == pytest.approx((0.9 + 0.85 + 0.8) / 3)
+    assert group.pairs == []
+    assert "e" not in c.parent  # 未采纳的边不占内存
+
+
+def test_CLU_R009_002_ordering_and_keep_edges():
+    # 目的：按最大分降序输出；keep_edges 时合并后的组保留全部边
+    c = PairClusterer(keep_edges=True)
+    c.add("p", "q", 0.7)
+    c.add("r", "s", 0.95)
+    c.add("s", "t", 0.6)
+    c.add("r", "t", 0.65)  # 组内已连通的边也计入统计
+    first, second = c.clusters()
+    assert first.members == ["r", "s", "t"] and first.edges == 3
+    assert sorted(first.pairs) == [("r", "s", 0.95), ("r", "t", 0.65), ("s", "t", 0.6)]
+    assert second.members == ["p", "q"] and second.max_score == 0.7
+    assert c.clusters(min_size=3) == [first]
+
+
+def test_CLU_R009_003_read_pairs_and_cli(tmp_path, capsys):
+    # 目的：TSV 流式解析（跳过空行与注释）；命令行每组输出一行 JSON，格式错误返回 2
+    text = "# a\tb\tscore\nd1\td2\t0.91\n\nd2\td3\t0.82\nd4\td5\t0.3\n"
+    assert list(read_pairs(io.StringIO(text))) == [
+        ("d1", "d2", 0.91),
+        ("d2", "d3", 0.82),
+        ("d4", "d5", 0.3),
+    ]
+    path = tmp_path / "pairs.tsv"
+    path.write_text(text, encoding="utf-8")
+    assert cluster.main([str(path), "--threshold", "0.8"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["members"] == ["d1", "d2", "d3"]
+
+    path.write_text("d1 d2 0.9\n", encoding="utf-8")
+    assert cluster.main([str(path)]) == 2
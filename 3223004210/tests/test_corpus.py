@@ -0,0 +1,71 @@
+# 覆盖 src/corpus.py：增量同步分类、完全重复文档合并、清单持久化与规则变化
+import os
+
+from src.corpus import CorpusManifest
+from src.index import vectorize
+
+
+def _write(path, text, mtime=None):
+    path.write_text(text, encoding="utf-8")
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+    return str(path)
+
+
+def test_SYNC_R008_001_classify_and_collapse_duplicates(tmp_path):
+    # 目的：首次同步全部为 new；字节相同的文档只切一次 n-gram 并报告为重复
+    a = _write(tmp_path / "a.txt", "机器学习是人工智能的重要分支。")
+    b = _write(tmp_path / "b.txt", "机器学习是人工智能的重要分支。")
+    c = _write(tmp_path / "c.txt", "今天天气晴朗，适合跑步。")
+    m = CorpusManifest(n=2)
+    rep = m.sync([a, b, c])
+    assert rep.new == [a, b, c] and rep.tokenized == 2
+    assert rep.duplicates == [[a, b]]
+    assert m.vector(a) is m.vector(b)
+    assert m.vector(c) == vectorize("今天天气晴朗，适合跑步。")
+
+
+def test_SYNC_R008_002_incremental_changes(tmp_path, monkeypatch):
+    # 目的：未变文档不读文件；touch 过但内容相同仍为 unchanged；修改/新增/删除分别识别
+    a = _write(tmp_path / "a.txt", "原文一", mtime=10**18)
+    b = _write(tmp_path / "b.txt", "原文二", mtime=10**18)
+    c = _write(tmp_path / "c.txt", "原文三", mtime=10**18)
+    m = CorpusManifest()
+    m.sync([a, b, c])
+    path = tmp_path / "manifest.json"
+    m.save(str(path))
+
+    m = CorpusManifest.load(str(path))
+    _write(tmp_path / "b.txt", "原文二", mtime=2 * 10**18)  # 只改 mtime
+    _write(tmp_path / "c.txt", "原文三改")  # 改内容
+    d = _write(tmp_path / "d.txt", "新文档")
+    os.remove(a)
+    reads = []
+    import src.corpus as corpus
+
+    orig = corpus.read_text_file
+    monkeypatch.setattr(corpus, "read_text_file", lambda p: reads.append(p) or orig(p))
+    rep = m.sync([b, c, d])
+    assert (rep.unchanged, rep.modified, rep.new, rep.deleted) == ([b], [c], [d], [a])
+    assert sorted(reads) == sorted([c, d]) and rep.tokenized == 2
+    assert set(m.vectors) == {m.entries[p]["digest"] for p in (b, c, d)}
+
+    reads.clear()
+    rep = m.sync([b, c, d])
+    assert rep.unchanged == [b, c, d] and reads == [] and rep.tokenized == 0
+
+
+def test_SYNC_R008_003_rule_change_marks_modified(tmp_path):
+    # 目的：n 或规范化规则变化后旧向量作废，全部文档记为 modified 并重新切 n-gram
+    a = _write(tmp_path / "a.txt", "机器学习是人工智能的重要分支。")
+    m = CorpusManifest(n=2)
+    m.sync([a])
+    path = str(tmp_path / "manifest.json")
+    m.save(path)
+
+    m3 = CorpusManifest.load(path, n=3)
+    rep = m3.sync([a])
+    assert rep.modified == [a] and rep.tokenized == 1
+    assert m3.vector(a) == vectorize("机器学习是人工智能的重要分支。", n=3)
+    assert CorpusManifest.load(path, profile="other").vectors == {}
+    assert CorpusManifest.load(str(tmp_path / "missing.json")).entries == {}
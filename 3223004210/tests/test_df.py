@@ -0,0 +1,74 @@
+# 覆盖 src/df.py：增量 df 表、停用 n-gram 剔除/降权、持久化与剪枝统计
+import pytest
+
+from src.df import DocFreq, apply_stop, pruning_report, similarity_ratio_df
+from src.sim import similarity_ratio
+
+DOCS = [
+    "我们的研究是关于机器学习的。",
+    "我们的目标是提高翻译质量的。",
+    "我们的实验是在公开数据集上的。",
+    "今天天气晴朗，适合跑步。",
+]
+
+
+def _table(docs=DOCS):
+    table = DocFreq(n=2)
+    for d in docs:
+        table.add(d)
+    return table
+
+
+def test_DF_R006_001_incremental_add_and_remove():
+    # 目的：每篇文档内重复的 n-gram 只计一次；移除后恢复原状
+    table = DocFreq(n=2)
+    table.add("的的的的")
+    assert table.docs == 1 and table.df["的的"] == 1
+    full = _table()
+    assert full.df["我们"] == 3 and full.df["天气"] == 1
+    before = dict(full.df)
+    full.add("临时加入的文档")
+    full.remove("临时加入的文档")
+    assert dict(full.df) == before and full.docs == len(DOCS)
+
+
+def test_DF_R006_002_stop_ngrams_cutoff_and_cache():
+    # 目的：max_df 为比例或文档数；表变化后停用集合重新计算
+    table = _table()
+    stop = table.stop_ngrams(0.5)
+    assert {"我们", "们的"} <= stop and "天气" not in stop
+    assert table.stop_ngrams(0.5) is stop
+    assert table.stop_ngrams(3) == set()
+    table.add("我们的")
+    assert "我们" in table.stop_ngrams(3)
+    with pytest.raises(ValueError):
+        table.cutoff(1.5)
+
+
+def test_DF_R006_003_prune_and_downweight_scores():
+    # 目的：剔除共同的高频 n-gram 后，只靠虚词相似的文本分数下降；降权介于两者之间
+    table = _table()
+    a, b = DOCS[0], DOCS[1]
+    plain = similarity_ratio(a, b)
+    pruned = similarity_ratio_df(a, b, table, max_df=0.5)
+    weighted = similarity_ratio_df(a, b, table, max_df=0.5, weight=0.3)
+    assert pruned < weighted < plain
+    assert similarity_ratio_df(a, a, table) == pytest.approx(1.0)
+    # 全部是停用 n-gram 或文本过短时退回 similarity_ratio
+    assert similarity_ratio_df("我们的", "我们的", table) == similarity_ratio("我们的", "我们的")
+    assert similarity_ratio_df("", "a", table) == 0.0
+    assert apply_stop({"x": 2, "y": 1}, {"x"}, 0.5) == {"x": 1.0, "y": 1}
+
+
+def test_DF_R006_004_save_load_and_report(tmp_path):
+    # 目的：JSON 持久化后内容不变；剪枝统计给出倒排条目数与节省比例
+    table = _table()
+    path = tmp_path / "df.json"
+    table.save(str(path))
+    loaded = DocFreq.load(str(path))
+    assert (loaded.n, loaded.docs, loaded.df) == (table.n, table.docs, table.df)
+
+    report = pruning_report(table, DOCS, max_df=0.5)
+    assert report["postings"] == sum(len(table.ngrams(d)) for d in DOCS)
+    assert report["postings_pruned"] < report["postings"]
+    assert 0 < report["saved_ratio"] < 1
@@ -0,0 +1,104 @@
+# 覆盖 src/index.py：分片归属、单分片倒排查询、本机子进程 scatter-gather 与远程分片服务
+import heapq
+import random
+import threading
+
+import pytest
+
+from src.index import Shard, ShardedIndex, serve_shard, shard_of, vectorize
+from src.sim import similarity_ratio
+
+ALPHABET = "机器学习是人工智能的重要分支今天天气晴朗适合跑步。，"
+
+
+def _corpus(count=60, seed=3):
+    rng = random.Random(seed)
+    return [(f"doc{i}", "".join(rng.choices(ALPHABET, k=rng.randint(5, 80)))) for i in range(count)]
+
+
+def _brute_force(docs, text, k):
+    return heapq.nlargest(k, ((similarity_ratio(text, d), i) for i, d in docs if vectorize(d)))
+
+
+def test_IDX_R007_001_shard_of_is_stable_and_in_range():
+    # 目的：同一 doc_id 总落在同一分片；分布覆盖全部分片
+    assert shard_of("paper-42", 4) == shard_of("paper-42", 4)
+    assert {shard_of(f"d{i}", 4) for i in range(100)} == {0, 1, 2, 3}
+
+
+def test_IDX_R007_002_single_shard_matches_similarity_ratio():
+    # 目的：倒排索引的分数与 similarity_ratio 完全一致；重复加入同一 id 以新版本为准
+    shard = Shard()
+    docs = _corpus()
+    for doc_id, text in docs:
+        shard.add(doc_id, vectorize(text))
+    query = docs[0][1] + "机器学习"
+    assert shard.query(vectorize(query), 5) == _brute_force(docs, query, 5)
+
+    shard.add("doc0", vectorize("今天天气晴朗"))
+    assert len(shard) == len(docs)
+    hits = dict((i, s) for s, i in shard.query(vectorize("今天天气晴朗"), len(docs)))
+    assert hits["doc0"] == pytest.approx(1.0)
+    shard.remove("doc0")
+    assert "doc0" not in dict((i, s) for s, i in shard.query(vectorize("今天天气晴朗"), 100))
+
+
+def test_IDX_R007_003_local_subprocess_shards_scatter_gather():
+    # 目的：3 个子进程分片的合并 top-k 与单机暴力计算结果相同
+    docs = _corpus()
+    with ShardedIndex.local(3) as index:
+        assert index.add_many(docs) == len(docs)
+        sizes = index.sizes()
+        assert len(sizes) == 3 and sum(sizes) == sum(1 for _, t in docs if vectorize(t))
+        for _, text in docs[:5]:
+            assert index.query(text, k=7) == _brute_force(docs, text, 7)
+        index.remove(docs[0][0])
+        assert docs[0][0] not in [i for _, i in index.query(docs[0][1], k=len(docs))]
+        assert index.query("a", k=3) == []
+
+
+def test_IDX_R007_004_remote_shard_over_tcp():
+    # 目的：serve_shard 提供的 TCP 分片与本机分片使用同一协议
+    ready = threading.Event()
+    addr = []
+
+    def on_ready(address):
+        addr.append(address)
+        ready.set()
+
+    t = threading.Thread(
+        target=serve_shard, args=(("127.0.0.1", 0), b"secret", on_ready), daemon=True
+    )
+    t.start()
+    assert ready.wait(5)
+    docs = _corpus(20)
+    with ShardedIndex.connect(addr, b"secret") as index:
+        index.add_many(docs)
+        assert index.query(docs[1][1], k=3) == _brute_force(docs, docs[1][1], 3)
+    t.join(5)
+    assert not t.is_alive()
+
+
+def test_IDX_R007_005_remove_prunes_postings_and_errors_keep_protocol_in_sync():
+    # 目的：删除文档时倒排表不留作废的槽位；某个分片出错时其余分片的回复也被读走，后续调用不错位
+    shard = Shard()
+    docs = _corpus(20)
+    for doc_id, text in docs:
+        shard.add(doc_id, vectorize(text))
+    for doc_id, _ in docs[:10]:
+        shard.add(doc_id, vectorize("今天天气晴朗"))  # 重复加入：旧版本的倒排项被删去
+    live = set(shard.slot.values())
+    assert all(slot in live for plist in shard.postings.values() for slot, _ in plist)
+    for doc_id, _ in docs:
+        shard.remove(doc_id)
+    assert len(shard) == 0 and not shard.postings
+
+    with ShardedIndex.local(3) as index:
+        index.add_many(docs)
+        index.conns[0].send(("bogus",))
+        for conn in index.conns[1:]:
+            conn.send(("size",))
+        with pytest.raises(RuntimeError, match="shard 0"):
+            index._gather(range(3))
+        assert sum(index.sizes()) == sum(1 for _, t in docs if vectorize(t))
+        assert index.query(docs[2][1], k=3) == _brute_force(docs, docs[2][1], 3)
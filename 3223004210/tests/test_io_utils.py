@@ -1,7 +1,7 @@
 # 覆盖 src/io_utils.py：写读一致、异常、非法字节容错
 import pytest
 
-from src.io_utils import read_text_file, write_text_file
+from src.io_utils import append_text_file, file_digest, read_text_file, write_text_file
 
 
 def test_IO_R003_001_write_then_read_roundtrip(tmp_path):
@@ -24,3 +24,24 @@ def test_IO_R003_003_read_ignores_invalid_utf8(tmp_path):
     p = tmp_path / "bad.txt"
     p.write_bytes(b"\xff\xfehello")
     assert "hello" in read_text_file(str(p))
+
+
+def test_IO_R003_004_append_creates_and_appends(tmp_path):
+    # 目的：追加写自动创建父目录，多次追加按顺序拼接
+    out = tmp_path / "sub" / "log.jsonl"
+    append_text_file(str(out), "a\n")
+    append_text_file(str(out), "b\n")
+    assert read_text_file(str(out)) == "a\nb\n"
+
+
+def test_IO_R003_005_file_digest_bytes_and_missing(tmp_path):
+    # 目的：摘要只取决于字节内容；文件不存在时抛 FileNotFoundError
+    a = tmp_path / "a.txt"
+    b = tmp_path / "b.txt"
+    a.write_bytes(b"\xff\xfehello")
+    b.write_bytes(b"\xff\xfehello")
+    assert file_digest(str(a)) == file_digest(str(b))
+    b.write_bytes(b"hello")
+    assert file_digest(str(a)) != file_digest(str(b))
+    with pytest.raises(FileNotFoundError):
+        file_digest(str(tmp_path / "missing.txt"))
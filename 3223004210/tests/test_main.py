@@ -144,3 +144,41 @@ def test_MAIN_R004_007_cli_option_n_not_int(tmp_path):
     )
     assert proc.returncode == 1
     assert "Usage:" in (proc.stdout + proc.stderr)
+
+
+def test_MAIN_R004_008_cli_option_j(tmp_path):
+    """
+    [扩展功能] -j N 指定计数进程数：
+    - 场景：-j 2 与 -j=2 都能正常运行，结果与默认单进程相同；-j 0 为参数错误（退出码 1）
+    """
+    o = tmp_path / "o.txt"
+    c = tmp_path / "c.txt"
+    o.write_text("人工智能的重要分支是机器学习。", encoding="utf-8")
+    c.write_text("机器学习是人工智能的重要分支。", encoding="utf-8")
+    outs = []
+    for extra in ([], ["-j", "2"], ["-j=2"]):
+        a = tmp_path / f"a{len(outs)}.txt"
+        _run_main_with_args([str(o), str(c), str(a)] + extra)
+        outs.append(a.read_text(encoding="utf-8"))
+    assert outs[0] == outs[1] == outs[2]
+
+    proc = subprocess.run(
+        [sys.executable, "main.py", str(o), str(c), str(tmp_path / "x.txt"), "-j", "0"],
+        capture_output=True,
+        text=True,
+    )
+    assert proc.returncode == 1
+    assert "Usage:" in (proc.stdout + proc.stderr)
+
+
+def test_MAIN_R004_009_import_does_not_load_heavy_modules():
+    # 目的：import main 不加载 index / batch 等重模块与 multiprocessing；包级名字仍可按需访问
+    code = (
+        "import sys, main, src\n"
+        "heavy = [m for m in ('src.index', 'src.batch', 'multiprocessing') if m in sys.modules]\n"
+        "assert not heavy, heavy\n"
+        "from src import ShardedIndex, score_pairs\n"
+        "assert src.index.ShardedIndex is ShardedIndex\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
@@ -0,0 +1,119 @@
+# 覆盖 src/runner.py：清单解析、进程池执行、超时终止与重试、JSONL 结果输出
+import json
+import time
+from collections import deque
+
+from src import runner
+from src.runner import load_manifest, run_manifest, run_tasks
+
+
+def _slow(task):
+    # 测试用处理函数：按 task["sleep"] 休眠后返回
+    time.sleep(task["sleep"])
+    return {"slept": task["sleep"]}
+
+
+def test_RUN_R005_001_sim_tasks_and_bad_lines(tmp_path):
+    # 目的：查重任务写出 ans 并返回分数；损坏行与未知 kind 直接记为 error（attempts=0）
+    (tmp_path / "a.txt").write_text("机器学习是人工智能的重要分支。", encoding="utf-8")
+    (tmp_path / "b.txt").write_text("人工智能的重要分支是机器学习。", encoding="utf-8")
+    manifest = tmp_path / "m.jsonl"
+    lines = [
+        json.dumps(
+            {
+                "id": "p1",
+                "kind": "sim",
+                "orig": str(tmp_path / "a.txt"),
+                "copy": str(tmp_path / "b.txt"),
+                "ans": str(tmp_path / "out" / "ans.txt"),
+            }
+        ),
+        "",
+        "not json",
+        json.dumps({"id": "x", "kind": "nope"}),
+    ]
+    manifest.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    assert len(load_manifest(str(manifest))) == 3
+
+    out = tmp_path / "res.jsonl"
+    summary = run_manifest(str(manifest), str(out), workers=2)
+    assert summary == {"total": 3, "ok": 1, "error": 2, "timeout": 0}
+    recs = {r["index"]: r for r in map(json.loads, out.read_text(encoding="utf-8").splitlines())}
+    assert recs[0]["status"] == "ok" and 0.0 < recs[0]["result"]["score"] < 1.0
+    assert (tmp_path / "out" / "ans.txt").read_text(encoding="utf-8").endswith("\n")
+    assert recs[1]["attempts"] == 0 and "manifest line 3" in recs[1]["error"]
+    assert recs[2]["error"] == "unknown kind: 'nope'"
+
+
+def test_RUN_R005_002_errors_are_retried(tmp_path):
+    # 目的：运行期异常按 retries 重试，最终记录尝试次数与异常类型
+    tasks = [{"kind": "sim", "orig": str(tmp_path / "missing.txt"), "copy": "x", "retries": 2}]
+    (rec,) = run_tasks(tasks, workers=1)
+    assert rec["status"] == "error" and rec["attempts"] == 3
+    assert rec["error"].startswith("FileNotFoundError")
+
+
+def test_RUN_R005_003_timeout_kills_worker_and_pool_continues(monkeypatch):
+    # 目的：超时任务所在进程被终止并替换，其余任务照常完成
+    monkeypatch.setitem(runner.HANDLERS, "slow", _slow)
+    tasks = [
+        {"id": "hang", "kind": "slow", "sleep": 30, "timeout": 0.3},
+        {"id": "quick", "kind": "slow", "sleep": 0},
+        {"id": "quick2", "kind": "slow", "sleep": 0},
+    ]
+    t0 = time.monotonic()
+    recs = {r["id"]: r for r in run_tasks(tasks, workers=2, retries=0)}
+    assert time.monotonic() - t0 < 10
+    assert recs["hang"]["status"] == "timeout" and recs["hang"]["attempts"] == 1
+    assert recs["quick"]["result"] == {"slept": 0}
+    assert recs["quick2"]["status"] == "ok"
+
+
+def test_RUN_R005_004_grade_task_uses_myapp(tmp_path):
+    # 目的：批改任务调用 结对项目/Myapp.py 的 grade_pair，输出 Grade 文件
+    (tmp_path / "e.txt").write_text("1. 1 + 1 =\n2. 1/2 + 1/3 =\n", encoding="utf-8")
+    (tmp_path / "s.txt").write_text("1. 2\n2. 1\n", encoding="utf-8")
+    out = tmp_path / "g.txt"
+    task = {
+        "kind": "grade",
+        "exercises": str(tmp_path / "e.txt"),
+        "answers": str(tmp_path / "s.txt"),
+        "out": str(out),
+    }
+    (rec,) = run_tasks([task], workers=1)
+    assert rec["result"] == {"correct": 1, "wrong": 1}
+    assert out.read_text(encoding="utf-8").startswith("Correct: 1 (1)")
+
+
+def test_RUN_R005_005_bad_timeout_recorded_per_task(monkeypatch):
+    # 目的：timeout / retries 不合法的任务单独记为 error（attempts=0），不影响其余任务
+    monkeypatch.setitem(runner.HANDLERS, "slow", _slow)
+    tasks = [
+        {"id": "a", "kind": "slow", "sleep": 0, "timeout": "soon"},
+        {"id": "b", "kind": "slow", "sleep": 0, "timeout": -1},
+        {"id": "c", "kind": "slow", "sleep": 0, "timeout": None},
+        {"id": "d", "kind": "slow", "sleep": 0, "retries": "x"},
+        {"id": "ok", "kind": "slow", "sleep": 0, "timeout": "5"},
+    ]
+    recs = {r["id"]: r for r in run_tasks(tasks, workers=1)}
+    for bad in "abcd":
+        assert recs[bad]["status"] == "error" and recs[bad]["attempts"] == 0
+    assert "timeout" in recs["b"]["error"]
+    assert recs["ok"]["status"] == "ok"
+
+
+def test_RUN_R005_006_dead_idle_worker_is_respawned(monkeypatch):
+    # 目的：空闲的工作进程已退出时，分派任务不抛 BrokenPipeError，而是替换进程后重发
+    monkeypatch.setitem(runner.HANDLERS, "slow", _slow)
+    pool = runner._Pool(1)
+    try:
+        dead = pool.workers[0]
+        dead.proc.kill()
+        dead.proc.join()
+        job = runner._job_for(0, {"kind": "slow", "sleep": 0}, 5.0, 0)
+        pool.dispatch(deque([job]))
+        assert pool.workers[0] is not dead
+        ((done, (status, payload, _)),) = pool.collect()
+        assert done is job and status == "ok" and payload == {"slept": 0}
+    finally:
+        pool.close()
@@ -1,6 +1,9 @@
 # 覆盖 src/sim.py::similarity_ratio 的关键分支与性质
 # 覆盖 _jaccard_chars 的极端分支（通过外部 API 很难走到）
-from src.sim import _jaccard_chars, similarity_ratio
+import random
+
+from src import sim
+from src.sim import _jaccard_chars, screen, similarity_at_least, similarity_ratio
 
 
 def test_SIM_R002_001_empty_both_returns_one():
@@ -51,3 +54,67 @@ def test_SIM_R002_008_jaccard_one_empty_internal():
     """一空一非空 -> 0.0（覆盖 sim.py: 行 32）"""
     assert _jaccard_chars("A", "") == 0.0
     assert _jaccard_chars("", "A") == 0.0
+
+
+def test_SIM_R002_009_at_least_matches_full_score():
+    # 目的：阈值版结果要么为 None（真实分数低于阈值），要么与 similarity_ratio 完全相等
+    rng = random.Random(7)
+    alphabet = "机器学习是人工智能的重要分支今天天气晴朗适合跑步。，"
+    texts = ["", " ", "a", "ab", "机器学习是人工智能的重要分支。"]
+    for _ in range(40):
+        base = "".join(rng.choices(alphabet, k=rng.randint(2, 200)))
+        texts.append(base)
+        texts.append(base[: rng.randint(0, len(base))] + "".join(rng.choices(alphabet, k=5)))
+    for a in texts[:30]:
+        for b in texts:
+            for thr in (0.0, 0.5, 0.8, 1.0):
+                full = similarity_ratio(a, b, n=2)
+                got = similarity_at_least(a, b, thr, n=2)
+                assert got == (full if full >= thr else None)
+
+
+def test_SIM_R002_010_screen_rejects_before_counting(monkeypatch):
+    # 目的：screen 与逐对筛选结果一致；长度上界能在计数之前排除过短的候选
+    query = "人工智能的重要分支是机器学习。" * 20
+    cands = ["机器学习是人工智能的重要分支。" * 20, "今天天气晴朗", query, "", "深度"]
+    expected = [(i, s) for i, c in enumerate(cands) if (s := similarity_ratio(query, c)) >= 0.8]
+    assert screen(query, cands, 0.8) == expected
+
+    calls = []
+    orig_counts = sim.counts
+    monkeypatch.setattr(sim, "counts", lambda toks: calls.append(len(toks)) or orig_counts(toks))
+    assert screen(query, ["今天天气晴朗"], 0.8) == []
+    assert len(calls) == 1  # 只有查询本身被计数
+
+
+def test_SIM_R002_011_workers_path_matches_serial(monkeypatch):
+    # 目的：workers > 1 走并行计数分支，分数与串行完全相同；过短文本仍退化为 Jaccard
+    monkeypatch.setattr(sim, "PARALLEL_MIN_CHARS", 0)
+    a = "机器学习是人工智能的重要分支。" * 30
+    b = "人工智能的重要分支之一是机器学习。" * 25
+    assert similarity_ratio(a, b, workers=2) == similarity_ratio(a, b)
+    assert similarity_ratio("ab", "ac", n=4, workers=2) == similarity_ratio("ab", "ac", n=4)
+
+
+def test_SIM_R002_012_sketch_bounds_are_safe(monkeypatch):
+    # 目的：草图上界不会误杀达到阈值的候选；字符集不相交或长度相差很大的候选在切 n-gram 前被排除
+    rng = random.Random(11)
+    alphabet = "机器学习是人工智能的重要分支今天天气晴朗适合跑步。，abcXYZ 123"
+    texts = ["", "晴", "机器学习"]
+    for _ in range(60):
+        texts.append("".join(rng.choices(alphabet, k=rng.randint(2, 300))))
+    sketches = [sim.sketch(t) for t in texts]
+    for query in texts[3:15]:
+        for thr in (0.0, 0.3, 0.8):
+            expected = [
+                (i, s) for i, c in enumerate(texts) if (s := similarity_ratio(query, c)) >= thr
+            ]
+            assert screen(query, texts, thr, sketches=sketches) == expected
+
+    query = "机器学习是人工智能的重要分支。" * 40
+    cands = ["The quick brown fox jumps over the lazy dog. " * 10, "人工智能的重要分支。"]
+    calls = []
+    orig_ngrams = sim.char_ngrams
+    monkeypatch.setattr(sim, "char_ngrams", lambda t, n=2: calls.append(t) or orig_ngrams(t, n))
+    assert screen(query, cands, 0.8, sketches=[sim.sketch(c) for c in cands]) == []
+    assert len(calls) == 1  # 只有查询本身切了 n-gram
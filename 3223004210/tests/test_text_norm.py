@@ -1,8 +1,10 @@
 # 覆盖 src/text_norm.py：normalize / char_ngrams / counts
 # 函数名与测试用例ID一一对应
+import random
+
 import pytest
 
-from src.text_norm import char_ngrams, counts, normalize
+from src.text_norm import char_ngrams, counts, normalize, parallel_counts
 
 
 def test_TEXTNORM_R001_001_normalize_bom_and_whitespace():
@@ -35,3 +37,24 @@ def test_TEXTNORM_R001_005_char_ngrams_invalid_n_raises():
 def test_TEXTNORM_R001_006_counts_basic():
     # 目的：计数字典正确
     assert counts(["今", "今", "天"]) == {"今": 2, "天": 1}
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 5])
+def test_TEXTNORM_R001_007_parallel_counts_matches_serial(n):
+    # 目的：分段并行计数与串行 counts(char_ngrams()) 完全一致（含键顺序），覆盖 1/2/4 字节定长编码
+    rng = random.Random(n)
+    for alphabet in ("abc d", "机器学习的是，。 ab", "机器😀学习\U00020000 a"):
+        text = "".join(rng.choices(alphabet, k=997))
+        got = parallel_counts(text, n=n, workers=3, min_chars=0)
+        expected = counts(char_ngrams(text, n=n))
+        assert got == expected
+        assert list(got) == list(expected)
+
+
+def test_TEXTNORM_R001_008_parallel_counts_fallbacks():
+    # 目的：短文本/单进程走串行路径；过短文本返回空字典；n 非法抛 ValueError
+    assert parallel_counts("今天晴", n=2) == {"今天": 1, "天晴": 1}
+    assert parallel_counts("今天晴", n=2, workers=1, min_chars=0) == {"今天": 1, "天晴": 1}
+    assert parallel_counts("天", n=2, workers=2, min_chars=0) == {}
+    with pytest.raises(ValueError):
+        parallel_counts("abc", n=0)
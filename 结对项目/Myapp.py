@@ -3,11 +3,17 @@
 四则运算题目生成与批改程序
 用法示例：
   生成题目： python Myapp.py -n 10 -r 10
-  批改题目： python Myapp.py -e Exercises.txt -a Answers.txt
+  批改题目： python Myapp.py -e Exercises.txt -a Answers.txt [--cache bank.cache.json]
+  穷举生成： python Myapp.py -n 100 -r 3 --enum
+  批量批改： python Myapp.py -e Exercises.txt -s stu1.txt stu2.txt ... [-k Answers.txt] [-o grades]
+  常驻批改： python Myapp.py --serve [PORT]   （每行一个请求：题目文件 答案文件 [输出文件]，
+            输出文件为 -o 目录内的相对路径）
 
 输出：
   - 生成模式：Exercises.txt, Answers.txt
   - 批改模式：Grade.txt
+  - 批量批改：grades/<文件名>_Grade.txt, grades/error_rates.csv
+  - 常驻批改：每个请求输出一行 JSON 结果，Grade 文件默认写入 grades/<文件名>_Grade.txt
 
 说明：
  - 支持自然数与真分数（输出格式：3/5 或 2'3/8 表示带分数）
@@ -16,21 +22,31 @@
  - 最多支持生成 10000 道题目
 """
 
-import argparse
+# 只在模块加载时导入两种模式都要用到的轻量模块；argparse、csv、json、re 等
+# 在用到它们的函数内部按需导入，缩短每次启动（如逐个学生调用批改）的耗时
+import os
 import random
+from collections import OrderedDict
 from fractions import Fraction
 import sys
 import math
-import re
+import time
 
 MAX_TRIES = 20000  # 最大尝试次数，防止死循环
+ENUM_LIMIT = 2_000_000  # 穷举模式下单层最多尝试的候选组合数
+OPERAND_TABLE_LIMIT = 50_000  # 快速生成时预计算操作数表的最大条目数
+VECTOR_MIN = 256  # 批改题数达到该值时才尝试使用 numpy 向量化比对
+_np = False  # numpy 模块缓存：False 表示尚未尝试导入，None 表示不可用
+_token_re = None  # 批改用的词法正则，首次解析时才编译
 
 # ============================================================
 # 基础表达式类与其子类：Number, Binary
 # ============================================================
 
 class Expr:
-    """表达式抽象基类"""
+    """表达式抽象基类（使用 __slots__ 去掉每个实例的 __dict__，节省大批量生成时的内存）"""
+    __slots__ = ('_value', '_str', '_canon', '_cid')
+
     def eval(self) -> Fraction:
         """计算表达式的结果（以 Fraction 表示）"""
         raise NotImplementedError
@@ -46,36 +62,64 @@ class Expr:
 
 class Number(Expr):
     """表示一个数值节点（自然数或分数）"""
+    __slots__ = ('frac',)
+
     def __init__(self, frac: Fraction):
         self.frac = frac
+        self._value = frac
+        self._str = None
+        self._canon = None
+        self._cid = None
 
     def eval(self):
         return self.frac
 
     def to_str(self):
-        """数字节点转字符串"""
-        return format_fraction_output(self.frac)
+        """数字节点转字符串（首次调用后缓存）"""
+        if self._str is None:
+            self._str = format_fraction_output(self.frac)
+        return self._str
 
     def canonical(self):
         return self.to_str()
 
 
 class Binary(Expr):
-    """表示二元运算节点（+ - * /）"""
-    def __init__(self, op, left: Expr, right: Expr):
+    """
+    表示二元运算节点（+ - * /）。
+    节点构造后不再修改，因此值、显示字符串与标准形式都在首次计算后缓存在节点上，
+    上层节点直接复用子节点的结果，每个节点只计算一次。
+    """
+    __slots__ = ('op', 'left', 'right', '_terms', '_ckey')
+
+    def __init__(self, op, left: Expr, right: Expr, value=None):
+        """
+        value：调用方已算出的结果（如生成阶段剪枝时得到的值），传入后 eval 不再重算。
+        也可以是未约分的 (分子, 分母) 整数对，第一次 eval 时才约分成 Fraction
+        """
         self.op = op
         self.left = left
         self.right = right
+        self._value = value
+        self._str = None
+        self._canon = None
+        self._terms = None
+        self._cid = None   # 标准形式类别编号（由 ExprTable 分配）
+        self._ckey = None  # 标准形式键（由 ExprTable 分配）
 
     def eval(self):
-        """递归计算表达式结果"""
-        a = self.left.eval()
-        b = self.right.eval()
-        if self.op == '+': return a + b
-        if self.op == '-': return a - b
-        if self.op == '*': return a * b
-        if self.op == '/': return a / b
-        raise ValueError('unknown op')
+        """计算表达式结果（子节点结果已缓存，不会重复递归求值）"""
+        if self._value.__class__ is tuple:
+            self._value = Fraction(*self._value)
+        elif self._value is None:
+            a = self.left.eval()
+            b = self.right.eval()
+            if self.op == '+': self._value = a + b
+            elif self.op == '-': self._value = a - b
+            elif self.op == '*': self._value = a * b
+            elif self.op == '/': self._value = a / b
+            else: raise ValueError('unknown op')
+        return self._value
 
     # ---------------- 括号处理辅助函数 ----------------
     def _prec(self, op):
@@ -94,6 +138,8 @@ class Binary(Expr):
 
     def to_str(self):
         """生成表达式字符串，必要时添加括号"""
+        if self._str is not None:
+            return self._str
         l = self.left.to_str()
         r = self.right.to_str()
 
@@ -111,29 +157,175 @@ class Binary(Expr):
         if self.op == '/':
             op_display = '÷'  # 输出使用 ÷
 
-        return f"{l} {op_display} {r}"
+        self._str = f"{l} {op_display} {r}"
+        return self._str
 
-    def _flatten(self, op):
-        """将同类型运算符的树展开（如 a+(b+c)→[a,b,c]）"""
-        res = []
-        def collect(node):
-            if isinstance(node, Binary) and node.op == op:
-                collect(node.left)
-                collect(node.right)
-            else:
-                res.append(node)
-        collect(self)
-        return res
+    def _flat_terms(self, op):
+        """
+        返回按 op 展开后各项（如 a+(b+c)→[a,b,c]）的标准形式列表（已排序）。
+        直接拼接子节点缓存的结果，不必再遍历整棵子树。
+        """
+        if self.op != op:
+            return [self.canonical()]
+        if self._terms is None:
+            self._terms = sorted(_terms_of(self.left, op) + _terms_of(self.right, op))
+        return self._terms
 
     def canonical(self):
         """生成用于去重的标准形式字符串"""
-        if self.op in ('+', '*'):
-            items = self._flatten(self.op)
-            can_items = [it.canonical() for it in items]
-            can_items_sorted = sorted(can_items)
-            return f"({self.op.join(can_items_sorted)})"
+        if self._canon is None:
+            if self.op in ('+', '*'):
+                self._canon = f"({self.op.join(self._flat_terms(self.op))})"
+            else:
+                self._canon = f"({self.left.canonical()}{self.op}{self.right.canonical()})"
+        return self._canon
+
+
+def _terms_of(node, op):
+    """取子节点在 op 下展开的各项标准形式"""
+    if isinstance(node, Binary):
+        return node._flat_terms(op)
+    return [node.canonical()]
+
+
+class ExprTable:
+    """
+    表达式节点的 hash-consing 表：结构相同的子表达式只保留一个节点，
+    并为每个节点分配标准形式类别编号（在 + 和 * 的交换、结合意义下相同的表达式编号相同）。
+    - 数字节点按值、运算节点按 (运算符, 左子节点 id, 右子节点 id) 查表；
+      子节点已经唯一，所以 id 相同即结构相同，查表不必比较整棵子树。
+      表持有所有节点的引用，id 不会被回收复用
+    - 标准形式键只由子节点的类别编号组成：- 和 / 为 (op, 左编号, 右编号)，
+      + 和 * 为 (op, 展开后各项的编号按大小排列...)，新节点 O(1) 得到键，不拼接字符串
+    - 值、显示字符串与标准形式字符串仍缓存在节点上，共享的子表达式只算一次
+    编号比 canonical() 字符串更精确：1 ÷ (2/3) 与 1/2 ÷ 3 的字符串都是 (1/2/3)，编号不同。
+    """
+    __slots__ = ('_numbers', '_binaries', '_classes', 'hits')
+
+    def __init__(self):
+        self._numbers = {}   # Fraction -> Number
+        self._binaries = {}  # (op, id(left), id(right)) -> Binary
+        self._classes = {}   # 标准形式键 -> 类别编号
+        self.hits = 0        # 命中已有节点的次数
+
+    def __len__(self):
+        return len(self._numbers) + len(self._binaries)
+
+    def number(self, frac) -> Number:
+        node = self._numbers.get(frac)
+        if node is None:
+            node = self._numbers[frac] = Number(frac)
+            node._cid = self._classes.setdefault(frac, len(self._classes))
+        else:
+            self.hits += 1
+        return node
+
+    def binary(self, op, left: Expr, right: Expr, value=None) -> Binary:
+        """left / right 须是本表返回的节点；value 含义同 Binary"""
+        key = (op, id(left), id(right))
+        node = self._binaries.get(key)
+        if node is None:
+            node = self._binaries[key] = Binary(op, left, right, value)
+            self.classify(node)
+        else:
+            self.hits += 1
+        return node
+
+    @staticmethod
+    def key(op, left: Expr, right: Expr):
+        """op(left, right) 的标准形式键；left / right 须已分配类别编号"""
+        if op == '+' or op == '*':
+            a = left._ckey[1:] if left.__class__ is Binary and left.op == op else (left._cid,)
+            b = right._ckey[1:] if right.__class__ is Binary and right.op == op else (right._cid,)
+            return (op, *sorted(a + b))
+        return (op, left._cid, right._cid)
+
+    def __contains__(self, key):
+        """是否已有该标准形式键的节点"""
+        return key in self._classes
+
+    def classify(self, node: Binary, key=None) -> int:
+        """为子节点已分类的新节点分配类别编号；key 为调用方已算出的 ExprTable.key"""
+        if key is None:
+            key = self.key(node.op, node.left, node.right)
+        node._ckey = key
+        node._cid = self._classes.setdefault(key, len(self._classes))
+        return node._cid
+
+    def intern(self, node: Expr) -> Expr:
+        """把任意表达式树换成本表中的等价节点（自底向上）"""
+        if isinstance(node, Number):
+            return self.number(node.frac)
+        return self.binary(node.op, self.intern(node.left), self.intern(node.right),
+                           node._value)
+
+    def canonical_id(self, node: Expr) -> int:
+        """节点的标准形式类别编号；不是本表的节点时先 intern"""
+        if isinstance(node, Number):
+            own = self._numbers.get(node.frac)
         else:
-            return f"({self.left.canonical()}{self.op}{self.right.canonical()})"
+            own = self._binaries.get((node.op, id(node.left), id(node.right)))
+        return (node if own is node else self.intern(node))._cid
+
+
+# ============================================================
+# 后缀（逆波兰）紧凑表示
+# ============================================================
+# code 为扁平列表：整数表示 operands 中的下标，字符串为运算符。
+# 例如 (1/2 + 3) * 4 -> code = [0, 1, '+', 2, '*'], operands = [1/2, 3, 4]
+
+def to_postfix(node: Expr):
+    """把表达式树转换为 (code, operands) 后缀表示（迭代遍历，不递归）"""
+    code, operands = [], []
+    stack = [(node, False)]
+    while stack:
+        n, visited = stack.pop()
+        if isinstance(n, Number):
+            code.append(len(operands))
+            operands.append(n.frac)
+        elif visited:
+            code.append(n.op)
+        else:
+            stack.append((n, True))
+            stack.append((n.right, False))
+            stack.append((n.left, False))
+    return code, operands
+
+
+def from_postfix(code, operands, table=None) -> Expr:
+    """由后缀表示重建表达式树；table 为可选的 ExprTable，给出时结构相同的子表达式共用节点"""
+    number = Number if table is None else table.number
+    binary = Binary if table is None else table.binary
+    stack = []
+    for c in code:
+        if isinstance(c, int):
+            stack.append(number(operands[c]))
+        else:
+            right = stack.pop()
+            left = stack.pop()
+            stack.append(binary(c, left, right))
+    if len(stack) != 1:
+        raise ValueError('bad postfix code')
+    return stack[0]
+
+
+def eval_postfix(code, operands) -> Fraction:
+    """在后缀表示上一次迭代求值"""
+    stack = []
+    for c in code:
+        if isinstance(c, int):
+            stack.append(operands[c])
+            continue
+        b = stack.pop()
+        a = stack.pop()
+        if c == '+': stack.append(a + b)
+        elif c == '-': stack.append(a - b)
+        elif c == '*': stack.append(a * b)
+        elif c == '/': stack.append(a / b)
+        else: raise ValueError('unknown op')
+    if len(stack) != 1:
+        raise ValueError('bad postfix code')
+    return stack[0]
 
 
 # ============================================================
@@ -187,18 +379,75 @@ def validate_tree(node: Expr) -> bool:
         return False
 
 
-def gen_expr_with_ops(k, rng):
-    """生成包含 k 个运算符的随机表达式（优化版）"""
+class GenStats:
+    """
+    生成统计（可选开启）：记录各拒绝分支的次数与各阶段耗时，用于调整范围与约束。
+    传给 generate_exercises / iter_exercises / gen_expr_with_ops 的 stats 参数后就地累加；
+    不传时生成逻辑不做任何额外计时。
+    """
+    def __init__(self):
+        # generate_exercises 外层循环
+        self.tries = 0            # 尝试生成的题目数
+        self.accepted = 0         # 成功收录的题目数
+        self.expr_failed = 0      # gen_expr_with_ops 返回 None
+        self.duplicate = 0        # canonical 重复
+        self.exhausted = False    # 外层达到 MAX_TRIES 仍未凑齐
+        # gen_expr_with_ops 内层合并
+        self.combine_tries = 0
+        self.rejected_negative = 0
+        self.rejected_divzero = 0
+        self.rejected_div_integer = 0
+        # 耗时（秒）
+        self.time_build = 0.0         # 构建成功的表达式
+        self.time_build_failed = 0.0  # 构建失败的表达式
+        self.time_dedup = 0.0         # 计算 canonical 并查重
+        self.time_format = 0.0        # 生成题目字符串与答案
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    def report(self):
+        """返回可读的统计文本"""
+        tries = self.tries or 1
+        combine = self.combine_tries or 1
+        return '\n'.join([
+            f"题目尝试 {self.tries} 次，收录 {self.accepted} 道"
+            f"{'（已达 MAX_TRIES）' if self.exhausted else ''}",
+            f"  表达式构建失败 {self.expr_failed} ({self.expr_failed / tries:.1%})，"
+            f"重复 {self.duplicate} ({self.duplicate / tries:.1%})",
+            f"节点合并尝试 {self.combine_tries} 次：负数 {self.rejected_negative} "
+            f"({self.rejected_negative / combine:.1%})，除零 {self.rejected_divzero} "
+            f"({self.rejected_divzero / combine:.1%})，整除 {self.rejected_div_integer} "
+            f"({self.rejected_div_integer / combine:.1%})",
+            f"耗时：构建 {self.time_build:.3f}s，构建失败 {self.time_build_failed:.3f}s，"
+            f"去重 {self.time_dedup:.3f}s，格式化 {self.time_format:.3f}s",
+        ])
+
+
+def gen_expr_with_ops(k, rng, stats=None, table=None):
+    """
+    生成包含 k 个运算符的随机表达式（单趟构建）。
+    合并节点时已对每一步做了负数/除零/整除剪枝，并把算出的值直接存入新节点；
+    显示字符串与标准形式由节点缓存逐层拼接。因此返回的树无需再经 validate_tree 校验，
+    root.eval() / to_str() / canonical() 也不会重复遍历整棵树。
+    stats：可选的 GenStats，记录各剪枝分支的次数。
+    table：可选的 ExprTable，给出时叶子与合并出的节点都从表中取（随机数消耗不变）。
+    """
+    binary = Binary if table is None else table.binary
     # 预先生成叶子节点及其值缓存
     leaves = []
     for _ in range(k + 1):
         node = gen_number(rng)
+        if table is not None:
+            node = table.number(node.frac)
         leaves.append((node, node.eval()))  # 缓存 (节点, 值)
     nodes = leaves[:]
     tries = 0
 
     while len(nodes) > 1 and tries < MAX_TRIES:
         tries += 1
+        if stats is not None:
+            stats.combine_tries += 1
         # ✅ 改进：randrange 代替 sample，减少构造 range 的开销
         i = random.randrange(len(nodes))
         j = random.randrange(len(nodes))
@@ -214,20 +463,26 @@ def gen_expr_with_ops(k, rng):
             if lv < rv:
                 left, right, lv, rv = right, left, rv, lv
             if lv < rv:
+                if stats is not None:
+                    stats.rejected_negative += 1
                 continue
             val = lv - rv
         elif op == '/':
             if rv == 0:
+                if stats is not None:
+                    stats.rejected_divzero += 1
                 continue
             val = lv / rv
             if val.denominator == 1:  # 排除整除
+                if stats is not None:
+                    stats.rejected_div_integer += 1
                 continue
         elif op == '+':
             val = lv + rv
         else:  # op == '*'
             val = lv * rv
 
-        node = Binary(op, left, right)
+        node = binary(op, left, right, val)
 
         # 删除旧节点并加入新节点
         for idx in sorted([i, j], reverse=True):
@@ -236,41 +491,337 @@ def gen_expr_with_ops(k, rng):
 
     if len(nodes) != 1:
         return None
-    root = nodes[0][0]
+    return nodes[0][0]
+
+
+
+def iter_exercises(n, rng, stats=None):
+    """
+    逐道产出 (题目, 答案)，不在内存中累积题目列表（只保留去重用的 canonical 集合）。
+    题目不足 n 道时在最后抛出 RuntimeError。
+    stats：可选的 GenStats，记录各拒绝分支的次数与耗时。
+    """
+    if n <= 0 or n > 10000:
+        raise ValueError('n must be 1..10000')
+    if stats is not None:
+        yield from _iter_exercises_stats(n, rng, stats)
+        return
+    seen = set()
+    tries = 0
+
+    while len(seen) < n and tries < MAX_TRIES:
+        tries += 1
+        k = random.randint(1, 3)
+        root = gen_expr_with_ops(k, rng)
+        if root is None:
+            continue
+        can = root.canonical()
+        if can in seen:
+            continue
+        seen.add(can)
+        yield root.to_str() + ' =', format_fraction_output(root.eval())
+
+    if len(seen) < n:
+        raise RuntimeError(f'只生成到 {len(seen)} 道题（尝试 {tries} 次），请增大范围或放宽约束')
+
+
+def _iter_exercises_stats(n, rng, stats):
+    """iter_exercises 的计数、计时版本；随机数消耗与不计时版本完全相同"""
+    clock = time.perf_counter
+    seen = set()
+
+    while len(seen) < n and stats.tries < MAX_TRIES:
+        stats.tries += 1
+        k = random.randint(1, 3)
+        t0 = clock()
+        root = gen_expr_with_ops(k, rng, stats)
+        t1 = clock()
+        if root is None:
+            stats.expr_failed += 1
+            stats.time_build_failed += t1 - t0
+            continue
+        stats.time_build += t1 - t0
+        can = root.canonical()
+        dup = can in seen
+        t2 = clock()
+        stats.time_dedup += t2 - t1
+        if dup:
+            stats.duplicate += 1
+            continue
+        seen.add(can)
+        stats.accepted += 1
+        pair = root.to_str() + ' =', format_fraction_output(root.eval())
+        stats.time_format += clock() - t2
+        yield pair
+
+    if len(seen) < n:
+        stats.exhausted = True
+        tries = stats.tries
+        raise RuntimeError(f'只生成到 {len(seen)} 道题（尝试 {tries} 次），请增大范围或放宽约束')
+
+
+def generate_exercises(n, rng, stats=None):
+    """生成 n 道符合约束的题目与答案；stats 为可选的 GenStats，用于统计拒绝原因与耗时"""
+    exercises, answers = [], []
+    for exercise, answer in iter_exercises(n, rng, stats):
+        exercises.append(exercise)
+        answers.append(answer)
+    return exercises, answers
+
 
-    # ✅ 只在最终验证一次
-    if not validate_tree(root):
+def write_exercises(pairs, exfile='Exercises.txt', ansfile='Answers.txt', progress=None):
+    """
+    把 (题目, 答案) 序列边生成边写入文件，适合大批量生成。
+    先写入 .tmp 临时文件，全部成功后再替换目标文件，中途出错或取消不会留下半截文件。
+    progress：可选回调，每写入一道题调用 progress(已写入数量)。
+    """
+    ex_tmp, ans_tmp = exfile + '.tmp', ansfile + '.tmp'
+    try:
+        with open(ex_tmp, 'w', encoding='utf-8') as fe, open(ans_tmp, 'w', encoding='utf-8') as fa:
+            for i, (exercise, answer) in enumerate(pairs, start=1):
+                fe.write(f"{i}. {exercise}\n")
+                fa.write(f"{i}. {answer}\n")
+                if progress is not None:
+                    progress(i)
+    except BaseException:
+        for path in (ex_tmp, ans_tmp):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    os.replace(ex_tmp, exfile)
+    os.replace(ans_tmp, ansfile)
+
+
+# ============================================================
+# 快速生成：预计算操作数表 + 整数对运算
+# ============================================================
+
+def operand_table(rng):
+    """
+    预计算 gen_number(rng) 的全部可能取值及其概率，只需为每个 -r 计算一次。
+    返回 (nodes, pairs, cum_weights)：
+      - nodes：每个取值对应的 Number 节点（节点不可变，可在多道题之间共享）
+      - pairs：取值的 (分子, 分母) 整数对（已约分）
+      - cum_weights：累积概率，供 random.choices 一次抽取多个叶子
+    概率与 gen_number 的抽样过程一致。取值个数约随 rng² 增长，
+    超过 OPERAND_TABLE_LIMIT 时返回 None，由调用方逐个抽取叶子。
+    """
+    if rng <= 1:
+        return [Number(Fraction(0))], [(0, 1)], [1.0]
+    denoms = range(2, max(2, rng - 1) + 1)
+    size = rng + sum((d - 1) * (max(0, (rng - 1) // d) + 2) for d in denoms)
+    if size > OPERAND_TABLE_LIMIT:
         return None
-    return root
 
+    weights = {}
+    for i in range(rng):
+        weights[(i, 1)] = weights.get((i, 1), 0.0) + 0.5 / rng
+    for denom in denoms:
+        p_numer = 0.5 / len(denoms) / (denom - 1)
+        wholes = max(0, (rng - 1) // denom) + 1
+        for numer in range(1, denom):
+            g = math.gcd(numer, denom)
+            key = (numer // g, denom // g)
+            weights[key] = weights.get(key, 0.0) + p_numer * 0.8
+            for whole in range(wholes):
+                key = ((whole * denom + numer) // g, denom // g)
+                weights[key] = weights.get(key, 0.0) + p_numer * 0.2 / wholes
+    values = sorted(Fraction(*pair) for pair in weights)
+    pairs = [(v.numerator, v.denominator) for v in values]
+    cum, acc = [], 0.0
+    for pair in pairs:
+        acc += weights[pair]
+        cum.append(acc)
+    return [Number(v) for v in values], pairs, cum
+
+
+def gen_expr_fast(k, rng, table):
+    """
+    gen_expr_with_ops 的快速版本：叶子从预计算表中一次抽取，
+    中间运算在未约分的 (分子, 分母) 整数对上进行，不经过 Fraction 的逐步约分。
+    返回 (root, (num, den))，失败时返回 None。
+    """
+    if table is None:
+        # 范围过大未建表：逐个抽取叶子
+        nodes = [gen_number(rng) for _ in range(k + 1)]
+        vals = [(nd.frac.numerator, nd.frac.denominator) for nd in nodes]
+    else:
+        leaf_nodes, leaf_pairs, cum = table
+        picks = random.choices(range(len(leaf_nodes)), cum_weights=cum, k=k + 1)
+        nodes = [leaf_nodes[p] for p in picks]
+        vals = [leaf_pairs[p] for p in picks]
+    tries = 0
+
+    while len(nodes) > 1 and tries < MAX_TRIES:
+        tries += 1
+        i = random.randrange(len(nodes))
+        j = random.randrange(len(nodes))
+        while j == i:
+            j = random.randrange(len(nodes))
+
+        left, right = nodes[i], nodes[j]
+        (a, b), (c, d) = vals[i], vals[j]
+        op = random.choice(['+', '-', '*', '/'])
+
+        # 分母恒为正，比较大小只需交叉相乘
+        if op == '-':
+            if a * d < c * b:
+                left, right, a, b, c, d = right, left, c, d, a, b
+            val = (a * d - c * b, b * d)
+        elif op == '/':
+            if c == 0:
+                continue
+            num, den = a * d, b * c
+            if num % den == 0:  # 排除整除
+                continue
+            val = (num, den)
+        elif op == '+':
+            val = (a * d + c * b, b * d)
+        else:  # op == '*'
+            val = (a * c, b * d)
+
+        # 未约分的整数对直接挂在节点上：生成时不约分，只有调用 eval 时才转换为 Fraction
+        node = Binary(op, left, right, val)
+
+        for idx in sorted([i, j], reverse=True):
+            del nodes[idx]
+            del vals[idx]
+        nodes.append(node)
+        vals.append(val)
+
+    if len(nodes) != 1:
+        return None
+    return nodes[0], vals[0]
 
 
-def generate_exercises(n, rng):
-    """生成 n 道符合约束的题目与答案"""
+def generate_exercises_fast(n, rng):
+    """
+    与 generate_exercises 约束、输出格式相同的快速生成：
+    操作数表只计算一次，只有最终答案才转换为 Fraction 并格式化输出。
+    """
     if n <= 0 or n > 10000:
         raise ValueError('n must be 1..10000')
+    table = operand_table(rng)
     exercises, answers, seen = [], [], set()
     tries = 0
 
     while len(exercises) < n and tries < MAX_TRIES:
         tries += 1
         k = random.randint(1, 3)
-        root = gen_expr_with_ops(k, rng)
-        if root is None:
+        res = gen_expr_fast(k, rng, table)
+        if res is None:
             continue
+        root, (num, den) = res
         can = root.canonical()
         if can in seen:
             continue
         seen.add(can)
         exercises.append(root.to_str() + ' =')
-        val = root.eval()
-        answers.append(format_fraction_output(val))
+        answers.append(format_fraction_output(Fraction(num, den)))
 
     if len(exercises) < n:
         raise RuntimeError(f'只生成到 {len(exercises)} 道题（尝试 {tries} 次），请增大范围或放宽约束')
     return exercises, answers
 
 
+# ============================================================
+# 穷举生成（小范围 -r 时使用）
+# ============================================================
+
+def operand_pool(rng):
+    """
+    返回 gen_number(rng) 可能生成的全部数值（去重并排序）：
+    自然数 0..rng-1、分母 2..max(2, rng-1) 的真分数以及对应的带分数。
+    """
+    if rng <= 1:
+        return [Fraction(0)]
+    pool = {Fraction(i) for i in range(rng)}
+    for denom in range(2, max(2, rng - 1) + 1):
+        for numer in range(1, denom):
+            for whole in range(0, max(0, (rng - 1) // denom) + 1):
+                pool.add(Fraction(whole * denom + numer, denom))
+    return sorted(pool)
+
+
+def _combine(op, left, right):
+    """按生成约束合并两个节点；非法（负数/除零/整除）时返回 None"""
+    lv, rv = left.eval(), right.eval()
+    if op == '+':
+        val = lv + rv
+    elif op == '-':
+        if lv < rv:
+            return None
+        val = lv - rv
+    elif op == '*':
+        val = lv * rv
+    else:
+        if rv == 0:
+            return None
+        val = lv / rv
+        if val.denominator == 1:
+            return None
+    return Binary(op, left, right, val)
+
+
+def enumerate_exercises(rng, max_ops=3, limit=ENUM_LIMIT):
+    """
+    穷举范围 rng 内运算符个数为 1..max_ops 的全部合法题目，按 ExprTable 的类别编号去重
+    （即在 + 和 * 的交换、结合意义下不重复）。
+    返回列表 levels，levels[k] 为恰含 k 个运算符的不同题目（levels[0] 为操作数）。
+
+    逐层构建：含 k 个运算符的表达式由两棵运算符数之和为 k-1 的子树合并而成，
+    子树在各自层内已去重，标准形式相同的子树合并后标准形式也相同，不会漏解。
+    若某层候选组合数超过 limit 则抛出 ValueError（范围过大，应改用随机生成）。
+
+    候选组合先由 ExprTable.key 得到标准形式键（只用子树的类别编号，不拼接字符串），
+    已收录的键直接跳过，不再做分数运算与节点构造。
+    """
+    table = ExprTable()
+    key = table.key
+    levels = [[table.number(v) for v in operand_pool(rng)]]
+    for k in range(1, max_ops + 1):
+        splits = [(a, k - 1 - a) for a in range(k)]
+        candidates = 4 * sum(len(levels[a]) * len(levels[b]) for a, b in splits)
+        if candidates > limit:
+            raise ValueError(f'范围 {rng} 下含 {k} 个运算符的候选组合约 {candidates} 个，超过穷举上限 {limit}')
+        found = []
+        for a, b in splits:
+            for left in levels[a]:
+                for right in levels[b]:
+                    for op in ('+', '-', '*', '/'):
+                        ckey = key(op, left, right)
+                        if ckey in table:
+                            continue
+                        node = _combine(op, left, right)
+                        if node is not None:
+                            table.classify(node, ckey)
+                            found.append(node)
+        levels.append(found)
+    return levels
+
+
+def count_exercises(rng, max_ops=3):
+    """范围 rng 内最多能生成多少道互不重复的题目"""
+    return sum(len(level) for level in enumerate_exercises(rng, max_ops)[1:])
+
+
+def generate_exercises_enum(n, rng, max_ops=3):
+    """
+    穷举模式：先枚举全部不同题目，再无放回地随机抽取 n 道，不存在拒绝采样。
+    题目总数不足 n 时立即报错并给出可生成的最大数量。
+    """
+    if n <= 0 or n > 10000:
+        raise ValueError('n must be 1..10000')
+    space = [root for level in enumerate_exercises(rng, max_ops)[1:] for root in level]
+    if len(space) < n:
+        raise RuntimeError(f'范围 {rng} 内最多只有 {len(space)} 道不同的题目，无法生成 {n} 道')
+    exercises, answers = [], []
+    for root in random.sample(space, n):
+        exercises.append(root.to_str() + ' =')
+        answers.append(format_fraction_output(root.eval()))
+    return exercises, answers
+
+
 # ============================================================
 # 输出格式化与批改逻辑
 # ============================================================
@@ -293,60 +844,236 @@ def strip_number_prefix(s: str) -> str:
     去掉行首的编号前缀 '1. ' 或 '10. ' 等。
     例如 '1. 3/5 + 1/2 =' -> '3/5 + 1/2 ='
     """
-    return re.sub(r'^\s*\d+\.\s*', '', s)
+    t = s.lstrip()
+    i = 0
+    while i < len(t) and t[i].isdecimal():
+        i += 1
+    if i and t[i:i + 1] == '.':
+        return t[i + 1:].lstrip()
+    return s
 
 
-def grade(exfile, ansfile):
-    """批改模式：读取题目与答案文件，逐题比对，输出 Grade.txt"""
-    with open(exfile, 'r', encoding='utf-8') as f:
-        exercises = [line.strip() for line in f if line.strip()]
-    with open(ansfile, 'r', encoding='utf-8') as f:
-        answers = [line.strip() for line in f if line.strip()]
+def _read_lines(path):
+    """读取文件中的非空行（去掉首尾空白）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
 
-    m = min(len(exercises), len(answers))
-    correct_idx, wrong_idx = [], []
 
-    for i in range(m):
-        # 去掉题目前的编号
-        line = strip_number_prefix(exercises[i])
-        expr_text = line[:-1].strip() if line.endswith('=') else line
+def _exercise_value(exercise_line, cache=None):
+    """
+    去掉编号与等号后计算题目的正确结果；题目无法解析或结果不是数值（如 "()"）时返回 None。
+    cache 为可选的 ParseCache
+    """
+    line = strip_number_prefix(exercise_line)
+    expr_text = line[:-1].strip() if line.endswith('=') else line
+    try:
+        if cache is not None:
+            val = cache.eval(expr_text)
+        else:
+            val = parse_and_eval(expr_text)
+    except Exception:
+        return None
+    return val if isinstance(val, Fraction) else None
 
-        # 计算正确结果（Fraction）
+
+def _answer_value(answer_line):
+    """把答案行解析为 Fraction（支持带分数、真分数和整数）；无法解析或不是数值时返回 None"""
+    ans_str = strip_number_prefix(answer_line).strip()
+    try:
+        # parse_and_eval 已支持带分数形式 (e.g. 2'3/8)
+        val = parse_and_eval(ans_str)
+    except Exception:
         try:
-            got = parse_and_eval(expr_text)
+            val = parse_mixed_fraction(ans_str)
         except Exception:
-            wrong_idx.append(i + 1)
-            continue
+            return None
+    return val if isinstance(val, Fraction) else None
+
+
+def check_answers(expected, answers):
+    """
+    将学生答案与标准结果逐题比对，返回 (correct_idx, wrong_idx)，编号从 1 开始。
+    expected 中为 None 的题目（题目本身无法解析）一律判错，多余答案也算错误。
+    解析出的结果先拆成分子、分母整数数组，再由 compare_fraction_arrays 统一比对。
+    """
+    m = min(len(expected), len(answers))
+    exp_vals = expected[:m]
+    # 题目本身无法解析时不再解析对应答案
+    ans_vals = [None if exp_vals[i] is None else _answer_value(answers[i]) for i in range(m)]
+
+    exp_num, exp_den = fraction_arrays(exp_vals)
+    ans_num, ans_den = fraction_arrays(ans_vals)
+    correct_idx, wrong_idx = compare_fraction_arrays(exp_num, exp_den, ans_num, ans_den)
+
+    # 多余答案也算错误
+    wrong_idx.extend(range(m + 1, len(answers) + 1))
+    return correct_idx, wrong_idx
+
+
+def fraction_arrays(values):
+    """把 Fraction（或 None）序列拆成分子、分母两个整数列表；None 记为 0/0（无效）"""
+    nums, dens = [], []
+    for v in values:
+        if v is None:
+            nums.append(0)
+            dens.append(0)
+        else:
+            nums.append(v.numerator)
+            dens.append(v.denominator)
+    return nums, dens
 
-        # 取答案并去掉编号前缀
-        ans_str = strip_number_prefix(answers[i]).strip()
 
-        # 把答案解析为 Fraction（支持带分数、真分数和整数）
+def _numpy():
+    """按需导入 numpy（可选依赖），不可用时返回 None"""
+    global _np
+    if _np is False:
         try:
-            # parse_and_eval 已支持带分数形式 (e.g. 2'3/8)
-            ans_val = parse_and_eval(ans_str)
-        except Exception:
-            try:
-                ans_val = parse_mixed_fraction(ans_str)
-            except Exception:
-                wrong_idx.append(i + 1)
-                continue
+            import numpy
+            _np = numpy
+        except ImportError:
+            _np = None
+    return _np
+
+
+def compare_fraction_arrays(exp_num, exp_den, ans_num, ans_den):
+    """
+    逐项判断 exp_num/exp_den == ans_num/ans_den（分母为 0 表示无效，一律判错），
+    返回 (correct_idx, wrong_idx)，编号从 1 开始。
+    Fraction 的分母恒为正，交叉相乘相等即数值相等。题目数不少于 VECTOR_MIN、numpy 可用
+    且所有数的绝对值小于 2**31（乘积不会超出 int64）时用 numpy 向量化计算；
+    否则逐项用 Python 整数比较，两种方式结果完全相同。
+    """
+    np = _numpy() if len(exp_num) >= VECTOR_MIN else None
+    if np is not None:
+        try:
+            arrs = [np.asarray(a, dtype=np.int64) for a in (exp_num, exp_den, ans_num, ans_den)]
+        except OverflowError:
+            arrs = None
+        if arrs is not None and all(len(a) == 0 or (a.min() > -2 ** 31 and a.max() < 2 ** 31)
+                                    for a in arrs):
+            en, ed, an, ad = arrs
+            mask = (ed != 0) & (ad != 0) & (en * ad == an * ed)
+            idx = np.arange(1, len(mask) + 1)
+            return idx[mask].tolist(), idx[~mask].tolist()
 
-        # 数值比较（Fraction 直接比较）
-        if got == ans_val:
-            correct_idx.append(i + 1)
+    correct_idx, wrong_idx = [], []
+    for i, (n1, d1, n2, d2) in enumerate(zip(exp_num, exp_den, ans_num, ans_den), start=1):
+        if d1 != 0 and d2 != 0 and n1 * d2 == n2 * d1:
+            correct_idx.append(i)
         else:
-            wrong_idx.append(i + 1)
+            wrong_idx.append(i)
+    return correct_idx, wrong_idx
 
-    # 多余答案也算错误
-    for j in range(m, len(answers)):
-        wrong_idx.append(j + 1)
 
-    with open('Grade.txt', 'w', encoding='utf-8') as f:
+def write_grade(path, correct_idx, wrong_idx):
+    """按 Grade.txt 的格式写出批改结果"""
+    with open(path, 'w', encoding='utf-8') as f:
         f.write(f"Correct: {len(correct_idx)} ({', '.join(map(str, correct_idx))})\n\n")
         f.write(f"Wrong: {len(wrong_idx)} ({', '.join(map(str, wrong_idx))})\n")
+
+
+def grade_pair(exfile, ansfile, out='Grade.txt', progress=None, cache=None):
+    """
+    批改一对题目/答案文件并把结果写入 out，返回 (correct_idx, wrong_idx)，不向屏幕输出。
+    progress：可选回调，每计算一道题调用 progress(已完成数量, 总数)
+    cache：可选的 ParseCache，已求值过的题目直接取缓存结果
+    """
+    exercises = _read_lines(exfile)
+    answers = _read_lines(ansfile)
+
+    # 只需计算与答案对齐的题目
+    todo = exercises[:len(answers)]
+    expected = []
+    for line in todo:
+        expected.append(_exercise_value(line, cache))
+        if progress is not None:
+            progress(len(expected), len(todo))
+    correct_idx, wrong_idx = check_answers(expected, answers)
+
+    write_grade(out, correct_idx, wrong_idx)
+    return correct_idx, wrong_idx
+
+
+def grade(exfile, ansfile, progress=None, cache=None):
+    """批改模式：读取题目与答案文件，逐题比对，输出 Grade.txt"""
+    grade_pair(exfile, ansfile, 'Grade.txt', progress, cache)
     print('Grade.txt 已生成')
 
+
+def load_expected(exfile, keyfile=None, cache=None):
+    """
+    计算一次题目集的标准结果（Fraction 列表）。
+    若给出 keyfile（生成模式输出的 Answers.txt），直接读取其中答案，跳过表达式求值；
+    否则可通过 cache（ParseCache）复用以往的求值结果。
+    """
+    if keyfile is not None:
+        return [_answer_value(line) for line in _read_lines(keyfile)]
+    return [_exercise_value(line, cache) for line in _read_lines(exfile)]
+
+
+def _grade_outputs(answer_files, outdir):
+    """
+    为每份答案确定 Grade 文件路径：outdir/<相对目录>/<答案文件名>_Grade.txt。
+    相对目录是答案文件所在目录相对于全部答案文件的公共目录的路径，
+    答案都在同一目录时即 outdir/<答案文件名>_Grade.txt；
+    不同班级目录下的同名文件（c1/stu.txt、c2/stu.txt）分别写到 outdir/c1、outdir/c2。
+    两份答案仍对应同一输出文件时（如重复给出同一文件、stu.txt 与 stu.csv）抛出 ValueError。
+    """
+    dirs = [os.path.dirname(os.path.abspath(p)) for p in answer_files]
+    root = os.path.commonpath(dirs) if dirs else ''
+    outputs, owner = [], {}
+    for path, d in zip(answer_files, dirs):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        out = os.path.normpath(os.path.join(outdir, os.path.relpath(d, root), f'{stem}_Grade.txt'))
+        if out in owner:
+            raise ValueError(f'{owner[out]} 与 {path} 的批改结果都会写到 {out}，请改名后再批改')
+        owner[out] = path
+        outputs.append(out)
+    return outputs
+
+
+def grade_batch(exfile, answer_files, keyfile=None, outdir='grades', cache=None):
+    """
+    批量批改模式：同一份题目只求值一次，再逐个解析学生答案。
+    输出：
+      - outdir/<答案文件名>_Grade.txt：每位学生的批改结果（格式同 Grade.txt）；
+        答案分布在多个目录时保留相对目录，见 _grade_outputs
+      - outdir/error_rates.csv：每道题的作答人数、错误人数与错误率
+    返回 {答案文件路径: (correct_idx, wrong_idx)}
+    """
+    expected = load_expected(exfile, keyfile, cache)
+    total = len(expected)
+    attempts = [0] * total
+    errors = [0] * total
+    results = {}
+
+    outputs = _grade_outputs(answer_files, outdir)
+    os.makedirs(outdir, exist_ok=True)
+    for path, out in zip(answer_files, outputs):
+        answers = _read_lines(path)
+        correct_idx, wrong_idx = check_answers(expected, answers)
+        results[path] = (correct_idx, wrong_idx)
+
+        for i in range(min(total, len(answers))):
+            attempts[i] += 1
+        for idx in wrong_idx:
+            if idx <= total:  # 多余答案不计入题目统计
+                errors[idx - 1] += 1
+
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+        write_grade(out, correct_idx, wrong_idx)
+
+    import csv
+
+    with open(os.path.join(outdir, 'error_rates.csv'), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['question', 'attempts', 'errors', 'error_rate'])
+        for i in range(total):
+            rate = errors[i] / attempts[i] if attempts[i] else 0.0
+            writer.writerow([i + 1, attempts[i], errors[i], f'{rate:.4f}'])
+    print(f'已批改 {len(answer_files)} 份答案，结果保存在 {outdir}/')
+    return results
+
 def parse_mixed_fraction(s):
     """解析带分数如 3'2/5、分数 2/3、整数 5 等为 Fraction"""
     s = s.strip()
@@ -365,13 +1092,31 @@ def parse_mixed_fraction(s):
 # 表达式解析与执行（用于批改）a
 # ============================================================
 
-TOKEN_REGEX = re.compile(r"(\d+'\d+/\d+|\d+/\d+|\d+|[()+\-*/])")
+def _token_regex():
+    """按需编译批改用的词法正则（生成模式不需要 re）"""
+    global _token_re
+    if _token_re is None:
+        import re
+        _token_re = re.compile(r"(\d+'\d+/\d+|\d+/\d+|\d+|[()+\-*/])")
+    return _token_re
+
+
+def __getattr__(name):
+    # 兼容旧代码中直接使用的 Myapp.TOKEN_REGEX
+    if name == 'TOKEN_REGEX':
+        return _token_regex()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _normalize_expr(s: str) -> str:
+    """求值前的预处理：÷ 转为 /，去掉全部空白（空格、制表符等）。ParseCache 的键也由它得到"""
+    return ''.join(s.replace('÷', '/').split())
+
 
 def parse_and_eval(s: str) -> Fraction:
     """解析题目字符串并计算结果"""
-    # 将 ÷ 转为 /，保证兼容题目中的除法符号
-    s = s.replace('÷', '/')
-    tokens = TOKEN_REGEX.findall(s.replace(' ', ''))
+    # 将 ÷ 转为 /，保证兼容题目中的除法符号；空白一律去掉，与 ParseCache.key 一致
+    tokens = _token_regex().findall(_normalize_expr(s))
 
     # 将带分数转为括号形式 (a + b/c)
     t2 = []
@@ -399,41 +1144,305 @@ def parse_and_eval(s: str) -> Fraction:
     return val
 
 
+class ParseCache:
+    """
+    批改用的题目求值缓存（LRU，有容量上限）。
+    键为规范化后的表达式文本（_normalize_expr：去掉全部空白、÷ 统一为 /），与 parse_and_eval 的预处理相同，
+    因此相同键的题目求值结果必然相同。可保存为 JSON，与题库放在一起，重复批改时跳过求值。
+    """
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    @staticmethod
+    def key(expr_text):
+        return _normalize_expr(expr_text)
+
+    def __len__(self):
+        return len(self._data)
+
+    def eval(self, expr_text) -> Fraction:
+        """
+        返回表达式的值；未命中时调用 parse_and_eval 并写入缓存。
+        解析失败照常抛出异常；结果不是 Fraction（如 "()" 得到空元组）时抛出 ValueError，
+        不写入缓存，缓存中因此只有 Fraction，可以原样保存为 [分子, 分母]。
+        """
+        k = self.key(expr_text)
+        val = self._data.get(k)
+        if val is not None:
+            self.hits += 1
+            self._data.move_to_end(k)
+            return val
+        self.misses += 1
+        val = parse_and_eval(expr_text)
+        if not isinstance(val, Fraction):
+            raise ValueError(f'表达式的结果不是数值：{expr_text!r}')
+        self._data[k] = val
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return val
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def report(self):
+        return (f"缓存命中 {self.hits}/{self.hits + self.misses} ({self.hit_rate():.1%})，"
+                f"当前条目 {len(self)}")
+
+    def save(self, path):
+        """保存为 JSON：{表达式键: [分子, 分母]}"""
+        import json
+
+        entries = {k: [v.numerator, v.denominator] for k, v in self._data.items()}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'entries': entries}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path, maxsize=100000):
+        """从 JSON 读取缓存；文件不存在时返回空缓存"""
+        import json
+
+        cache = cls(maxsize)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for k, (num, den) in data['entries'].items():
+                cache._data[k] = Fraction(num, den)
+            while len(cache._data) > maxsize:
+                cache._data.popitem(last=False)
+        return cache
+
+
+
+# ============================================================
+# 常驻批改服务（--serve）
+# ============================================================
+
+def _serve_output(name, outdir):
+    """
+    请求中给出的输出文件名 -> outdir 下的路径。TCP 模式没有认证，为免请求方借此改写任意文件，
+    只接受 outdir 内的相对路径：绝对路径、含 .. 或经符号链接指到 outdir 之外时抛出 ValueError。
+    """
+    parts = name.replace('\\', '/').split('/')
+    if os.path.isabs(name) or os.path.splitdrive(name)[0] or '..' in parts:
+        raise ValueError(f'输出文件必须是 {outdir} 内的相对路径：{name}')
+    out = os.path.join(outdir, name)
+    root = os.path.realpath(outdir)
+    if os.path.commonpath([root, os.path.realpath(out)]) != root:
+        raise ValueError(f'输出文件必须是 {outdir} 内的相对路径：{name}')
+    return out
+
+
+def serve_request(line, cache=None, outdir='grades'):
+    """
+    处理一条批改请求并返回结果字典。请求格式：`题目文件 答案文件 [输出文件]`，
+    含制表符时按制表符分隔（路径中可以有空格），否则按空白分隔；
+    输出文件是相对 outdir 的路径（见 _serve_output），未给出时写入 outdir/<答案文件名>_Grade.txt。
+    """
+    parts = line.rstrip('\r\n').split('\t') if '\t' in line else line.split()
+    parts = [p.strip() for p in parts if p.strip()]
+    if len(parts) not in (2, 3):
+        return {'error': '请求格式应为：题目文件 答案文件 [输出文件]'}
+    exfile, ansfile = parts[0], parts[1]
+    try:
+        if len(parts) == 3:
+            out = _serve_output(parts[2], outdir)
+        else:
+            stem = os.path.splitext(os.path.basename(ansfile))[0]
+            out = os.path.join(outdir, f'{stem}_Grade.txt')
+        if os.path.dirname(out):
+            os.makedirs(os.path.dirname(out), exist_ok=True)
+        correct_idx, wrong_idx = grade_pair(exfile, ansfile, out, cache=cache)
+    except Exception as e:
+        return {'exercises': exfile, 'answers': ansfile, 'error': f'{type(e).__name__}: {e}'}
+    return {'exercises': exfile, 'answers': ansfile, 'out': out,
+            'correct': len(correct_idx), 'wrong': len(wrong_idx)}
+
+
+def serve(inp, outp, cache=None, outdir='grades'):
+    """
+    常驻批改循环：从 inp 逐行读取请求，每处理完一条就向 outp 写一行 JSON 结果并刷新。
+    空行忽略，读到 quit / exit 或输入结束时返回已处理的请求数。
+    同一进程内复用已导入的模块与 cache，批改多份答案时不必反复启动解释器。
+    """
+    import json
+
+    handled = 0
+    for line in inp:
+        text = line.strip()
+        if not text:
+            continue
+        if text in ('quit', 'exit'):
+            break
+        result = serve_request(line, cache, outdir)
+        outp.write(json.dumps(result, ensure_ascii=False) + '\n')
+        outp.flush()
+        handled += 1
+    return handled
+
+
+def serve_tcp(port, cache=None, outdir='grades', host='127.0.0.1'):
+    """在 host:port 上提供与 serve 相同的按行协议；连接依次处理，共享同一个 cache"""
+    import io
+    import socketserver
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            inp = io.TextIOWrapper(self.rfile, encoding='utf-8')
+            outp = io.TextIOWrapper(self.wfile, encoding='utf-8', write_through=True)
+            serve(inp, outp, cache, outdir)
+
+    with socketserver.TCPServer((host, port), Handler) as server:
+        print(f'批改服务已启动：{host}:{server.server_address[1]}', file=sys.stderr)
+        server.serve_forever()
+
 
 # ============================================================
 # 主程序入口
 # ============================================================
 
-def main():
-    """命令行参数解析与模式分发"""
+# 快速解析支持的选项：带一个值的选项 -> (属性名, 类型)；开关选项 -> 属性名
+_QUICK_VALUE = {'-n': ('n', int), '-r': ('r', int), '-e': ('e', str), '-a': ('a', str),
+                '-k': ('k', str), '-o': ('o', str), '--cache': ('cache', str)}
+_QUICK_FLAGS = {'--stats': 'stats', '--enum': 'enum', '--fast': 'fast'}
+
+
+def _quick_args(argv):
+    """
+    不导入 argparse 的快速参数解析，只处理最常见的写法（每个选项至多出现一次，值单独成一个参数）。
+    遇到 -s、--serve、--pool、-h、重复选项或其他无法确定的写法时返回 None，交给 argparse 完整解析。
+    """
+    import types
+
+    args = types.SimpleNamespace(n=None, r=None, e=None, a=None, s=None, k=None, o='grades',
+                                 cache=None, stats=False, enum=False, fast=False, serve=None,
+                                 pool=None)
+    seen = set()
+    i = 0
+    while i < len(argv):
+        opt = argv[i]
+        if opt in seen:
+            return None
+        seen.add(opt)
+        if opt in _QUICK_FLAGS:
+            setattr(args, _QUICK_FLAGS[opt], True)
+            i += 1
+        elif opt in _QUICK_VALUE and i + 1 < len(argv) and not argv[i + 1].startswith('-'):
+            name, conv = _QUICK_VALUE[opt]
+            try:
+                setattr(args, name, conv(argv[i + 1]))
+            except ValueError:
+                return None
+            i += 2
+        else:
+            return None
+    if args.enum and args.fast:
+        return None
+    return args
+
+
+def _build_parser():
+    import argparse
+
     parser = argparse.ArgumentParser(description='四则运算题目生成与批改')
     parser.add_argument('-n', type=int, help='生成题目个数')
     parser.add_argument('-r', type=int, help='数值范围（自然数和分母上限）')
     parser.add_argument('-e', help='题目文件（批改模式）')
     parser.add_argument('-a', help='答案文件（批改模式）')
-    args = parser.parse_args()
-
-    if args.e or args.a:
-        if not (args.e and args.a):
-            parser.error('使用 -e 批改时必须同时给出 -a')
-        grade(args.e, args.a)
-        return
-
+    parser.add_argument('-s', nargs='+', help='多个学生答案文件（批量批改模式）')
+    parser.add_argument('-k', help='标准答案文件，如生成的 Answers.txt（批量批改模式，可选）')
+    parser.add_argument('-o', default='grades', help='批量批改与常驻服务的结果目录（默认 grades）')
+    parser.add_argument('--cache', help='批改时使用的求值缓存文件（JSON，不存在则新建）')
+    parser.add_argument('--stats', action='store_true', help='生成结束后输出各拒绝分支的次数与耗时')
+    parser.add_argument('--serve', nargs='?', const=0, type=int, metavar='PORT',
+                        help='常驻批改服务：不给端口时从标准输入逐行读取请求，给出端口时监听本机 TCP')
+    parser.add_argument('--pool', type=int, metavar='PORT',
+                        help='预热题目池服务：在本机 PORT 上提供 HTTP 取题接口（给出 -r 时预热该范围）')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--enum', action='store_true', help='穷举后无放回抽题（适合较小的 -r）')
+    mode.add_argument('--fast', action='store_true', help='使用预计算操作数表与整数运算的快速生成')
+    return parser
+
+
+def _check_args(args):
+    """检查各模式的必选参数，返回错误信息；参数齐全时返回 None"""
+    if args.serve is not None or args.pool is not None:
+        return None
+    if args.s or args.e or args.a:
+        if args.s and not args.e:
+            return '使用 -s 批量批改时必须同时给出 -e'
+        if not args.s and not (args.e and args.a):
+            return '使用 -e 批改时必须同时给出 -a'
+        return None
     if args.r is None:
-        parser.error('生成题目时必须指定 -r 参数')
+        return '生成题目时必须指定 -r 参数'
     if args.n is None:
-        parser.error('生成题目时必须指定 -n 参数')
+        return '生成题目时必须指定 -n 参数'
+    if args.stats and (args.enum or args.fast):
+        return '--stats 只统计默认的随机生成，不能与 --enum / --fast 同时使用'
+    return None
+
+
+def main(argv=None):
+    """命令行参数解析与模式分发：常见写法走快速解析，其余情况（含 -h 与出错）交给 argparse"""
+    argv = sys.argv[1:] if argv is None else argv
+    args = _quick_args(argv)
+    if args is None or _check_args(args) is not None:
+        parser = _build_parser()
+        args = parser.parse_args(argv)
+        error = _check_args(args)
+        if error is not None:
+            parser.error(error)
+
+    if args.pool is not None:
+        from Myapp_pool import serve_pool
+        serve_pool(args.pool, [args.r] if args.r else [])
+        return
+
+    if args.serve is not None:
+        # 常驻服务总是使用缓存；给出 --cache 时从文件加载并在退出时写回
+        cache = ParseCache.load(args.cache) if args.cache else ParseCache()
+        try:
+            if args.serve:
+                serve_tcp(args.serve, cache, args.o)
+            else:
+                serve(sys.stdin, sys.stdout, cache, args.o)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if args.cache:
+                cache.save(args.cache)
+            print(cache.report(), file=sys.stderr)
+        return
 
-    exercises, answers = generate_exercises(args.n, args.r)
-    with open('Exercises.txt', 'w', encoding='utf-8') as f:
-        for i, line in enumerate(exercises, start=1):
-            f.write(f"{i}. {line}\n")
+    if args.s or args.e or args.a:
+        cache = ParseCache.load(args.cache) if args.cache else None
+        if args.s:
+            grade_batch(args.e, args.s, keyfile=args.k, outdir=args.o, cache=cache)
+        else:
+            grade(args.e, args.a, cache=cache)
+        if cache is not None:
+            cache.save(args.cache)
+            print(cache.report())
+        return
 
-    with open('Answers.txt', 'w', encoding='utf-8') as f:
-        for i, line in enumerate(answers, start=1):
-            f.write(f"{i}. {line}\n")
+    stats = None
+    if args.enum:
+        pairs = zip(*generate_exercises_enum(args.n, args.r))
+    elif args.fast:
+        pairs = zip(*generate_exercises_fast(args.n, args.r))
+    else:
+        stats = GenStats() if args.stats else None
+        pairs = iter_exercises(args.n, args.r, stats)
+    try:
+        write_exercises(pairs)
+    finally:
+        if stats is not None:
+            print(stats.report(), file=sys.stderr)
     print('Exercises.txt, Answers.txt 已生成')
 
-
 if __name__ == '__main__':
     main()
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+二进制题库：把大量题目存成紧凑的二进制文件，按编号 O(1) 随机读取。
+用法示例：
+  建库：   python Myapp_bank.py build -n 1000000 -r 10 -o bank.exb
+  查看：   python Myapp_bank.py show bank.exb 0 42 99999
+  抽卷：   python Myapp_bank.py export bank.exb --sample 50
+  导出全部：python Myapp_bank.py export bank.exb
+  难度索引：python Myapp_bank.py features bank.exb
+  分层抽卷：python Myapp_bank.py worksheet bank.exb --mix easy=10 medium=20 hard=20
+
+文件格式（小端）：
+  头部   : magic 'EXBK' | u16 版本 | u16 保留 | u64 题目数 | u64 索引偏移
+  记录 k : 16 字节 canonical 摘要 | varint 答案分子 | varint 答案分母
+           | u8 后缀代码长度 | 后缀代码（运算符为 0x80|编号，其余为操作数下标）
+           | 每个操作数的 varint 分子、varint 分母
+  索引   : 每条记录起始偏移（u64），位于文件末尾
+"""
+
+import argparse
+import hashlib
+import mmap
+import random
+import struct
+from array import array
+from collections import namedtuple
+from fractions import Fraction
+
+from Myapp import (MAX_TRIES, Binary, format_fraction_output, from_postfix, gen_expr_fast,
+                   operand_table, to_postfix, write_exercises)
+
+MAGIC = b'EXBK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQQ')
+OFFSET = struct.Struct('<Q')
+OPS = ('+', '-', '*', '/')
+OP_CODES = {op: 0x80 | i for i, op in enumerate(OPS)}
+
+# 题库中的一道题：表达式树、答案（Fraction）、canonical 摘要
+BankItem = namedtuple('BankItem', ['expr', 'answer', 'digest'])
+
+
+def canonical_digest(expr):
+    """canonical 字符串的 16 字节摘要，用于去重与比对"""
+    return hashlib.blake2b(expr.canonical().encode('utf-8'), digest_size=16).digest()
+
+
+def _put_varint(buf, v):
+    """无符号变长整数编码（每字节 7 位，高位为继续标志）"""
+    while v >= 0x80:
+        buf.append((v & 0x7F) | 0x80)
+        v >>= 7
+    buf.append(v)
+
+
+def _get_varint(data, pos):
+    """解码变长整数，返回 (值, 新位置)"""
+    shift = result = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def encode_record(expr, answer, digest=None):
+    """把一道题编码为记录字节串"""
+    code, operands = to_postfix(expr)
+    buf = bytearray(digest if digest is not None else canonical_digest(expr))
+    _put_varint(buf, answer.numerator)
+    _put_varint(buf, answer.denominator)
+    buf.append(len(code))
+    for c in code:
+        buf.append(OP_CODES[c] if isinstance(c, str) else c)
+    for v in operands:
+        _put_varint(buf, v.numerator)
+        _put_varint(buf, v.denominator)
+    return bytes(buf)
+
+
+def decode_record(data, pos=0):
+    """从 data[pos:] 解码一条记录，返回 BankItem"""
+    digest = bytes(data[pos:pos + 16])
+    pos += 16
+    num, pos = _get_varint(data, pos)
+    den, pos = _get_varint(data, pos)
+    code_len = data[pos]
+    pos += 1
+    code = []
+    n_operands = 0
+    for b in data[pos:pos + code_len]:
+        if b & 0x80:
+            code.append(OPS[b & 0x7F])
+        else:
+            code.append(b)
+            n_operands += 1
+    pos += code_len
+    operands = []
+    for _ in range(n_operands):
+        vn, pos = _get_varint(data, pos)
+        vd, pos = _get_varint(data, pos)
+        operands.append(Fraction(vn, vd))
+    return BankItem(from_postfix(code, operands), Fraction(num, den), digest)
+
+
+def write_bank(path, items):
+    """
+    把 (表达式, 答案) 序列流式写入题库文件，返回写入的题目数。
+    记录边生成边写出，内存中只保留偏移索引（每题 8 字节）。
+    """
+    offsets = []
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+        pos = HEADER.size
+        for expr, answer in items:
+            rec = encode_record(expr, answer)
+            offsets.append(pos)
+            f.write(rec)
+            pos += len(rec)
+        index_offset = pos
+        for off in offsets:
+            f.write(OFFSET.pack(off))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(offsets), index_offset))
+    return len(offsets)
+
+
+def iter_unique_problems(n, rng, max_tries=None):
+    """
+    用快速生成路径逐道产出 n 道不重复的 (表达式, 答案)，不受 generate_exercises 的 10000 道上限限制。
+    去重只保存 16 字节摘要；尝试次数耗尽时抛出 RuntimeError。
+    """
+    if max_tries is None:
+        max_tries = max(MAX_TRIES, 20 * n)
+    table = operand_table(rng)
+    seen = set()
+    tries = 0
+    while len(seen) < n and tries < max_tries:
+        tries += 1
+        res = gen_expr_fast(random.randint(1, 3), rng, table)
+        if res is None:
+            continue
+        root, (num, den) = res
+        digest = canonical_digest(root)
+        if digest in seen:
+            continue
+        seen.add(digest)
+        yield root, Fraction(num, den)
+    if len(seen) < n:
+        raise RuntimeError(f'只生成到 {len(seen)} 道题（尝试 {tries} 次），请增大范围或放宽约束')
+
+
+def build_bank(path, n, rng):
+    """生成 n 道题并写入题库文件"""
+    return write_bank(path, iter_unique_problems(n, rng))
+
+
+class ExerciseBank:
+    """只读题库：mmap 打开文件，按编号 O(1) 读取任意一道题"""
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count, index_offset = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f'{path} 不是有效的题库文件')
+        self._count = count
+        self._index_offset = index_offset
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, k):
+        if k < 0:
+            k += self._count
+        if not 0 <= k < self._count:
+            raise IndexError(k)
+        return decode_record(self._mm, self._offset(k))
+
+    def _offset(self, k):
+        return OFFSET.unpack_from(self._mm, self._index_offset + OFFSET.size * k)[0]
+
+    def exercise(self, k):
+        """第 k 道题的题目文本（与 Exercises.txt 中的格式相同，不含编号）"""
+        return self[k].expr.to_str() + ' ='
+
+    def answer(self, k):
+        """第 k 道题的答案文本"""
+        return format_fraction_output(self[k].answer)
+
+    def sample(self, m):
+        """无放回随机抽取 m 道题的编号"""
+        return random.sample(range(self._count), m)
+
+    def iter_text(self, indices=None):
+        """按编号产出 (题目, 答案) 文本，indices 为空时遍历整个题库"""
+        if indices is None:
+            indices = range(self._count)
+        for k in indices:
+            item = self[k]
+            yield item.expr.to_str() + ' =', format_fraction_output(item.answer)
+
+    def export_text(self, exfile='Exercises.txt', ansfile='Answers.txt', indices=None):
+        """导出为现有的 Exercises.txt / Answers.txt 文本格式"""
+        write_exercises(self.iter_text(indices), exfile, ansfile)
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ============================================================
+# 难度特征索引与分层抽卷
+# ============================================================
+# 特征文件与题库放在一起（默认 <题库>.feat）：
+#   头部 : magic 'EXFT' | u16 版本 | u16 保留 | u64 题目数
+#   记录 : u8 运算符个数 | u8 标志（bit0 含分数，bit1 含带分数）| u32 最大中间分母
+
+FEAT_MAGIC = b'EXFT'
+FEAT_HEADER = struct.Struct('<4sHHQ')
+FEAT_RECORD = struct.Struct('<BBI')
+LEVELS = ('easy', 'medium', 'hard')
+
+# 一道题的难度特征
+Features = namedtuple('Features', ['ops', 'has_fraction', 'has_mixed', 'max_den'])
+
+
+def problem_features(expr, answer=None):
+    """
+    计算难度特征：运算符个数、操作数中是否有分数、操作数或答案中是否有带分数、
+    所有中间结果（含操作数与答案）的最大分母。
+    """
+    if answer is None:
+        answer = expr.eval()
+    ops = 0
+    has_fraction = has_mixed = False
+    max_den = answer.denominator
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        v = node.eval()
+        max_den = max(max_den, v.denominator)
+        if isinstance(node, Binary):
+            ops += 1
+            stack.append(node.left)
+            stack.append(node.right)
+        elif v.denominator != 1:
+            has_fraction = True
+            has_mixed = has_mixed or v > 1
+    has_mixed = has_mixed or (answer.denominator != 1 and answer > 1)
+    return Features(ops, has_fraction, has_mixed, max_den)
+
+
+def difficulty_of(f):
+    """
+    由特征给出难度等级：运算符个数 + 含分数 + 含带分数 + 最大分母超过 10，
+    得分 <= 2 为 easy，3~4 为 medium，>= 5 为 hard。
+    """
+    score = f.ops + f.has_fraction + f.has_mixed + (f.max_den > 10)
+    if score <= 2:
+        return 'easy'
+    if score <= 4:
+        return 'medium'
+    return 'hard'
+
+
+def write_feature_index(bank_path, index_path=None):
+    """扫描一遍题库，计算每道题的特征并写入特征文件，返回特征文件路径"""
+    index_path = index_path or bank_path + '.feat'
+    with ExerciseBank(bank_path) as bank, open(index_path, 'wb') as f:
+        f.write(FEAT_HEADER.pack(FEAT_MAGIC, VERSION, 0, len(bank)))
+        for k in range(len(bank)):
+            item = bank[k]
+            ft = problem_features(item.expr, item.answer)
+            flags = int(ft.has_fraction) | int(ft.has_mixed) << 1
+            f.write(FEAT_RECORD.pack(ft.ops, flags, min(ft.max_den, 0xFFFFFFFF)))
+    return index_path
+
+
+def read_feature_index(index_path):
+    """读取特征文件，返回 Features 列表（下标即题号）"""
+    with open(index_path, 'rb') as f:
+        data = f.read()
+    magic, version, _, count = FEAT_HEADER.unpack_from(data, 0)
+    if magic != FEAT_MAGIC or version != VERSION:
+        raise ValueError(f'{index_path} 不是有效的特征文件')
+    return [Features(ops, bool(flags & 1), bool(flags & 2), max_den)
+            for ops, flags, max_den in FEAT_RECORD.iter_unpack(
+                data[FEAT_HEADER.size:FEAT_HEADER.size + FEAT_RECORD.size * count])]
+
+
+class WorksheetSampler:
+    """
+    按难度分桶的抽卷器：加载时把题号按难度等级与 (运算符个数, 含分数, 含带分数) 分桶，
+    之后每次抽卷只在桶内无放回抽样，代价与抽取的题目数成正比，与题库大小无关。
+    """
+
+    def __init__(self, bank_path, index_path=None):
+        self.bank_path = bank_path
+        features = read_feature_index(index_path or bank_path + '.feat')
+        self.levels = {level: array('Q') for level in LEVELS}
+        self.buckets = {}
+        for k, ft in enumerate(features):
+            self.levels[difficulty_of(ft)].append(k)
+            self.buckets.setdefault((ft.ops, ft.has_fraction, ft.has_mixed), array('Q')).append(k)
+
+    def count(self, level):
+        return len(self.levels[level])
+
+    def sample(self, mix):
+        """
+        mix 为 {难度等级或 (运算符个数, 含分数, 含带分数): 题数}，返回打乱后的题号列表。
+        某一类题数不足时抛出 ValueError 并给出可用数量。
+        """
+        indices = []
+        for key, m in mix.items():
+            pool = self.levels.get(key) if isinstance(key, str) else self.buckets.get(key)
+            if pool is None:
+                pool = array('Q')
+            if m > len(pool):
+                raise ValueError(f'{key} 类题目只有 {len(pool)} 道，无法抽取 {m} 道')
+            indices.extend(pool[i] for i in random.sample(range(len(pool)), m))
+        random.shuffle(indices)
+        return indices
+
+    def export_worksheet(self, mix, exfile='Exercises.txt', ansfile='Answers.txt'):
+        """按难度配比抽卷并导出为文本格式"""
+        indices = self.sample(mix)
+        with ExerciseBank(self.bank_path) as bank:
+            bank.export_text(exfile, ansfile, indices)
+        return indices
+
+
+def main():
+    parser = argparse.ArgumentParser(description='二进制题库的建立、查看与导出')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    p_build = sub.add_parser('build', help='生成题目并写入题库')
+    p_build.add_argument('-n', type=int, required=True, help='题目个数')
+    p_build.add_argument('-r', type=int, required=True, help='数值范围')
+    p_build.add_argument('-o', default='bank.exb', help='题库文件（默认 bank.exb）')
+
+    p_show = sub.add_parser('show', help='按编号查看题目（从 0 开始）')
+    p_show.add_argument('bank')
+    p_show.add_argument('index', type=int, nargs='+')
+
+    p_export = sub.add_parser('export', help='导出为 Exercises.txt / Answers.txt')
+    p_export.add_argument('bank')
+    p_export.add_argument('--sample', type=int, help='随机抽取的题目数（默认导出全部）')
+    p_export.add_argument('-e', default='Exercises.txt', help='题目输出文件')
+    p_export.add_argument('-a', default='Answers.txt', help='答案输出文件')
+
+    p_feat = sub.add_parser('features', help='计算难度特征并写入 <题库>.feat')
+    p_feat.add_argument('bank')
+
+    p_ws = sub.add_parser('worksheet', help='按难度配比抽卷，如 --mix easy=10 medium=20 hard=20')
+    p_ws.add_argument('bank')
+    p_ws.add_argument('--mix', nargs='+', required=True, help='难度=题数')
+    p_ws.add_argument('-e', default='Exercises.txt', help='题目输出文件')
+    p_ws.add_argument('-a', default='Answers.txt', help='答案输出文件')
+    args = parser.parse_args()
+
+    if args.cmd == 'build':
+        count = build_bank(args.o, args.n, args.r)
+        print(f'{args.o} 已生成，共 {count} 道题')
+        return
+    if args.cmd == 'features':
+        path = write_feature_index(args.bank)
+        sampler = WorksheetSampler(args.bank, path)
+        print(f'{path} 已生成：' + '，'.join(f'{lv} {sampler.count(lv)} 道' for lv in LEVELS))
+        return
+    if args.cmd == 'worksheet':
+        try:
+            mix = {level: int(m) for level, m in (item.split('=') for item in args.mix)}
+        except ValueError:
+            parser.error('--mix 的格式应为 难度=题数，如 easy=10')
+        unknown = set(mix) - set(LEVELS)
+        if unknown:
+            parser.error(f'未知难度：{", ".join(unknown)}（可选 {", ".join(LEVELS)}）')
+        WorksheetSampler(args.bank).export_worksheet(mix, args.e, args.a)
+        print(f'{args.e}, {args.a} 已生成')
+        return
+
+    with ExerciseBank(args.bank) as bank:
+        if args.cmd == 'show':
+            for k in args.index:
+                print(f'{k}. {bank.exercise(k)} {bank.answer(k)}')
+        else:
+            indices = bank.sample(args.sample) if args.sample else None
+            bank.export_text(args.e, args.a, indices)
+            print(f'{args.e}, {args.a} 已生成')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,23 +1,103 @@
 import tkinter as tk
-from tkinter import messagebox, filedialog
-from Myapp import generate_exercises, grade
+from tkinter import messagebox, filedialog, ttk
+from Myapp import iter_exercises, write_exercises, grade
 import os
+import queue
+import threading
+
+# 后台线程通过该队列把进度与结果交给界面线程，界面线程用 root.after 轮询
+events = queue.Queue()
+cancel_event = threading.Event()
+POLL_MS = 50  # 轮询队列的间隔（毫秒）
+
+
+class Cancelled(Exception):
+    """用户点击取消后由进度回调抛出，用于中断后台任务"""
+
+
+def _reporter(total=None):
+    """
+    生成进度回调：检查取消标志，并按约 1% 的粒度向队列报告进度。
+    total 未知时（如批改）使用回调第二个参数传入的总数。
+    """
+    def report(done, n=None):
+        if cancel_event.is_set():
+            raise Cancelled()
+        t = total if n is None else n
+        if done % max(1, t // 100) == 0 or done == t:
+            events.put(('progress', done, t))
+    return report
+
+
+def _run_in_background(task, busy_text):
+    """在后台线程中执行 task，结束后把结果或异常放入队列"""
+    def worker():
+        try:
+            events.put(('done', task()))
+        except Cancelled:
+            events.put(('cancelled',))
+        except Exception as e:
+            events.put(('error', e))
+
+    cancel_event.clear()
+    progress['value'] = 0
+    status.set(busy_text)
+    _set_busy(True)
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(POLL_MS, poll)
+
+
+def _set_busy(busy):
+    """任务运行时禁用操作按钮、启用取消按钮"""
+    state = tk.DISABLED if busy else tk.NORMAL
+    btn_gen.config(state=state)
+    btn_grade.config(state=state)
+    btn_cancel.config(state=tk.NORMAL if busy else tk.DISABLED)
+
+
+def poll():
+    """界面线程：取出队列中的全部事件并刷新界面；任务未结束则继续轮询"""
+    try:
+        while True:
+            event = events.get_nowait()
+            kind = event[0]
+            if kind == 'progress':
+                _, done, total = event
+                progress['maximum'] = total
+                progress['value'] = done
+                status.set(f"进度：{done}/{total}")
+                continue
+            _set_busy(False)
+            if kind == 'done':
+                status.set("完成")
+                title, text = event[1]
+                messagebox.showinfo(title, text)
+            elif kind == 'cancelled':
+                status.set("已取消")
+            else:
+                status.set("出错")
+                messagebox.showerror("错误", f"执行失败：{event[1]}")
+            return
+    except queue.Empty:
+        pass
+    root.after(POLL_MS, poll)
+
 
 def generate():
     try:
         n = int(entry_n.get())
         r = int(entry_r.get())
-        exercises, answers = generate_exercises(n, r)
-        with open("Exercises.txt", "w", encoding="utf-8") as f:
-            for i, line in enumerate(exercises, start=1):
-                f.write(f"{i}. {line}\n")
-
-        with open("Answers.txt", "w", encoding="utf-8") as f:
-            for i, line in enumerate(answers, start=1):
-                f.write(f"{i}. {line}\n")
-        messagebox.showinfo("完成", f"生成 {n} 道题目成功！\n文件已保存至当前目录。")
-    except Exception as e:
-        messagebox.showerror("错误", f"生成失败：{e}")
+    except ValueError:
+        messagebox.showerror("错误", "题目数量和数值范围必须是整数")
+        return
+
+    def task():
+        # 边生成边写入，不在内存中保存全部题目
+        write_exercises(iter_exercises(n, r), "Exercises.txt", "Answers.txt", progress=_reporter(n))
+        return "完成", f"生成 {n} 道题目成功！\n文件已保存至当前目录。"
+
+    _run_in_background(task, "正在生成……")
+
 
 def grade_files():
     ex_file = filedialog.askopenfilename(title="选择 Exercises.txt", filetypes=[("Text Files", "*.txt")])
@@ -26,16 +106,22 @@ def grade_files():
     ans_file = filedialog.askopenfilename(title="选择 Answers.txt", filetypes=[("Text Files", "*.txt")])
     if not ans_file:
         return
-    try:
-        grade(ex_file, ans_file)
-        messagebox.showinfo("批改完成", "已生成 Grade.txt！")
-    except Exception as e:
-        messagebox.showerror("错误", f"批改失败：{e}")
+
+    def task():
+        grade(ex_file, ans_file, progress=_reporter())
+        return "批改完成", f"已生成 {os.path.abspath('Grade.txt')}！"
+
+    _run_in_background(task, "正在批改……")
+
+
+def cancel():
+    cancel_event.set()
+    status.set("正在取消……")
 
 # ========================== 界面 ==========================
 root = tk.Tk()
 root.title("小学四则运算题目生成器")
-root.geometry("400x260")
+root.geometry("420x320")
 root.resizable(False, False)
 
 tk.Label(root, text="生成题目数量 (-n)：", font=("微软雅黑", 11)).pack(pady=5)
@@ -47,11 +133,20 @@ entry_r = tk.Entry(root, font=("Consolas", 11))
 entry_r.pack()
 
 frame_btn = tk.Frame(root)
-frame_btn.pack(pady=20)
+frame_btn.pack(pady=15)
+
+btn_gen = tk.Button(frame_btn, text="生成题目与答案", command=generate, width=14, height=1, bg="#4CAF50", fg="white")
+btn_gen.grid(row=0, column=0, padx=6)
+btn_grade = tk.Button(frame_btn, text="批改答案文件", command=grade_files, width=14, height=1, bg="#2196F3", fg="white")
+btn_grade.grid(row=0, column=1, padx=6)
+btn_cancel = tk.Button(frame_btn, text="取消", command=cancel, width=8, height=1, state=tk.DISABLED)
+btn_cancel.grid(row=0, column=2, padx=6)
 
-tk.Button(frame_btn, text="生成题目与答案", command=generate, width=18, height=1, bg="#4CAF50", fg="white").grid(row=0, column=0, padx=10)
-tk.Button(frame_btn, text="批改答案文件", command=grade_files, width=18, height=1, bg="#2196F3", fg="white").grid(row=0, column=1, padx=10)
+progress = ttk.Progressbar(root, length=360, mode="determinate")
+progress.pack()
+status = tk.StringVar(value="就绪")
+tk.Label(root, textvariable=status, font=("微软雅黑", 9)).pack(pady=4)
 
-tk.Label(root, text="文件将自动生成在当前目录", font=("微软雅黑", 9), fg="gray").pack(pady=10)
+tk.Label(root, text="文件将自动生成在当前目录", font=("微软雅黑", 9), fg="gray").pack(pady=6)
 
 root.mainloop()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+预热题目池服务：为网页出题前端提供毫秒级的取题接口。
+- 每个 (数值范围 r, 运算符个数 ops) 对应一个环形缓冲区，存放已校验、已去重的题目
+- 每个缓冲区有一个后台补货线程：题目数降到低水位以下时开始生成，补满容量后休眠
+- 取题直接从缓冲区弹出，不在请求路径上做拒绝采样；缓冲区暂时不够时最多等待 timeout 秒
+- 去重范围是缓冲区内现存的题目（canonical 相同的题不会同时出现在池中）
+- r 很小、题目空间耗尽时（连续 MAX_TRIES 次都是重复或构建失败）补货线程暂停，
+  直到有题目被取走再继续，取题方也不再等待
+- 每个桶占一个线程，所以只接受配置的 r（--ranges，默认 1~MAX_RANGE），其余请求返回 400；
+  等待时间 timeout 限制在 0~MAX_TIMEOUT 秒
+
+用法示例：
+  python Myapp_pool.py --port 8765 --warm 10 20          # 预热 r=10、r=20 的 1~3 运算符缓冲区
+  python Myapp_pool.py --ranges 10 20 --warm 10 20       # 同上，且只接受 r=10、r=20 的请求
+  python Myapp.py --pool 8765 -r 10                      # 同上，经由 Myapp.py 启动
+  GET /problems?r=10&n=50[&ops=2]   -> {"problems": [{"exercise": ..., "answer": ...}], ...}
+                                       （可加 &timeout=秒，缓冲区不够时最多等待的时间，默认 1）
+  GET /stats                        -> 各缓冲区的存量、补货吞吐（题/秒）与取题数
+不给 ops 时每道题的运算符个数在 1~3 中随机（与 iter_exercises 相同）。
+"""
+
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import deque
+
+from Myapp import MAX_TRIES, format_fraction_output, gen_expr_with_ops
+
+DEFAULT_CAPACITY = 500
+MAX_REQUEST = 1000  # 单次请求最多取题数
+MAX_RANGE = 100    # 未配置允许的 r 时，r 的上限（限制桶与补货线程的数量）
+MAX_TIMEOUT = 10.0  # 单次取题最多等待的秒数
+
+
+class _Bucket:
+    """一个 (r, ops) 的环形缓冲区及其补货线程"""
+
+    def __init__(self, r, ops, capacity, low):
+        self.r = r
+        self.ops = ops
+        self.capacity = capacity
+        self.low = low
+        self.items = deque()  # (canonical, 题目, 答案)
+        self.keys = set()     # 缓冲区内现存题目的 canonical
+        self.cond = threading.Condition()
+        self.stalled = False  # 题目空间耗尽，等待取题后再补
+        self.closed = False
+        # 统计
+        self.generated = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.served = 0
+        self.refill_seconds = 0.0
+        self.thread = threading.Thread(target=self._refill_loop, daemon=True,
+                                       name=f'pool-r{r}-ops{ops}')
+        self.thread.start()
+
+    def _make(self):
+        """生成一道题，返回 (canonical, 题目, 答案)；构建失败返回 None"""
+        root = gen_expr_with_ops(self.ops, self.r)
+        if root is None:
+            return None
+        return root.canonical(), root.to_str() + ' =', format_fraction_output(root.eval())
+
+    def _refill_loop(self):
+        cond = self.cond
+        while True:
+            with cond:
+                while not self.closed and (len(self.items) > self.low or self.stalled):
+                    cond.wait()
+                if self.closed:
+                    return
+            t0 = time.perf_counter()
+            misses = 0
+            while misses < MAX_TRIES:
+                item = self._make()  # 在锁外生成，取题不会被补货阻塞
+                with cond:
+                    if self.closed or len(self.items) >= self.capacity:
+                        break
+                    if item is None:
+                        self.failed += 1
+                        misses += 1
+                    elif item[0] in self.keys:
+                        self.duplicates += 1
+                        misses += 1
+                    else:
+                        self.items.append(item)
+                        self.keys.add(item[0])
+                        self.generated += 1
+                        misses = 0
+                        cond.notify_all()
+            with cond:
+                self.refill_seconds += time.perf_counter() - t0
+                if misses >= MAX_TRIES:
+                    self.stalled = True
+                    cond.notify_all()
+
+    def take(self, count, deadline):
+        """
+        取出至多 count 道题；不足时最多等到 deadline（time.monotonic() 时刻），
+        题目空间耗尽时立即返回现有的
+        """
+        with self.cond:
+            while len(self.items) < count and not self.stalled:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.cond.wait(remaining)
+            out = []
+            while self.items and len(out) < count:
+                key, exercise, answer = self.items.popleft()
+                self.keys.discard(key)
+                out.append((exercise, answer))
+            self.served += len(out)
+            if out:
+                self.stalled = False  # 腾出了位置，重复的题可能又能收录
+            if len(self.items) <= self.low:
+                self.cond.notify_all()
+            return out
+
+    def stats(self):
+        with self.cond:
+            return {
+                'r': self.r, 'ops': self.ops,
+                'level': len(self.items), 'capacity': self.capacity,
+                'generated': self.generated, 'duplicates': self.duplicates,
+                'failed': self.failed, 'served': self.served,
+                'refill_seconds': round(self.refill_seconds, 4),
+                'refill_rate': round(self.generated / self.refill_seconds, 1)
+                if self.refill_seconds else 0.0,
+                'stalled': self.stalled,
+            }
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join()
+
+
+class ProblemPool:
+    """
+    按 (r, ops) 分桶的预热题目池。桶在第一次用到时创建并开始补货，也可用 warm 提前创建。
+    参数:
+        capacity: 每个桶的容量
+        low: 低水位，桶内题目数降到它以下（含）时开始补货；默认容量的一半
+        ranges: 允许的 r；默认 1~MAX_RANGE。桶数（即补货线程数）不超过 3 * len(ranges)
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, low=None, ranges=None):
+        if capacity <= 0:
+            raise ValueError('capacity must be positive')
+        self.capacity = capacity
+        self.low = capacity // 2 if low is None else low
+        self.ranges = frozenset(range(1, MAX_RANGE + 1) if ranges is None else ranges)
+        if not self.ranges or min(self.ranges) < 1:
+            raise ValueError('ranges must be non-empty and >= 1')
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, r, ops):
+        if r not in self.ranges:
+            raise ValueError(f'r={r} is not served by this pool')
+        if ops not in (1, 2, 3):
+            raise ValueError('ops must be 1..3')
+        with self._lock:
+            b = self._buckets.get((r, ops))
+            if b is None:
+                b = self._buckets[(r, ops)] = _Bucket(r, ops, self.capacity, self.low)
+            return b
+
+    def warm(self, ranges, ops=(1, 2, 3)):
+        """为每个 r 与运算符个数提前创建桶（补货在后台进行）"""
+        for r in ranges:
+            for k in ops:
+                self.bucket(r, k)
+
+    def take(self, r, n, ops=None, timeout=1.0):
+        """
+        取 n 道题，返回 [(题目, 答案), ...]。
+        ops 为 None 时每道题的运算符个数在 1~3 中随机；桶不够时总共最多等待 timeout 秒
+        （限制在 0~MAX_TIMEOUT 之间，各桶共用同一个截止时刻），
+        题目空间耗尽或超时时返回的题目可能少于 n 道。
+        """
+        if n <= 0 or n > MAX_REQUEST:
+            raise ValueError(f'n must be 1..{MAX_REQUEST}')
+        if math.isnan(timeout):
+            raise ValueError('timeout must be a number')
+        deadline = time.monotonic() + min(max(timeout, 0.0), MAX_TIMEOUT)
+        if ops is not None:
+            return self.bucket(r, ops).take(n, deadline)
+        want = {1: 0, 2: 0, 3: 0}
+        for _ in range(n):
+            want[random.randint(1, 3)] += 1
+        buckets = [(self.bucket(r, k), count) for k, count in want.items() if count]
+        out = []
+        for b, count in buckets:
+            out.extend(b.take(count, deadline))
+        random.shuffle(out)
+        return out
+
+    def stats(self):
+        """各桶的统计，按 (r, ops) 排序"""
+        with self._lock:
+            buckets = [self._buckets[key] for key in sorted(self._buckets)]
+        return [b.stats() for b in buckets]
+
+    def close(self):
+        with self._lock:
+            buckets, self._buckets = list(self._buckets.values()), {}
+        for b in buckets:
+            b.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def make_server(pool, port=0, host='127.0.0.1'):
+    """创建提供 /problems 与 /stats 的 HTTP 服务（多线程，每个请求一个线程）"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, code, body):
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/stats':
+                self._reply(200, {'buckets': pool.stats()})
+                return
+            if url.path != '/problems':
+                self._reply(404, {'error': f'unknown path: {url.path}'})
+                return
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            t0 = time.perf_counter()
+            try:
+                r = int(query['r'])
+                n = int(query.get('n', 50))
+                ops = int(query['ops']) if 'ops' in query else None
+                timeout = float(query.get('timeout', 1.0))
+                problems = pool.take(r, n, ops, timeout)
+            except KeyError as e:
+                self._reply(400, {'error': f'missing parameter: {e.args[0]}'})
+                return
+            except ValueError as e:
+                self._reply(400, {'error': str(e)})
+                return
+            self._reply(200, {
+                'problems': [{'exercise': ex, 'answer': ans} for ex, ans in problems],
+                'count': len(problems),
+                'elapsed_ms': round((time.perf_counter() - t0) * 1000, 3),
+            })
+
+        def log_message(self, format, *args):  # 不在标准错误上逐条打印请求日志
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve_pool(port, warm=(), capacity=DEFAULT_CAPACITY, host='127.0.0.1', ranges=None):
+    """
+    启动题目池服务直到 Ctrl+C；退出时把各桶的统计打印到标准错误。
+    ranges 为允许的 r，默认 1~MAX_RANGE 再加上 warm 中的各个 r
+    """
+    if ranges is None:
+        ranges = set(range(1, MAX_RANGE + 1)) | set(warm)
+    with ProblemPool(capacity, ranges=ranges) as pool:
+        pool.warm(warm)
+        server = make_server(pool, port, host)
+        print(f'题目池服务已启动：http://{host}:{server.server_address[1]}/problems',
+              file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            for s in pool.stats():
+                print(json.dumps(s, ensure_ascii=False), file=sys.stderr)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='预热题目池服务（HTTP）')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口（默认 8765）')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址（默认 127.0.0.1）')
+    parser.add_argument('--warm', type=int, nargs='*', default=[], metavar='R',
+                        help='启动时预热的数值范围')
+    parser.add_argument('--ranges', type=int, nargs='+', metavar='R',
+                        help=f'只接受这些数值范围的请求（默认 1~{MAX_RANGE} 与 --warm 给出的范围）')
+    parser.add_argument('--capacity', type=int, default=DEFAULT_CAPACITY, help='每个缓冲区的容量')
+    args = parser.parse_args(argv)
+    if min(args.warm + (args.ranges or []), default=1) < 1:
+        parser.error('数值范围必须 >= 1')
+    serve_pool(args.port, args.warm, args.capacity, args.host, args.ranges)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+# bench/bench_myapp.py
+"""
+四则运算程序的可复现基准测试（固定随机种子）。
+在 结对项目 目录下运行：
+  python -m bench.bench_myapp                      # 默认规模，结果打印到屏幕
+  python -m bench.bench_myapp --out after.json     # 保存 JSON
+  python -m bench.bench_myapp --compare before.json after.json
+
+测量内容：
+  - generate_exercises（及 --fast / --enum 等变体）在不同 -n、-r 下的题目/秒与峰值内存
+  - 生成过程中的重复题拒绝率、gen_expr_with_ops 失败率以及 MAX_TRIES 耗尽情况
+  - grade 批改 Exercises.txt / Answers.txt 的行/秒
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import Myapp
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXERCISES = os.path.join(HERE, 'Exercises.txt')
+ANSWERS = os.path.join(HERE, 'Answers.txt')
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000, 1000000]
+DEFAULT_RANGES = [5, 10, 100]
+MAX_N = 10000  # generate_exercises 支持的最大题目数
+
+# 用 getattr 取可选的生成器：对比旧版本 Myapp（只有 generate_exercises）时缺的模式直接跳过
+GENERATORS = {
+    mode: fn for mode, fn in (
+        ('default', Myapp.generate_exercises),
+        ('fast', getattr(Myapp, 'generate_exercises_fast', None)),
+        ('enum', getattr(Myapp, 'generate_exercises_enum', None)),  # 仅适合较小的 -r，默认不跑
+    ) if fn is not None
+}
+
+
+def _timed(fn, *args):
+    """返回 (结果或异常, 耗时秒)"""
+    t0 = time.perf_counter()
+    try:
+        res = fn(*args)
+    except (RuntimeError, ValueError) as e:
+        res = e
+    return res, time.perf_counter() - t0
+
+
+def _peak_memory(fn, *args):
+    """单独跑一次并用 tracemalloc 记录峰值内存（字节），与计时分开避免干扰"""
+    tracemalloc.start()
+    try:
+        fn(*args)
+    except (RuntimeError, ValueError):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def rejection_profile(n, rng, seed):
+    """
+    用 GenStats 统计按 generate_exercises 生成 n 道题时的各类拒绝：
+      - failed：gen_expr_with_ops 返回 None（内部剪枝耗尽尝试次数）
+      - duplicate：canonical 重复
+      - exhausted：外层达到 MAX_TRIES 仍未凑齐 n 道
+    被测的 Myapp 没有 GenStats 时退化为只计时普通生成循环。
+    """
+    random.seed(seed)
+    gen_stats = getattr(Myapp, 'GenStats', None)
+    if gen_stats is None:
+        # 旧版本没有 GenStats：只计时普通的生成循环，记录是否耗尽
+        res, secs = _timed(Myapp.generate_exercises, n, rng)
+        return {'seconds_plain': secs, 'exhausted': isinstance(res, RuntimeError)}
+    stats = gen_stats()
+    try:
+        Myapp.generate_exercises(n, rng, stats)
+    except RuntimeError:
+        pass
+    tries = stats.tries or 1
+    return {
+        'tries': stats.tries,
+        'accepted': stats.accepted,
+        'failed_rate': stats.expr_failed / tries,
+        'duplicate_rate': stats.duplicate / tries,
+        'exhausted': stats.exhausted,
+        'stats': stats.as_dict(),
+    }
+
+
+def bench_generate(sizes, ranges, seed, modes):
+    results = []
+    for mode in modes:
+        fn = GENERATORS[mode]
+        for rng in ranges:
+            for n in sizes:
+                row = {'mode': mode, 'n': n, 'r': rng}
+                if n > MAX_N:
+                    row['skipped'] = f'n 超过上限 {MAX_N}'
+                    results.append(row)
+                    print(json.dumps(row, ensure_ascii=False))
+                    continue
+                random.seed(seed)
+                res, secs = _timed(fn, n, rng)
+                random.seed(seed)
+                row['peak_bytes'] = _peak_memory(fn, n, rng)
+                row['seconds'] = secs
+                if isinstance(res, Exception):
+                    row['error'] = str(res)
+                else:
+                    row['problems_per_sec'] = n / secs if secs else None
+                if mode == 'default':
+                    row.update(rejection_profile(n, rng, seed))
+                results.append(row)
+                print(json.dumps(row, ensure_ascii=False))
+    return results
+
+
+def bench_grade(repeat):
+    """在临时目录中批改固定的题目/答案文件（grade 会把 Grade.txt 写到当前目录）"""
+    with open(EXERCISES, encoding='utf-8') as f:
+        lines = sum(1 for line in f if line.strip())
+    cwd = os.getcwd()
+    best = None
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            for _ in range(repeat):
+                _, secs = _timed(Myapp.grade, EXERCISES, ANSWERS)
+                best = secs if best is None else min(best, secs)
+        finally:
+            os.chdir(cwd)
+    row = {'lines': lines, 'seconds': best, 'lines_per_sec': lines / best}
+    print(json.dumps(row, ensure_ascii=False))
+    return row
+
+
+def compare(old_path, new_path):
+    """打印两次结果中对应条目的速度比（new / old）"""
+    with open(old_path, encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)
+    old_gen = {(r['mode'], r['n'], r['r']): r for r in old['generate']}
+    for row in new['generate']:
+        before = old_gen.get((row['mode'], row['n'], row['r']))
+        if not before or 'problems_per_sec' not in row or 'problems_per_sec' not in before:
+            continue
+        ratio = row['problems_per_sec'] / before['problems_per_sec']
+        print(f"generate {row['mode']:<8} n={row['n']:<7} r={row['r']:<4} x{ratio:.2f}")
+    ratio = new['grade']['lines_per_sec'] / old['grade']['lines_per_sec']
+    print(f"grade    x{ratio:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Myapp 基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--ranges', type=int, nargs='+', default=DEFAULT_RANGES)
+    parser.add_argument('--modes', nargs='+', choices=list(GENERATORS),
+                        default=[m for m in ('default', 'fast') if m in GENERATORS])
+    parser.add_argument('--seed', type=int, default=2025)
+    parser.add_argument('--grade-repeat', type=int, default=3)
+    parser.add_argument('--out', help='结果 JSON 输出路径')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='比较两份结果 JSON')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = {
+        'python': sys.version,
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'generate': bench_generate(args.sizes, args.ranges, args.seed, args.modes),
+        'grade': bench_grade(args.grade_repeat),
+    }
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# bench/bench_startup.py
+"""
+Myapp 启动耗时基准测试。
+在 结对项目 目录下运行：
+  python -m bench.bench_startup                    # 默认 20 次重复、20 份答案
+  python -m bench.bench_startup --out startup.json
+
+测量内容：
+  - import Myapp 的耗时（新起解释器，取中位数）
+  - 逐份调用 `python Myapp.py -e ... -a ...` 批改 N 份答案的总耗时
+  - 用一个 `python Myapp.py --serve` 进程批改同样 N 份答案的总耗时
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MYAPP = os.path.join(HERE, 'Myapp.py')
+
+
+def _run(cmd, cwd, stdin=None):
+    """运行一次子进程并返回耗时（秒），失败时抛出异常"""
+    t0 = time.perf_counter()
+    subprocess.run(cmd, cwd=cwd, input=stdin, text=True, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - t0
+
+
+def bench_import(repeat):
+    """新起解释器执行 import Myapp，与空解释器的启动耗时相减得到导入本身的开销"""
+    bare = [_run([sys.executable, '-c', 'pass'], HERE) for _ in range(repeat)]
+    imp = [_run([sys.executable, '-c', 'import Myapp'], HERE) for _ in range(repeat)]
+    return {
+        'interpreter_ms': statistics.median(bare) * 1000,
+        'import_ms': statistics.median(imp) * 1000,
+        'import_only_ms': (statistics.median(imp) - statistics.median(bare)) * 1000,
+    }
+
+
+def bench_grading(pairs, questions):
+    """在临时目录中生成一份题目，复制 pairs 份答案，分别用逐个进程和常驻服务批改"""
+    with tempfile.TemporaryDirectory() as tmp:
+        subprocess.run([sys.executable, MYAPP, '-n', str(questions), '-r', '10'],
+                       cwd=tmp, check=True, stdout=subprocess.DEVNULL)
+        with open(os.path.join(tmp, 'Answers.txt'), encoding='utf-8') as f:
+            answers = f.read()
+        names = []
+        for i in range(pairs):
+            name = f'stu{i}.txt'
+            with open(os.path.join(tmp, name), 'w', encoding='utf-8') as f:
+                f.write(answers)
+            names.append(name)
+
+        per_process = sum(_run([sys.executable, MYAPP, '-e', 'Exercises.txt', '-a', name], tmp)
+                          for name in names)
+        requests = ''.join(f'Exercises.txt {name}\n' for name in names)
+        served = _run([sys.executable, MYAPP, '--serve'], tmp, stdin=requests)
+    return {
+        'pairs': pairs,
+        'questions': questions,
+        'per_process_s': per_process,
+        'serve_s': served,
+        'speedup': per_process / served if served else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Myapp 启动耗时基准测试')
+    parser.add_argument('--repeat', type=int, default=20, help='导入耗时的重复次数')
+    parser.add_argument('--pairs', type=int, default=20, help='批改的答案份数')
+    parser.add_argument('--questions', type=int, default=100, help='每份题目的题数')
+    parser.add_argument('--out', help='结果保存为 JSON')
+    args = parser.parse_args()
+
+    result = {
+        'python': sys.version.split()[0],
+        'import': bench_import(args.repeat),
+        'grading': bench_grading(args.pairs, args.questions),
+    }
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -152,3 +152,562 @@ def test_generate_exercises_count_and_unique():
         s = ex.split('.', 1)[-1].strip().rstrip('=').strip()
         val = parse_and_eval(s)  # 直接解析求值
         assert val is not None
+
+# =================== 测试 grade_batch ===================
+def test_grade_batch_per_student_and_error_rates(tmp_path):
+    """
+    测试目标：
+        - grade_batch 为每位学生输出 Grade 文件
+        - error_rates.csv 正确统计每题错误率
+    测试思路：
+        - 构造 2 道题和 2 份答案（一份全对，一份第 2 题错误）
+        - 检查各自的 Grade 文件内容与 CSV 中第 2 题错误率为 0.5
+    """
+    from Myapp import grade_batch
+    ex = tmp_path / "Exercises.txt"
+    ex.write_text("1. 1/2 + 1/3 =\n2. 3 ÷ 2 =\n", encoding="utf-8")
+    s1 = tmp_path / "s1.txt"
+    s1.write_text("1. 5/6\n2. 1'1/2\n", encoding="utf-8")
+    s2 = tmp_path / "s2.txt"
+    s2.write_text("1. 5/6\n2. 2\n", encoding="utf-8")
+    out = tmp_path / "grades"
+
+    results = grade_batch(str(ex), [str(s1), str(s2)], outdir=str(out))
+    assert results[str(s1)] == ([1, 2], [])
+    assert results[str(s2)] == ([1], [2])
+    assert (out / "s2_Grade.txt").read_text(encoding="utf-8") == "Correct: 1 (1)\n\nWrong: 1 (2)\n"
+    rows = (out / "error_rates.csv").read_text(encoding="utf-8").splitlines()
+    assert rows[0] == "question,attempts,errors,error_rate"
+    assert rows[2] == "2,2,1,0.5000"
+
+def test_grade_batch_same_names_in_class_dirs(tmp_path):
+    """
+    测试目标：
+        - 不同目录下的同名答案文件各自保留批改结果，不互相覆盖
+        - 两份答案会写到同一个输出文件时报错，且不写出任何结果
+    测试思路：
+        - c1/stu.txt 与 c2/stu.txt 分别写到 grades/c1、grades/c2
+        - c1/stu.txt 与 c1/stu.md 文件名相同，应抛出 ValueError
+    """
+    from Myapp import grade_batch
+    ex = tmp_path / "Exercises.txt"
+    ex.write_text("1. 1/2 + 1/3 =\n", encoding="utf-8")
+    for cls, ans in (("c1", "5/6"), ("c2", "1")):
+        (tmp_path / cls).mkdir()
+        (tmp_path / cls / "stu.txt").write_text(f"1. {ans}\n", encoding="utf-8")
+    out = tmp_path / "grades"
+    files = [str(tmp_path / "c1" / "stu.txt"), str(tmp_path / "c2" / "stu.txt")]
+    grade_batch(str(ex), files, outdir=str(out))
+    assert (out / "c1" / "stu_Grade.txt").read_text(encoding="utf-8").startswith("Correct: 1 (1)")
+    assert (out / "c2" / "stu_Grade.txt").read_text(encoding="utf-8").startswith("Correct: 0 ()")
+
+    (tmp_path / "c1" / "stu.md").write_text("1. 5/6\n", encoding="utf-8")
+    other = tmp_path / "other"
+    with pytest.raises(ValueError):
+        grade_batch(str(ex), [files[0], str(tmp_path / "c1" / "stu.md")], outdir=str(other))
+    assert not other.exists()
+
+def test_grade_batch_with_key_file(tmp_path):
+    """
+    测试目标：
+        - 给出标准答案文件时 grade_batch 直接使用其中的答案
+    测试思路：
+        - 标准答案第 1 题写成 1，学生也答 1，应判为正确（说明未重新求值题目）
+    """
+    from Myapp import grade_batch
+    ex = tmp_path / "Exercises.txt"
+    ex.write_text("1. 1/2 + 1/3 =\n", encoding="utf-8")
+    key = tmp_path / "Answers.txt"
+    key.write_text("1. 1\n", encoding="utf-8")
+    stu = tmp_path / "stu.txt"
+    stu.write_text("1. 1\n", encoding="utf-8")
+    results = grade_batch(str(ex), [str(stu)], keyfile=str(key), outdir=str(tmp_path / "g"))
+    assert results[str(stu)] == ([1], [])
+
+# =================== 测试紧凑表示与缓存 ===================
+def test_nodes_use_slots_and_memoize():
+    """
+    测试目标：
+        - Number / Binary 不再带 __dict__
+        - canonical 对 + 的交换、结合归一化结果不变
+    测试思路：
+        - 构造 (1 + 2) + 3 与 3 + (2 + 1)，标准形式应相同
+        - 多次调用 canonical / to_str 返回同一结果
+    """
+    a = Binary('+', Binary('+', Number(Fraction(1)), Number(Fraction(2))), Number(Fraction(3)))
+    b = Binary('+', Number(Fraction(3)), Binary('+', Number(Fraction(2)), Number(Fraction(1))))
+    assert not hasattr(a, '__dict__')
+    assert a.canonical() == b.canonical() == "(1+2+3)"
+    assert a.to_str() == a.to_str() == "1 + 2 + 3"
+
+def test_postfix_roundtrip():
+    """
+    测试目标：
+        - to_postfix / from_postfix / eval_postfix 互相一致
+    测试思路：
+        - 构造 (1/2 + 3) * 4，检查后缀代码、求值结果与重建后的字符串
+    """
+    from Myapp import to_postfix, from_postfix, eval_postfix
+    e = Binary('*', Binary('+', Number(Fraction(1, 2)), Number(Fraction(3))), Number(Fraction(4)))
+    code, operands = to_postfix(e)
+    assert code == [0, 1, '+', 2, '*']
+    assert eval_postfix(code, operands) == e.eval() == Fraction(14)
+    assert from_postfix(code, operands).to_str() == e.to_str() == "(1/2 + 3) * 4"
+
+def test_expr_table_hash_consing():
+    """
+    测试目标：
+        - ExprTable 中结构相同的子表达式只有一个节点
+        - 类别编号在 + 和 * 的交换、结合下相同，并能区分 1 ÷ (2/3) 与 1/2 ÷ 3
+    测试思路：
+        - 两次构造 (1 + 2) * 3，应得到同一个节点并记一次命中
+        - 比较 (1 + 2) + 3 与 3 + (2 + 1) 的编号；两种除法的 canonical 字符串相同但编号不同
+    """
+    from Myapp import ExprTable
+    t = ExprTable()
+    one, two, three = (t.number(Fraction(v)) for v in (1, 2, 3))
+    a = t.binary('*', t.binary('+', one, two), three)
+    hits = t.hits
+    assert t.binary('*', t.binary('+', one, two), three) is a
+    assert t.hits == hits + 2
+    s1 = t.binary('+', t.binary('+', one, two), three)
+    s2 = t.binary('+', three, t.binary('+', two, one))
+    assert s1 is not s2
+    assert t.canonical_id(s1) == t.canonical_id(s2)
+    assert t.canonical_id(Binary('+', Number(Fraction(2)), Number(Fraction(1)))) == \
+        t.canonical_id(t.binary('+', one, two))
+    d1 = t.binary('/', one, t.number(Fraction(2, 3)))
+    d2 = t.binary('/', t.number(Fraction(1, 2)), three)
+    assert d1.canonical() == d2.canonical() == "(1/2/3)"
+    assert t.canonical_id(d1) != t.canonical_id(d2)
+
+def test_gen_expr_with_table_same_problems():
+    """
+    测试目标：
+        - 传入 ExprTable 不改变随机数消耗与生成结果，节点在各题之间共享
+    测试思路：
+        - 相同种子下分别不带表、带表生成 200 道题，比较显示字符串与答案
+    """
+    import random
+    from Myapp import ExprTable
+    random.seed(7)
+    plain = [gen_expr_with_ops(2, 10) for _ in range(200)]
+    random.seed(7)
+    table = ExprTable()
+    shared = [gen_expr_with_ops(2, 10, table=table) for _ in range(200)]
+    for p, s in zip(plain, shared):
+        assert (p is None) == (s is None)
+        if p is not None:
+            assert (p.to_str(), p.eval()) == (s.to_str(), s.eval())
+    assert table.hits > 0
+
+# =================== 测试单趟构建 ===================
+def test_gen_expr_carries_value():
+    """
+    测试目标：
+        - gen_expr_with_ops 构建时写入节点的值与重新求值一致
+    测试思路：
+        - 生成若干表达式，经后缀表示重建一棵不带缓存值的新树，重新求值并比较
+    """
+    from Myapp import to_postfix, from_postfix
+    for _ in range(50):
+        expr = gen_expr_with_ops(3, 10)
+        if expr is None:
+            continue
+        assert validate_tree(expr)
+        assert from_postfix(*to_postfix(expr)).eval() == expr.eval()
+
+# =================== 测试穷举生成 ===================
+def test_operand_pool_small_range():
+    """
+    测试目标：
+        - operand_pool 覆盖 gen_number 可能生成的全部数值
+    测试思路：
+        - r=3 时应为 0, 1/2, 1, 1'1/2, 2
+        - 随机生成的数一定落在池中
+    """
+    from Myapp import operand_pool
+    pool = operand_pool(3)
+    assert pool == [Fraction(0), Fraction(1, 2), Fraction(1), Fraction(3, 2), Fraction(2)]
+    for _ in range(100):
+        assert gen_number(3).eval() in pool
+
+def test_enumerate_exercises_distinct_and_valid():
+    """
+    测试目标：
+        - enumerate_exercises 的结果按 canonical 去重且全部合法
+        - 1 + 2 与 2 + 1 只计一次
+    测试思路：
+        - r=2 穷举，检查每层 canonical 唯一、validate_tree 通过、运算符个数正确
+    """
+    from Myapp import enumerate_exercises
+    levels = enumerate_exercises(2)
+    for k, level in enumerate(levels[1:], start=1):
+        keys = [e.canonical() for e in level]
+        assert len(keys) == len(set(keys))
+        for e in level:
+            assert validate_tree(e)
+            assert sum(e.to_str().count(op) for op in ' + - * ÷ '.split()) == k
+    assert sum(1 for e in levels[1] if e.canonical() == "(0+1)") == 1
+
+def test_generate_exercises_enum_reports_max():
+    """
+    测试目标：
+        - 穷举模式能在小范围内生成随机模式难以凑齐的题量
+        - 题目不足时立即报告可生成的最大数量
+    测试思路：
+        - r=3 生成 5000 道，检查数量与 canonical 去重
+        - r=2 请求 10000 道，断言抛出 RuntimeError 且提示总数
+    """
+    from Myapp import generate_exercises_enum, count_exercises
+    exercises, answers = generate_exercises_enum(5000, 3)
+    assert len(exercises) == len(answers) == 5000
+    assert len(set(exercises)) == 5000
+    total = count_exercises(2)
+    with pytest.raises(RuntimeError, match=str(total)):
+        generate_exercises_enum(10000, 2)
+
+# =================== 测试快速生成 ===================
+def test_operand_table_matches_pool():
+    """
+    测试目标：
+        - operand_table 的取值与 operand_pool 一致，累积概率末项为 1
+    测试思路：
+        - r=5 时比较取值集合，并检查 cum_weights 单调且最后约为 1
+    """
+    from Myapp import operand_table, operand_pool
+    nodes, pairs, cum = operand_table(5)
+    assert [n.eval() for n in nodes] == operand_pool(5)
+    assert [Fraction(*p) for p in pairs] == operand_pool(5)
+    assert all(a <= b for a, b in zip(cum, cum[1:]))
+    assert abs(cum[-1] - 1.0) < 1e-9
+
+def _recompute(node):
+    """不读节点缓存，沿子树重新求值"""
+    if isinstance(node, Number):
+        return node.frac
+    a, b = _recompute(node.left), _recompute(node.right)
+    if node.op == '+': return a + b
+    if node.op == '-': return a - b
+    if node.op == '*': return a * b
+    return a / b
+
+def test_gen_expr_fast_pair_matches_eval():
+    """
+    测试目标：
+        - gen_expr_fast 在整数对上算出的结果与 Fraction 求值一致，且满足题目约束
+        - 各运算节点带着未约分的 (分子, 分母)，eval 时才约分，结果不变
+    测试思路：
+        - 建表与不建表（table=None）两种情况各生成若干表达式并比较
+    """
+    from Myapp import operand_table, gen_expr_fast
+    for table in (operand_table(10), None):
+        for _ in range(50):
+            res = gen_expr_fast(3, 10, table)
+            if res is None:
+                continue
+            root, (num, den) = res
+            assert validate_tree(root)
+            assert root._value == (num, den)  # 生成时不约分
+            assert root.eval() == Fraction(num, den) and root._value == Fraction(num, den)
+            assert _recompute(root) == Fraction(num, den)
+
+def test_generate_exercises_fast_count():
+    """
+    测试目标：
+        - generate_exercises_fast 与 generate_exercises 输出格式一致
+    测试思路：
+        - 生成 100 道题，检查数量、结尾 ' =' 与答案格式
+    """
+    from Myapp import generate_exercises_fast
+    exercises, answers = generate_exercises_fast(100, 10)
+    assert len(exercises) == len(answers) == 100
+    assert all(e.endswith(' =') for e in exercises)
+    assert all(parse_mixed_fraction(a) >= 0 for a in answers)
+
+# =================== 测试流式写入与进度回调 ===================
+def test_write_exercises_streaming(tmp_path):
+    """
+    测试目标：
+        - write_exercises 边生成边写入，带编号，并逐题回调进度
+    测试思路：
+        - 用 iter_exercises 生成 20 道题写入临时目录
+        - 检查两个文件各 20 行、进度回调最后一次为 20、没有残留 .tmp 文件
+    """
+    from Myapp import iter_exercises, write_exercises
+    ex, ans = tmp_path / "Exercises.txt", tmp_path / "Answers.txt"
+    seen = []
+    write_exercises(iter_exercises(20, 10), str(ex), str(ans), progress=seen.append)
+    assert len(ex.read_text(encoding="utf-8").splitlines()) == 20
+    assert ans.read_text(encoding="utf-8").startswith("1. ")
+    assert seen[-1] == 20
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["Answers.txt", "Exercises.txt"]
+
+def test_write_exercises_cancel_leaves_no_file(tmp_path):
+    """
+    测试目标：
+        - 进度回调抛出异常（如 GUI 取消）时不留下半截文件
+    测试思路：
+        - 回调在第 5 题时抛出异常，检查目录为空
+    """
+    from Myapp import iter_exercises, write_exercises
+    def stop(done):
+        if done == 5:
+            raise KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        write_exercises(iter_exercises(20, 10), str(tmp_path / "E.txt"), str(tmp_path / "A.txt"), progress=stop)
+    assert list(tmp_path.iterdir()) == []
+
+def test_grade_progress(tmp_path, monkeypatch):
+    """
+    测试目标：
+        - grade 的进度回调按题目数量调用
+    测试思路：
+        - 2 道题的文件，进度应依次为 (1, 2), (2, 2)
+    """
+    from Myapp import grade
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "e.txt").write_text("1. 1 + 1 =\n2. 1/2 + 1/3 =\n", encoding="utf-8")
+    (tmp_path / "a.txt").write_text("1. 2\n2. 5/6\n", encoding="utf-8")
+    calls = []
+    grade("e.txt", "a.txt", progress=lambda done, total: calls.append((done, total)))
+    assert calls == [(1, 2), (2, 2)]
+    assert (tmp_path / "Grade.txt").read_text(encoding="utf-8").startswith("Correct: 2")
+
+# =================== 测试生成统计 ===================
+def test_gen_stats_counts_and_same_output():
+    """
+    测试目标：
+        - 开启 GenStats 不改变生成结果（随机数消耗相同）
+        - 各计数之间满足 尝试 = 收录 + 失败 + 重复
+    测试思路：
+        - 同一种子分别不带 / 带 stats 生成 200 道题并比较
+    """
+    import random
+    from Myapp import GenStats
+    random.seed(7)
+    plain = generate_exercises(200, 5)
+    stats = GenStats()
+    random.seed(7)
+    assert generate_exercises(200, 5, stats) == plain
+    assert stats.accepted == 200
+    assert stats.tries == stats.accepted + stats.expr_failed + stats.duplicate
+    assert stats.combine_tries >= stats.rejected_divzero + stats.rejected_div_integer
+    assert not stats.exhausted
+    assert "收录 200 道" in stats.report()
+
+def test_gen_stats_exhausted():
+    """
+    测试目标：
+        - 范围过小无法凑齐时 stats.exhausted 为 True，且仍抛出 RuntimeError
+    测试思路：
+        - r=2 请求 10000 道题
+    """
+    from Myapp import GenStats
+    stats = GenStats()
+    with pytest.raises(RuntimeError):
+        generate_exercises(10000, 2, stats)
+    assert stats.exhausted
+    assert stats.duplicate > 0
+
+def test_stats_rejected_with_enum_or_fast(monkeypatch, capsys):
+    """
+    测试目标：
+        - --stats 只统计默认的随机生成，与 --enum / --fast 同用时报参数错误而不是静默忽略
+    测试思路：
+        - 两种组合分别调用 main，检查以退出码 2 退出且错误信息提到 --stats
+    """
+    import sys
+    import Myapp
+    for mode in ("--enum", "--fast"):
+        monkeypatch.setattr(sys, "argv", ["Myapp.py", "-n", "5", "-r", "5", mode, "--stats"])
+        with pytest.raises(SystemExit) as exc:
+            Myapp.main()
+        assert exc.value.code == 2
+        assert "--stats" in capsys.readouterr().err
+
+# =================== 测试求值缓存 ===================
+def test_parse_cache_hits_and_normalization():
+    """
+    测试目标：
+        - 空白不同、÷ 与 / 写法不同的同一题目命中同一缓存项
+        - 超出容量时淘汰最久未使用的条目
+        - 含制表符的题目在命中缓存与直接求值时结果相同
+    测试思路：
+        - 依次求值 "1/2 + 1/3"、"1/2+1/3"，第二次应命中
+        - maxsize=1 时再求值另一题，缓存只剩 1 条
+    """
+    from Myapp import ParseCache
+    cache = ParseCache(maxsize=1)
+    assert cache.eval("1/2 + 1/3") == Fraction(5, 6)
+    assert cache.eval(" 1/2+1/3 ") == Fraction(5, 6)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert ParseCache.key("3 ÷ 2") == ParseCache.key("3/2")
+    cache.eval("3 ÷ 2")
+    assert len(cache) == 1
+    assert cache.hit_rate() == pytest.approx(1 / 3)
+
+    # 制表符等空白在缓存与 parse_and_eval 两条路径上处理相同，结果与缓存状态无关
+    warm = ParseCache()
+    warm.eval("1 2")
+    for text in ("1\t2", "1 \t 2", "1/2\t+ 1/3"):
+        assert warm.eval(text) == parse_and_eval(text) == ParseCache().eval(text)
+
+def test_parse_cache_persist_and_grade(tmp_path, monkeypatch):
+    """
+    测试目标：
+        - 缓存保存后重新加载，重复批改时全部命中且结果不变
+        - 结果不是数值的题目（如 "()"）判错且不写入缓存，保存时不会出错
+    测试思路：
+        - 第一次批改后保存缓存，第二次加载缓存批改，合法题目全部命中
+    """
+    from Myapp import ParseCache, grade
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "e.txt").write_text("1. 1 + 1 =\n2. 1/2 + 1/3 =\n3. () =\n", encoding="utf-8")
+    (tmp_path / "a.txt").write_text("1. 2\n2. 1\n3. 0\n", encoding="utf-8")
+    cache = ParseCache()
+    grade("e.txt", "a.txt", cache=cache)
+    first = (tmp_path / "Grade.txt").read_text(encoding="utf-8")
+    assert first.startswith("Correct: 1 (1)") and "Wrong: 2 (2, 3)" in first
+    cache.save("bank.cache.json")
+
+    reloaded = ParseCache.load("bank.cache.json")
+    assert len(reloaded) == 2
+    grade("e.txt", "a.txt", cache=reloaded)
+    assert (reloaded.hits, len(reloaded)) == (2, 2)
+    assert (tmp_path / "Grade.txt").read_text(encoding="utf-8") == first
+    assert len(ParseCache.load("missing.json")) == 0
+
+# =================== 测试整数数组比对 ===================
+def test_compare_fraction_arrays_python_and_numpy(monkeypatch):
+    """
+    测试目标：
+        - 纯 Python 比对与 numpy 向量化比对（若已安装）结果完全相同
+        - 分母为 0（无法解析）判错；超出 int64 安全范围时自动退回纯 Python
+    测试思路：
+        - 构造 300 道题（超过 VECTOR_MIN），含等值不同写法、错误答案、无效项和超大整数
+    """
+    import Myapp
+    from Myapp import compare_fraction_arrays, fraction_arrays
+    exp = [Fraction(i, 7) for i in range(300)]
+    ans = list(exp)
+    ans[3] = Fraction(4, 7)         # 错误答案
+    ans[5] = None                   # 无法解析
+    exp[8] = ans[8] = Fraction(2 ** 70, 3)  # 超大整数
+    en, ed = fraction_arrays(exp)
+    an, ad = fraction_arrays(ans)
+
+    monkeypatch.setattr(Myapp, "_np", None)
+    expected = compare_fraction_arrays(en, ed, an, ad)
+    assert expected[1] == [4, 6]
+    assert len(expected[0]) == 298
+
+    np = pytest.importorskip("numpy")
+    monkeypatch.setattr(Myapp, "_np", np)
+    assert compare_fraction_arrays(en, ed, an, ad) == expected
+    ed[8] = ad[8] = 7
+    en[8] = an[8] = 8
+    assert compare_fraction_arrays(en, ed, an, ad) == expected
+
+def test_check_answers_non_numeric():
+    """
+    测试目标：
+        - 能被 eval 但结果不是数值的答案或题目（如 "()"、"(())"）判错，而不是在拆分子分母时崩溃
+    测试思路：
+        - 答案行为 "()" 等非数值内容，题目行为 "()"，检查对应题号记为错误
+    """
+    from Myapp import check_answers, _answer_value, _exercise_value
+    assert check_answers([Fraction(3), Fraction(5, 6)], ['1. ()', '2. 5/6']) == ([2], [1])
+    for line in ('1. ()', '1. (())', '1. abc', '1. '):
+        assert _answer_value(line) is None
+    assert _exercise_value('1. () =') is None
+    assert _exercise_value('2. 1/2 + 1/3 =') == Fraction(5, 6)
+    expected = [_exercise_value('1. () ='), Fraction(1)]
+    assert check_answers(expected, ['1. ()', '2. 1']) == ([2], [1])
+
+# =================== 测试快速启动与常驻批改服务 ===================
+def test_strip_prefix_and_quick_args():
+    """
+    测试目标：
+        - 不用正则的 strip_number_prefix 与原正则写法结果一致；TOKEN_REGEX 仍可按需访问
+        - 常见参数走快速解析，-s、-h、重复或非法写法交给 argparse
+    测试思路：
+        - 对若干边界输入与 re.sub 的结果逐一比较
+        - 检查 _quick_args 的返回值
+    """
+    import re
+    import Myapp
+    from Myapp import strip_number_prefix, _quick_args
+    for s in ["1. 3/5 + 1/2 =", "  10.  2'1/3", "3/5", "12 + 1", ".5", "7.", "", "x1. 2"]:
+        assert strip_number_prefix(s) == re.sub(r'^\s*\d+\.\s*', '', s)
+    assert Myapp.TOKEN_REGEX.findall("2'1/3+(1/2)") == ["2'1/3", "+", "(", "1/2", ")"]
+
+    args = _quick_args(["-e", "E.txt", "-a", "A.txt", "--cache", "c.json"])
+    assert (args.e, args.a, args.cache, args.serve) == ("E.txt", "A.txt", "c.json", None)
+    args = _quick_args(["-n", "10", "-r", "5", "--fast"])
+    assert (args.n, args.r, args.fast, args.enum) == (10, 5, True, False)
+    for argv in (["-s", "a", "b"], ["-h"], ["-n", "1", "-n", "2"], ["-n", "x"],
+                 ["-e"], ["--serve"], ["--enum", "--fast"]):
+        assert _quick_args(argv) is None
+
+
+def test_serve_grades_many_pairs(tmp_path, monkeypatch):
+    """
+    测试目标：
+        - serve 逐行处理请求，每条输出一行 JSON，结果文件与 grade 一致
+        - 缓存跨请求复用；错误请求返回 error 而不中断服务；quit 结束循环
+    测试思路：
+        - 同一题目文件配两份答案，并夹杂不存在的文件与格式错误的行
+    """
+    import io
+    import json
+    import os
+    from Myapp import ParseCache, serve, grade
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "e.txt").write_text("1. 1 + 1 =\n2. 1/2 + 1/3 =\n", encoding="utf-8")
+    (tmp_path / "s1.txt").write_text("1. 2\n2. 5/6\n", encoding="utf-8")
+    (tmp_path / "s2.txt").write_text("1. 3\n2. 5/6\n", encoding="utf-8")
+    cache = ParseCache()
+    out = io.StringIO()
+    requests = "e.txt s1.txt\n\ne.txt\ts2.txt\tmy grade.txt\nnope.txt s1.txt\nbad\nquit\ne.txt s1.txt\n"
+    assert serve(io.StringIO(requests), out, cache, outdir="grades") == 4
+
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert results[0]["out"] == os.path.join("grades", "s1_Grade.txt")
+    assert (results[0]["correct"], results[0]["wrong"]) == (2, 0)
+    assert results[1]["out"] == os.path.join("grades", "my grade.txt")
+    assert (results[1]["correct"], results[1]["wrong"]) == (1, 1)
+    assert "FileNotFoundError" in results[2]["error"]
+    assert "error" in results[3]
+    assert cache.hits == 2 and cache.misses == 2
+
+    grade("e.txt", "s2.txt")
+    assert (tmp_path / "grades" / "my grade.txt").read_text(encoding="utf-8") == \
+        (tmp_path / "Grade.txt").read_text(encoding="utf-8")
+
+def test_serve_output_confined_to_outdir(tmp_path, monkeypatch):
+    """
+    测试目标：
+        - 请求中的输出文件只能落在 outdir 内：绝对路径、.. 与指向外部的符号链接都被拒绝，
+          且不会创建目录或文件
+    测试思路：
+        - 依次发送越界的输出路径，检查返回 error 且目标不存在；子目录内的相对路径照常写出
+    """
+    import os
+    from Myapp import serve_request
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "e.txt").write_text("1. 1 + 1 =\n", encoding="utf-8")
+    (tmp_path / "s.txt").write_text("1. 2\n", encoding="utf-8")
+    (tmp_path / "grades").mkdir()
+    outside = tmp_path / "elsewhere"
+    outside.mkdir()
+    os.symlink(outside, tmp_path / "grades" / "link")
+    for name in (str(outside / "clobbered.txt"), "../elsewhere/clobbered.txt",
+                 "sub/../../x.txt", "link/clobbered.txt"):
+        result = serve_request(f"e.txt\ts.txt\t{name}", outdir="grades")
+        assert "ValueError" in result["error"], name
+    assert list(outside.iterdir()) == [] and not (tmp_path / "x.txt").exists()
+
+    result = serve_request("e.txt s.txt c1/stu_Grade.txt", outdir="grades")
+    assert result["out"] == os.path.join("grades", "c1", "stu_Grade.txt")
+    assert (tmp_path / "grades" / "c1" / "stu_Grade.txt").exists()
@@ -0,0 +1,112 @@
+# test_myapp_bank.py
+import pytest
+from fractions import Fraction
+from Myapp import Number, Binary, parse_mixed_fraction
+from Myapp_bank import (ExerciseBank, build_bank, canonical_digest, decode_record,
+                        encode_record, _get_varint, _put_varint)
+
+# =================== 测试编码 ===================
+def test_varint_roundtrip():
+    """
+    测试目标：
+        - 变长整数编码可以还原任意大小的非负整数
+    测试思路：
+        - 对 0、边界值 127/128 以及超过 64 位的整数编码后再解码
+    """
+    for v in (0, 1, 127, 128, 300, 2 ** 64 + 5):
+        buf = bytearray()
+        _put_varint(buf, v)
+        assert _get_varint(buf, 0) == (v, len(buf))
+
+def test_record_roundtrip():
+    """
+    测试目标：
+        - encode_record / decode_record 还原表达式、答案与摘要
+    测试思路：
+        - 构造 (1/2 + 3) ÷ 4，编码后解码，比较显示字符串、答案与 canonical 摘要
+    """
+    e = Binary('/', Binary('+', Number(Fraction(1, 2)), Number(Fraction(3))), Number(Fraction(4)))
+    item = decode_record(encode_record(e, e.eval()))
+    assert item.expr.to_str() == e.to_str()
+    assert item.answer == Fraction(7, 8)
+    assert item.digest == canonical_digest(e)
+
+# =================== 测试题库读写 ===================
+def test_bank_build_lookup_and_export(tmp_path):
+    """
+    测试目标：
+        - build_bank 生成的题目不重复，可按编号随机读取
+        - 抽样导出为现有文本格式
+    测试思路：
+        - 生成 500 道题，检查长度、摘要唯一、负下标与越界
+        - 抽取 10 道导出，答案能被 parse_mixed_fraction 解析
+    """
+    path = tmp_path / "bank.exb"
+    assert build_bank(str(path), 500, 10) == 500
+    with ExerciseBank(str(path)) as bank:
+        assert len(bank) == 500
+        assert len({bank[k].digest for k in range(len(bank))}) == 500
+        assert bank[-1].digest == bank[499].digest
+        assert bank[3].expr.eval() == bank[3].answer
+        assert bank.exercise(0).endswith(' =')
+        with pytest.raises(IndexError):
+            bank[500]
+        ex, ans = tmp_path / "E.txt", tmp_path / "A.txt"
+        bank.export_text(str(ex), str(ans), bank.sample(10))
+    lines = ans.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 10
+    assert all(parse_mixed_fraction(line.split('. ', 1)[1]) >= 0 for line in lines)
+
+def test_bank_rejects_other_files(tmp_path):
+    """
+    测试目标：
+        - 打开非题库文件时报 ValueError
+    """
+    p = tmp_path / "x.exb"
+    p.write_bytes(b"not a bank file at all, definitely")
+    with pytest.raises(ValueError):
+        ExerciseBank(str(p))
+
+# =================== 测试难度特征与分层抽卷 ===================
+def test_problem_features():
+    """
+    测试目标：
+        - problem_features 正确统计运算符个数、分数、带分数与最大中间分母
+    测试思路：
+        - 1'1/2 + 1/3 ：含分数与带分数，中间结果 11/6，最大分母 6
+        - 1 + 2 ：纯整数，难度为 easy
+    """
+    from Myapp_bank import problem_features, difficulty_of
+    e = Binary('+', Number(Fraction(3, 2)), Number(Fraction(1, 3)))
+    ft = problem_features(e)
+    assert ft == (1, True, True, 6)
+    easy = problem_features(Binary('+', Number(Fraction(1)), Number(Fraction(2))))
+    assert easy == (1, False, False, 1)
+    assert difficulty_of(easy) == 'easy'
+
+def test_worksheet_sampler_mix(tmp_path):
+    """
+    测试目标：
+        - 特征文件与题库一一对应
+        - 按难度配比抽卷时各难度题数正确、题号不重复
+        - 题数不足时抛出 ValueError
+    测试思路：
+        - 建 300 道题的题库并写特征文件，按 easy/medium/hard 抽取后逐题核对难度
+    """
+    from Myapp_bank import (WorksheetSampler, difficulty_of, problem_features,
+                            read_feature_index, write_feature_index)
+    path = str(tmp_path / "bank.exb")
+    build_bank(path, 300, 10)
+    write_feature_index(path)
+    assert len(read_feature_index(path + '.feat')) == 300
+
+    sampler = WorksheetSampler(path)
+    mix = {level: min(5, sampler.count(level)) for level in ('easy', 'medium', 'hard')}
+    picked = sampler.sample(mix)
+    assert len(picked) == len(set(picked)) == sum(mix.values())
+    with ExerciseBank(path) as bank:
+        got = [difficulty_of(problem_features(bank[k].expr, bank[k].answer)) for k in picked]
+    for level, m in mix.items():
+        assert got.count(level) == m
+    with pytest.raises(ValueError):
+        sampler.sample({'easy': 301})
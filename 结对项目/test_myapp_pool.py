@@ -0,0 +1,160 @@
+# test_myapp_pool.py
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+from Myapp_pool import MAX_TIMEOUT, ProblemPool, make_server
+
+
+def _ops(exercise):
+    """题目中的运算符个数（运算符两侧都有空格）"""
+    return sum(exercise.split().count(op) for op in '+-*÷')
+
+
+def _wait_level(pool, r, ops, level, timeout=10.0):
+    """等待桶补货到 level 道题"""
+    deadline = time.monotonic() + timeout
+    bucket = pool.bucket(r, ops)
+    while time.monotonic() < deadline:
+        if bucket.stats()['level'] >= level:
+            return True
+        time.sleep(0.01)
+    return False
+
+# =================== 测试取题 ===================
+def test_pool_take_valid_unique():
+    """
+    测试目标：
+        - 从池中取出的题目运算符个数正确、互不重复，并带有答案
+    测试思路：
+        - 容量 100 的池，预热 r=10, ops=2 后取 50 道，逐道检查运算符个数与答案
+    """
+    with ProblemPool(capacity=100) as pool:
+        pool.warm([10], ops=(2,))
+        assert _wait_level(pool, 10, 2, 100)
+        problems = pool.take(10, 50, ops=2)
+        assert len(problems) == 50
+        assert len({ex for ex, _ in problems}) == 50
+        for ex, ans in problems:
+            assert _ops(ex) == 2
+            assert ex.endswith(' =') and ans
+
+def test_pool_refills_after_drain():
+    """
+    测试目标：
+        - 缓冲区降到低水位以下后，后台线程自动补满并记录补货吞吐
+    测试思路：
+        - 取走大部分题目，等待存量回到容量，检查 generated 与 refill_rate
+    """
+    with ProblemPool(capacity=60, low=30) as pool:
+        pool.warm([20], ops=(1,))
+        assert _wait_level(pool, 20, 1, 60)
+        assert len(pool.take(20, 50, ops=1)) == 50
+        assert _wait_level(pool, 20, 1, 60)
+        stats = pool.stats()[0]
+        assert stats['served'] == 50
+        assert stats['generated'] >= 110
+        assert stats['refill_rate'] > 0
+
+def test_pool_exhausted_space_returns_early():
+    """
+    测试目标：
+        - 题目空间不足容量时补货线程暂停，取题不会等到超时
+    测试思路：
+        - r=2 时一个运算符的题目只有十几种，容量 200 的桶取 200 道应很快返回且少于 200 道
+    """
+    with ProblemPool(capacity=200) as pool:
+        t0 = time.monotonic()
+        problems = pool.take(2, 200, ops=1, timeout=MAX_TIMEOUT)
+        assert time.monotonic() - t0 < MAX_TIMEOUT / 2
+        assert 0 < len(problems) < 200
+        assert len({ex for ex, _ in problems}) == len(problems)
+        assert pool.stats()[0]['stalled'] is False  # 取题后恢复补货
+
+def test_pool_mixed_ops_and_bad_args():
+    """
+    测试目标：
+        - 不指定 ops 时从 1~3 的桶中混合取题；非法参数抛出 ValueError
+    测试思路：
+        - 取 30 道不指定 ops 的题，检查运算符个数范围；再传入 ops=4、n=0
+    """
+    with ProblemPool(capacity=50) as pool:
+        problems = pool.take(10, 30, timeout=5.0)
+        assert len(problems) == 30
+        assert all(1 <= _ops(ex) <= 3 for ex, _ in problems)
+        with pytest.raises(ValueError):
+            pool.take(10, 5, ops=4)
+        with pytest.raises(ValueError):
+            pool.take(10, 0)
+
+def test_pool_limits_ranges_and_wait(monkeypatch):
+    """
+    测试目标：
+        - 只接受配置的 r（默认 1~MAX_RANGE），不会为任意 r 创建桶和补货线程
+        - timeout 限制在 0~MAX_TIMEOUT；不指定 ops 时各桶共用一个截止时刻，总等待不超过 timeout
+    测试思路：
+        - 默认池请求 r=0 与超过上限的 r，ranges={10} 的池请求 r=11，均抛出 ValueError 且不建桶
+        - 让生成总是失败（桶一直是空的），不指定 ops 取题，耗时应接近 timeout 而不是三倍；
+          过大的 timeout 按 MAX_TIMEOUT 等待
+    """
+    import Myapp_pool
+    with ProblemPool(capacity=50) as pool:
+        for r in (0, Myapp_pool.MAX_RANGE + 1, 10 ** 9):
+            with pytest.raises(ValueError):
+                pool.take(r, 5, ops=1)
+        assert pool.stats() == []
+    with ProblemPool(capacity=50, ranges={10}) as pool:
+        with pytest.raises(ValueError):
+            pool.take(11, 5, ops=1)
+        with pytest.raises(ValueError):
+            pool.take(10, 5, timeout=float('nan'))
+        assert pool.stats() == []
+        t0 = time.monotonic()
+        pool.take(10, 5, ops=1, timeout=-5)  # 负数按 0 处理，不等待
+        assert time.monotonic() - t0 < 1.0
+    with pytest.raises(ValueError):
+        ProblemPool(ranges=[])
+
+    def never(k, r):
+        time.sleep(0.001)
+        return None
+    monkeypatch.setattr(Myapp_pool, 'gen_expr_with_ops', never)
+    with ProblemPool(capacity=50) as pool:
+        t0 = time.monotonic()
+        assert pool.take(10, 30, timeout=0.5) == []
+        assert time.monotonic() - t0 < 1.0
+        monkeypatch.setattr(Myapp_pool, 'MAX_TIMEOUT', 0.5)
+        t0 = time.monotonic()
+        assert pool.take(10, 30, timeout=1e9) == []  # 过大的 timeout 被截到 MAX_TIMEOUT
+        assert time.monotonic() - t0 < 1.0
+
+# =================== 测试 HTTP 服务 ===================
+def test_pool_http_server():
+    """
+    测试目标：
+        - /problems 返回 JSON 题目列表，/stats 返回各桶统计，缺少参数、r 超出范围等返回 400
+    测试思路：
+        - 在随机端口启动服务，用 urllib 依次请求三个地址
+    """
+    with ProblemPool(capacity=50) as pool:
+        server = make_server(pool, 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f'http://127.0.0.1:{server.server_address[1]}'
+        try:
+            with urllib.request.urlopen(base + '/problems?r=10&n=20&ops=3') as resp:
+                body = json.loads(resp.read().decode('utf-8'))
+            assert body['count'] == 20
+            assert all(p['exercise'].endswith(' =') for p in body['problems'])
+            with urllib.request.urlopen(base + '/stats') as resp:
+                stats = json.loads(resp.read().decode('utf-8'))['buckets']
+            assert [(s['r'], s['ops']) for s in stats] == [(10, 3)]
+            for query in ('n=5', 'r=100000&n=5', 'r=10&timeout=x'):
+                with pytest.raises(urllib.error.HTTPError) as err:
+                    urllib.request.urlopen(base + '/problems?' + query)
+                assert err.value.code == 400
+        finally:
+            server.shutdown()
+            server.server_close()